@@ -0,0 +1,253 @@
+from game_logic.board_utils import BoardConstants as constants, BoardTables as tables
+from algorithms.eval_weights import load_eval_weights
+try:
+    import numpy as np
+except ImportError: # numpy is optional; without it boards are scored one at a time with the same formula
+    np = None
+
+
+'''
+    Gets the squares from which a pawn of the given color attacks any of the target squares
+
+    PARAMS
+    targets: an integer mask of the target squares
+    color: the color of the pawns
+
+    RETURNS
+    an integer mask of the squares
+'''
+def _get_pawn_sources(targets, color):
+    return sum(1 << index for index in range(64) if tables.PAWN_ATTACKS[color][index] & targets)
+
+
+class BatchEvaluations():
+    '''
+        A light evaluation that scores many boards at once, used for the leaves of a search when MiniMax.use_batch_eval is set.
+        Each board is encoded as a row of bitboards, and the rows are scored together with vectorized popcounts and masks,
+        so the cost of the Python interpreter is paid once per batch rather than once per board.
+
+        Only the terms that can be read from the bitboards without generating moves are used:
+            material, with the same game phase and position state scaling as Evaluations.get_score
+            rank points for every piece (as Evaluations.get_position_score)
+            pieces sheltering the king (as Evaluations.get_king_security)
+            center control: pieces on and around the four center squares, and pawns attacking the center
+        As in Evaluations.get_score, each term is weighted for the game phase, and everything but material is scaled by the
+        weights' score scale (1/4). The first three terms match the engine's exactly. Center control only approximates
+        Evaluations.get_focal_points, which counts the moves of every piece, though it reads the same focal point weights;
+        it can be left out (as the Texel tuner does) so the score is a subset of the engine's.
+
+        Without numpy the rows are scored one by one, with the same formula.
+
+        ATTRIBUTES
+        use_numpy: whether batches are scored with numpy (False if numpy isn't installed)
+        weights: the evaluation weights the terms are scored with, as in Evaluations
+        center_control: whether the center control term is scored
+
+        METHODS
+        encode(board)
+            returns the row of bitboards a board is scored from
+
+        get_scores(rows, color, winning_boards)
+            scores encoded boards from a color's perspective
+            returns a list of scores, one per row
+
+        get_array_scores(columns, color, winning_boards)
+            scores encoded boards held as numpy columns from a color's perspective
+            returns an array of scores, one per board
+    '''
+
+    # the columns of an encoded board
+    COLUMNS = ('white_pawns', 'white_rooks', 'white_knights', 'white_bishops', 'white_queens', 'white_king',
+               'black_pawns', 'black_rooks', 'black_knights', 'black_bishops', 'black_queens', 'black_king',
+               'white_immediate_shelter', 'white_wide_shelter', 'white_sinu_wide_shelter',
+               'black_immediate_shelter', 'black_wide_shelter', 'black_sinu_wide_shelter')
+    COLUMN_INDEXES = {name: column for column, name in enumerate(COLUMNS)}
+
+    RANK_MASKS = [0xff << 8 * row for row in range(8)]
+    CENTER = 0x1818 << 8 * 3
+    WIDER_CENTER = 0x3c24243c00 << 8
+    # (white, black) masks of the squares from which a pawn attacks the center
+    CENTER_PAWN_SOURCES = (_get_pawn_sources(CENTER, constants.WHITE), _get_pawn_sources(CENTER, constants.BLACK))
+
+    '''
+        PARAMS
+        use_numpy: whether to score batches with numpy when it is installed
+        weights: a dictionary of evaluation weights, or None for the weights in eval_weights.json
+        center_control: whether to score the center control term
+    '''
+    def __init__(self, use_numpy=True, weights=None, center_control=True):
+        self.use_numpy = use_numpy and np is not None
+        self.weights = load_eval_weights() if weights is None else weights
+        self.center_control = center_control
+
+    # the helper holds no board state, so copies of a searcher can share it
+    def __deepcopy__(self, memo):
+        return self
+
+    '''
+        Encodes a board as the row of bitboards it is scored from. Squares past the last one (left by king moves off the board)
+        are dropped, so every value fits in 64 bits.
+
+        PARAMS
+        board: the Board to encode
+
+        RETURNS
+        a tuple of integer masks, one per name in COLUMNS
+    '''
+    def encode(self, board):
+        full = constants.FULL_BOARD
+        white_immediate, white_diag_wide, white_cross_wide, white_sinu_wide = board.get_king_shelter(constants.WHITE)
+        black_immediate, black_diag_wide, black_cross_wide, black_sinu_wide = board.get_king_shelter(constants.BLACK)
+        return (board.white_pawns & full, board.white_rooks & full, board.white_knights & full,
+                board.white_bishops & full, board.white_queens & full, board.white_king & full,
+                board.black_pawns & full, board.black_rooks & full, board.black_knights & full,
+                board.black_bishops & full, board.black_queens & full, board.black_king & full,
+                white_immediate, white_cross_wide | white_diag_wide, white_sinu_wide,
+                black_immediate, black_cross_wide | black_diag_wide, black_sinu_wide)
+
+    '''
+        Scores encoded boards from a color's perspective
+
+        PARAMS
+        rows: a list of rows returned by encode
+        color: the color from whose perspective the boards are scored
+        winning_boards: a list with one integer per row, where 1 indicates a winning board (checkmate) and 2 a stalemate
+
+        RETURNS
+        a list of floating point scores, one per row
+    '''
+    def get_scores(self, rows, color, winning_boards):
+        if (not rows):
+            return []
+        if (self.use_numpy):
+            columns = np.array(rows, dtype=np.uint64).T
+            return self.get_array_scores(columns, color, np.array(winning_boards)).tolist()
+        return [self._score(row, color, winning != 0, int.bit_count, _select) for row, winning in zip(rows, winning_boards)]
+
+    '''
+        Scores a batch of encoded boards already held as numpy columns, so a caller scoring the same boards many times (such
+        as the Texel tuner) converts them only once. Needs numpy.
+
+        PARAMS
+        columns: a uint64 array with one row per name in COLUMNS and one column per board
+        color: the color from whose perspective the boards are scored
+        winning_boards: an integer array with one value per board, as in get_scores
+
+        RETURNS
+        a floating point array of scores, one per board
+    '''
+    def get_array_scores(self, columns, color, winning_boards):
+        return self._score(columns, color, winning_boards != 0, _count_array, np.select)
+
+    '''
+        Scores one board, or a batch of boards at once, from its columns. Written once for both: with numpy each column is an
+        array holding that bitboard for every board in the batch, otherwise it is a single integer.
+
+        PARAMS
+        columns: the encoded board's columns, indexed as in COLUMNS
+        color: the color from whose perspective the board is scored
+        winning: whether the board is a winning (or stalemate) board
+        count: a function returning the number of set bits of a column
+        select: a function choosing, like numpy.select, the choice paired with the first true condition
+
+        RETURNS
+        the score (or array of scores) of the board
+    '''
+    def _score(self, columns, color, winning, count, select):
+        index = self.COLUMN_INDEXES
+        weights = self.weights
+        counts = [count(column) for column in columns[:12]]
+        white_pawns, white_rooks, white_knights, white_bishops, white_queens, white_king, \
+            black_pawns, black_rooks, black_knights, black_bishops, black_queens, black_king = counts
+
+        # game phase, as the board keeps it, and the term weights blended for it as in Evaluations.get_score
+        phase = (white_knights + black_knights + white_bishops + black_bishops) + 2*(white_rooks + black_rooks) + \
+            4*(white_queens + black_queens)
+        midgame = select([phase >= constants.MAX_PHASE], [constants.MAX_PHASE], phase) / constants.MAX_PHASE
+        phase_weights = {term: midgame_weight * midgame + endgame_weight * (1 - midgame)
+                         for term, (midgame_weight, endgame_weight) in weights['taper'].items()}
+        values = weights['piece_values']
+        pawn = values['pawn'] * phase_weights['pawn']
+
+        # position state, from the color's own pawns
+        if (color == constants.WHITE):
+            own, opponent, prefix = counts[:6], counts[6:], 'white_'
+        else:
+            own, opponent, prefix = counts[6:], counts[:6], 'black_'
+        pawn_count = own[0]
+        states = weights['position_states']
+        position_state = [pawn_count >= state['min_pawns'] for state in states[:-1]]
+        queen, rook, bishop, knight = (values[piece] * select(position_state, [state[piece] for state in states[:-1]],
+                                                              states[-1][piece])
+                                       for piece in ('queen', 'rook', 'bishop', 'knight'))
+        material = pawn*(own[0] - opponent[0]) + rook*(own[1] - opponent[1]) + knight*(own[2] - opponent[2]) + \
+            bishop*(own[3] - opponent[3]) + queen*(own[4] - opponent[4]) + values['king']*(own[5] - opponent[5])
+
+        pawns = columns[index[prefix + 'pawns']]
+        queens = columns[index[prefix + 'queens']]
+        rooks = columns[index[prefix + 'rooks']]
+        knights = columns[index[prefix + 'knights']]
+        bishops = columns[index[prefix + 'bishops']]
+        pieces = pawns | queens | rooks | knights | bishops | columns[index[prefix + 'king']]
+
+        score_mod = weights['win_bonus'] * winning
+
+        # rank points, counted from the color's own first rank
+        rank_masks = self.RANK_MASKS if color == constants.WHITE else self.RANK_MASKS[::-1]
+        position_score = 0.0
+        for rank_mask, points in zip(rank_masks, weights['rank_points']):
+            position_score += points * count(pieces & rank_mask)
+        score_mod += phase_weights['position'] * position_score
+
+        # king security
+        immediate = columns[index[prefix + 'immediate_shelter']]
+        wide = columns[index[prefix + 'wide_shelter']]
+        sinu_wide = columns[index[prefix + 'sinu_wide_shelter']]
+        full_shelter = immediate | wide | sinu_wide
+        points = weights['king_security']
+        king_security = points['immediate_pawn']*count(pawns & immediate) + points['wide_pawn']*count(pawns & wide) + \
+            points['sinu_wide_pawn']*count(pawns & sinu_wide)
+        king_security += points['queen']*count(full_shelter & queens) + points['rook']*count(full_shelter & rooks) + \
+            points['knight']*count(full_shelter & knights) + points['bishop']*count(full_shelter & bishops)
+        score_mod += phase_weights['king security'] * king_security
+
+        # center control, weighted like the focal points (an approximation of Evaluations.get_focal_points)
+        if (self.center_control):
+            points = weights['focal_points']
+            center_control = points['pawn']*count(pawns & self.CENTER) + points['queen']*count(queens & self.CENTER) + \
+                points['piece']*count((pieces & ~(pawns | queens)) & self.CENTER)
+            center_control += points['wider_center_piece']*count(pieces & self.WIDER_CENTER)
+            center_control += points['center_move']*count(pawns & self.CENTER_PAWN_SOURCES[color])
+            score_mod += phase_weights['focal points'] * center_control
+
+        return material + score_mod * weights['score_scale']
+
+
+if (np is not None):
+    # number of set bits in each byte value
+    _BYTE_COUNTS = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+'''
+    Counts the set bits of every value of a uint64 array
+
+    PARAMS
+    array: a numpy array of uint64 bitboards
+
+    RETURNS
+    an integer array of the same shape holding the number of set bits of each bitboard
+'''
+def _count_array(array):
+    if (hasattr(np, 'bitwise_count')):
+        return np.bitwise_count(array).astype(np.int64)
+    # viewing the bytes of a strided slice (such as one board's column of a batch) needs a contiguous copy
+    array = np.ascontiguousarray(array)
+    return _BYTE_COUNTS[array.view(np.uint8)].reshape(array.shape + (8,)).sum(axis=-1, dtype=np.int64)
+
+'''
+    Chooses the choice paired with the first true condition, like numpy.select for single values
+'''
+def _select(conditions, choices, default):
+    for condition, choice in zip(conditions, choices):
+        if condition:
+            return choice
+    return default
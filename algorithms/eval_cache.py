@@ -0,0 +1,79 @@
+class EvalCache:
+    '''
+        A fixed size, always-replace cache of evaluation results, so that a position reached again (through a different move
+        order, or scored again for another move) is evaluated only once. Boards keep one for whole-board scores and a smaller
+        one, keyed by pawns alone, for pawn structure terms.
+
+        Each slot holds a single (key, score) tuple, so a slot is always replaced in one step and a reader never sees a key
+        paired with another key's score, even with several threads sharing the cache.
+
+        ATTRIBUTES
+        size: the number of slots (a power of two)
+        slots: the (key, score) entries, or None for empty slots
+        hits: the number of lookups that found a score
+        misses: the number of lookups that did not
+
+        METHODS
+        probe(key)
+            looks up the score stored for a key
+            returns the score, or None if the key has no entry
+
+        store(key, score)
+            saves the score for a key, replacing whatever was in its slot
+            returns None
+
+        clear()
+            empties the cache and resets its counters
+            returns None
+
+        get_hit_rate()
+            returns the fraction of lookups that found a score, or 0 without any lookup
+    '''
+
+    def __init__(self, size=1 << 16):
+        if (size & (size - 1)):
+            raise ValueError("evaluation cache size must be a power of two")
+        self.size = size
+        self.slots = [None] * size
+        self.hits = 0
+        self.misses = 0
+
+    # the cache is shared between a board and its copies, like the board's other helpers
+    def __deepcopy__(self, memo):
+        return self
+
+    '''
+        Looks up the score stored for the given key
+
+        PARAMS
+        key: a tuple starting with the position's Zobrist key, followed by whatever else the score depends on
+
+        RETURNS
+        the stored score, or None if the key has no entry
+    '''
+    def probe(self, key):
+        entry = self.slots[key[0] & (self.size - 1)]
+        if (entry is not None and entry[0] == key):
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    '''
+        Stores the score for the given key, replacing the entry in its slot
+
+        PARAMS
+        key: a tuple starting with the position's Zobrist key, followed by whatever else the score depends on
+        score: the result to store
+    '''
+    def store(self, key, score):
+        self.slots[key[0] & (self.size - 1)] = (key, score)
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+
+    def get_hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,367 @@
+from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants, BoardTables as tables
+import linecache
+
+# compiled scoring functions, by weights key
+_compiled_functions = {}
+
+# the order of the blended term weights unpacked by a compiled scoring function
+PHASE_TERMS = ('pawn', 'position', 'pawn structure', 'focal points', 'development', 'mobility', 'attacking', 'king security',
+               'endgame', 'defensive')
+
+_HEADER = '''
+def get_bounded_score(self, board, color, winning_board, lower, upper):
+    phase = board.phase
+    w_pawn, w_position, w_structure, w_focal, w_development, w_mobility, w_attacking, w_king, w_endgame, w_defensive = \\
+        PHASE_WEIGHTS[phase if phase < MAX_PHASE else MAX_PHASE]
+
+    # pawn counts and structure, from the board's pawn cache when possible
+    white_pawns = board.white_pawns
+    black_pawns = board.black_pawns
+    key = (board.get_pawn_key(), white_pawns, black_pawns, WEIGHTS_KEY)
+    entry = board.pawn_cache.probe(key)
+    if entry is None:
+        entry = (white_pawns.bit_count(), black_pawns.bit_count(),
+                 self.get_pawn_structure_score(white_pawns, black_pawns, WHITE),
+                 self.get_pawn_structure_score(black_pawns, white_pawns, BLACK))
+        board.pawn_cache.store(key, entry)
+    counts = board.piece_counts
+'''
+
+# the scoring of one color, with {own} and {opponent} the colors' board name prefixes
+_COLOR_BODY = '''
+pawn_count = entry[{entry}]
+{position_states}
+pawn = {pawn}
+
+{own}_count = bishop*counts[{own_bishop!r}] + pawn*counts[{own_pawn!r}] + rook*counts[{own_rook!r}] + \\
+    knight*counts[{own_knight!r}] + queen*counts[{own_queen!r}] + {king}*counts[{own_king!r}]
+{opponent}_count = bishop*counts[{opponent_bishop!r}] + pawn*counts[{opponent_pawn!r}] + rook*counts[{opponent_rook!r}] + \\
+    knight*counts[{opponent_knight!r}] + queen*counts[{opponent_queen!r}] + {king}*counts[{opponent_king!r}]
+material = {own}_count - {opponent}_count
+
+# first stage
+score_mod = 0.0
+if winning_board: score_mod += {win_bonus}
+score_mod += w_position * {position}
+score_mod += w_structure * entry[{structure_entry}]
+partial_score = material + score_mod * {score_scale}
+margin_high = {lazy_margin_high} + {lazy_margin_material}*({own}_count + {opponent}_count - \
+    {king}*(counts[{own_king!r}] + counts[{opponent_king!r}]))
+if partial_score + margin_high <= lower:
+    return partial_score + margin_high, False
+if partial_score + {lazy_margin_low} >= upper:
+    return partial_score + {lazy_margin_low}, False
+
+# second stage: the pseudo-legal moves of the pieces the terms count, straight from the attack tables
+full = FULL_BOARD
+occupancy = board.board & full
+player = board.{own}_pieces
+opponent = board.{opponent}_pieces
+opponent_pawns = board.{opponent}_pawns
+opponent_knights = board.{opponent}_knights
+opponent_bishops = board.{opponent}_bishops
+opponent_rooks = board.{opponent}_rooks
+opponent_queens = board.{opponent}_queens
+opponent_king = board.{opponent}_king
+immediate_shelter, diag_wide_shelter, cross_wide_shelter, sinu_wide_shelter = board.get_king_shelter({opponent_color})
+opponent_immediate = opponent & immediate_shelter
+opponent_wide = opponent & (cross_wide_shelter | diag_wide_shelter | sinu_wide_shelter)
+mobility = 0
+inner_moves = 0
+attacked_pawns = attacked_knights = attacked_bishops = attacked_rooks = attacked_queens = 0
+{moves}
+if w_focal:
+    center = CENTER & ~board.highlight_board
+    focal_points = {focal_pawn}*(board.{own}_pawns & center).bit_count() + \\
+        {focal_queen}*(board.{own}_queens & center).bit_count() + \\
+        {focal_piece}*({focal_pieces} & center).bit_count()
+    focal_points += (inner_moves & CENTER).bit_count() * {center_move}
+    focal_points += (WIDER_CENTER & player).bit_count() * {wider_center_piece}
+    score_mod += w_focal * focal_points
+if w_development:
+    last_piece = board.last_move[0]
+    development = 0.0
+    if last_piece == board.last_last_move[0]:
+        development += {repeated_piece}
+    developed = board.board_development
+    if (last_piece == {own_queen!r} or last_piece == {own_rook!r}) and (MINOR_PIECE_SQUARES[{color}] & ~developed).bit_count() < 2:
+        development += {early_major_piece}
+    if last_piece == {own_knight!r} and developed & BISHOP_SQUARES[{color}]:
+        development += {development_knight}
+    score_mod += w_development * development
+score_mod += w_mobility * (mobility * {mobility})
+score_mod += w_attacking * ((queen*attacked_queens + rook*attacked_rooks + bishop*attacked_bishops + knight*attacked_knights + \\
+    pawn*attacked_pawns) * {attack_piece}{attack_kings})
+
+# king security
+immediate_shelter, diag_wide_shelter, cross_wide_shelter, sinu_wide_shelter = board.get_king_shelter({color})
+pawns = board.{own}_pawns
+full_shelter = cross_wide_shelter | diag_wide_shelter | immediate_shelter | sinu_wide_shelter
+score_mod += w_king * ({immediate_pawn}*(pawns & immediate_shelter).bit_count() + \\
+    {wide_pawn}*(pawns & (cross_wide_shelter | diag_wide_shelter)).bit_count() + \\
+    {sinu_wide_pawn}*(pawns & sinu_wide_shelter).bit_count() + \\
+    {shelter_queen}*(full_shelter & board.{own}_queens).bit_count() + \\
+    {shelter_rook}*(full_shelter & board.{own}_rooks).bit_count() + \\
+    {shelter_knight}*(full_shelter & board.{own}_knights).bit_count() + \\
+    {shelter_bishop}*(full_shelter & board.{own}_bishops).bit_count())
+if w_endgame:
+    king = board.{own}_king
+    endgame = board.get_moves(utils.singleton_board_to_index(king)).bit_count() * {king_mobility}
+{king_ranks}
+    score_mod += w_endgame * endgame
+
+# defended pieces
+queens = board.{own}_queens
+rooks = board.{own}_rooks
+bishops = board.{own}_bishops
+knights = board.{own}_knights
+advanced_pawns = {advanced_pawns}
+defended_mask = board.get_king_shelter({color})[0] | tables.shift_east(advanced_pawns) | tables.shift_west(advanced_pawns)
+pieces = knights & full
+while pieces:
+    mask = pieces & -pieces
+    pieces ^= mask
+    defended_mask |= KNIGHT_ATTACKS[mask.bit_length() - 1]
+pieces = (bishops | queens) & full
+while pieces:
+    mask = pieces & -pieces
+    pieces ^= mask
+    defended_mask |= bishop_attacks(mask.bit_length() - 1, occupancy)
+pieces = (rooks | queens) & full
+while pieces:
+    mask = pieces & -pieces
+    pieces ^= mask
+    defended_mask |= rook_attacks(mask.bit_length() - 1, occupancy)
+defended_mask &= player
+score_mod += w_defensive * ((queen*(defended_mask & queens).bit_count() + rook*(defended_mask & rooks).bit_count() + \\
+    bishop*(defended_mask & bishops).bit_count() + knight*(defended_mask & knights).bit_count() + \\
+    pawn*(defended_mask & pawns).bit_count()) * {defensive})
+
+return material + score_mod * {score_scale}, True
+'''
+
+# the moves of each piece of a type, counted towards mobility, the center and the attacked pieces
+_PIECE_MOVES = '''
+pieces = board.{board_name} & full
+{king_counts}while pieces:
+    mask = pieces & -pieces
+    pieces ^= mask
+    index = mask.bit_length() - 1
+{piece_moves}
+    mobility += moves.bit_count()
+    inner_moves |= moves
+    attacked_pawns += (moves & opponent_pawns).bit_count()
+    attacked_knights += (moves & opponent_knights).bit_count()
+    attacked_bishops += (moves & opponent_bishops).bit_count()
+    attacked_rooks += (moves & opponent_rooks).bit_count()
+    attacked_queens += (moves & opponent_queens).bit_count()
+{king_attacks}'''
+
+_KING_ATTACKS = '''    {value}_king += (moves & opponent_king).bit_count()
+    {value}_immediate += (moves & opponent_immediate).bit_count()
+    {value}_wide += (moves & opponent_wide).bit_count()
+'''
+
+_PAWN_MOVES = {
+    constants.WHITE: '''    moves = PAWN_ATTACKS[0][index] & {opponent}
+    step = mask << 8
+    if not step & occupancy:
+        moves |= step
+        if index < 16 and not step << 8 & occupancy:
+            moves |= step << 8
+    moves &= ~{player}''',
+    constants.BLACK: '''    moves = PAWN_ATTACKS[1][index] & {opponent}
+    step = mask >> 8
+    if not step & occupancy:
+        moves |= step
+        if index > 47 and not step >> 8 & occupancy:
+            moves |= step >> 8
+    moves &= ~{player}'''
+}
+
+_TABLE_MOVES = {
+    constants.WHITE_KNIGHT: '    moves = KNIGHT_ATTACKS[index] & ~{player}',
+    constants.WHITE_BISHOP: '    moves = bishop_attacks(index, occupancy) & ~{player}',
+    constants.WHITE_ROOK: '    moves = rook_attacks(index, occupancy) & ~{player}',
+    constants.WHITE_QUEEN: '    moves = queen_attacks(index, occupancy) & ~{player}',
+    constants.WHITE_KING: '    moves = KING_ATTACKS[index] & ~{player}'
+}
+
+# the piece types whose king and shelter attacks are weighted, with the name of their value in the generated source
+_KING_ATTACKERS = {constants.WHITE_QUEEN: 'queen', constants.WHITE_ROOK: 'rook', constants.WHITE_BISHOP: 'bishop',
+                   constants.WHITE_KNIGHT: 'knight', constants.WHITE_PAWN: 'pawn'}
+
+'''
+    Indents every line of a block of source
+
+    PARAMS
+    source: the lines of source
+    spaces: the number of spaces to indent by
+
+    RETURNS
+    the indented source
+'''
+def _indent(source, spaces):
+    return '\n'.join(' ' * spaces + line if line else line for line in source.split('\n'))
+
+'''
+    Generates the source of the moves of every piece counted for a color. As in Evaluations.get_mobility_score, these are the
+    piece types in the color's set of pieces (BoardConstants.WHITE_PIECES or BLACK_PIECES).
+
+    PARAMS
+    color: the color being scored
+    weights: the weights being compiled
+
+    RETURNS
+    a tuple (source, king attack expression), where the expression adds up the king and shelter attacks of the piece types
+'''
+def _get_moves_source(color, weights):
+    piece_set = constants.WHITE_PIECES if color == constants.WHITE else constants.BLACK_PIECES
+    attacking = weights['attacking']
+    sources = []
+    king_attacks = []
+    for piece in sorted(piece_set):
+        white_piece = piece.isupper()
+        prefix = 'white_' if white_piece else 'black_'
+        board_name = {constants.WHITE_PAWN: 'pawns', constants.WHITE_KNIGHT: 'knights', constants.WHITE_BISHOP: 'bishops',
+                      constants.WHITE_ROOK: 'rooks', constants.WHITE_QUEEN: 'queens', constants.WHITE_KING: 'king'}[piece.upper()]
+        player = 'board.' + prefix + 'pieces'
+        opponent = 'board.' + ('black_' if white_piece else 'white_') + 'pieces'
+        if (piece.upper() == constants.WHITE_PAWN):
+            piece_moves = _PAWN_MOVES[constants.WHITE if white_piece else constants.BLACK]
+        else:
+            piece_moves = _TABLE_MOVES[piece.upper()]
+        value = _KING_ATTACKERS.get(piece.upper())
+        king_counts = king_attack = ''
+        if (value is not None):
+            king_counts = '{0}_king = {0}_immediate = {0}_wide = 0\n'.format(value)
+            king_attack = _KING_ATTACKS.format(value=value)
+            king_attacks.append('{0}*({0}_king*{1!r} + {0}_immediate*{2!r} + {0}_wide*{3!r})'.format(
+                value, attacking['king'], attacking['immediate_shelter'], attacking['wide_shelter']))
+        sources.append(_PIECE_MOVES.format(board_name=prefix + board_name, king_counts=king_counts,
+                                           piece_moves=piece_moves.format(player=player, opponent=opponent),
+                                           king_attacks=king_attack))
+    return ''.join(sources), ''.join(' + \\\n    ' + attack for attack in king_attacks)
+
+'''
+    Generates the source scoring the board from one color's perspective
+
+    PARAMS
+    evaluations: the Evaluations helper whose weights are compiled
+    color: the color the source scores for
+
+    RETURNS
+    the lines of source
+'''
+def _get_color_source(evaluations, color):
+    weights = evaluations.weights
+    values = weights['piece_values']
+    own, opponent = ('white', 'black') if color == constants.WHITE else ('black', 'white')
+
+    # piece values scaled for each position state, folded into constants
+    position_states = []
+    for number, state in enumerate(weights['position_states']):
+        scaled = ', '.join(repr(state[piece] * values[piece]) for piece in ('queen', 'rook', 'bishop', 'knight'))
+        if (number == len(weights['position_states']) - 1):
+            position_states.append('else:\n    queen, rook, bishop, knight = ' + scaled)
+        else:
+            position_states.append('{0}if pawn_count >= {1!r}:\n    queen, rook, bishop, knight = {2}'.format(
+                'el' if number else '', state['min_pawns'], scaled))
+
+    # rank points, from the board's running sums when the board keeps the same ones
+    if (evaluations.board_rank_points):
+        position = 'board.%s_position_score' % own
+    else:
+        rank_points = weights['rank_points'] if color == constants.WHITE else weights['rank_points'][::-1]
+        position = '(' + ' + '.join('%r*(board.%s_pieces & 0x%x).bit_count()' % (points, own, 0xff << 8 * row)
+                                    for row, points in enumerate(rank_points)) + ')'
+
+    # king rank points in the endgame
+    king_ranks = weights['endgame']['king_rank']
+    if (color == constants.WHITE):
+        king_ranks = king_ranks[::-1]
+    king_rank_lines = []
+    for i, points in enumerate(king_ranks):
+        king_rank_lines.append('    if king & 0x%x:\n        endgame += %r' % (60 << 8 * (i + 2), points))
+
+    # pieces scored as other pieces on the center squares (as found by Board.get_piece)
+    if (color == constants.WHITE):
+        focal_pieces = '(board.white_rooks | board.white_knights | board.white_bishops)'
+    else:
+        focal_pieces = '(board.black_rooks | board.black_knights | board.black_bishops | board.black_king | board.white_king)'
+
+    moves, king_attacks = _get_moves_source(color, weights)
+    pieces = {'own_' + name: piece if color == constants.WHITE else piece.lower() for name, piece in (
+        ('pawn', constants.WHITE_PAWN), ('rook', constants.WHITE_ROOK), ('knight', constants.WHITE_KNIGHT),
+        ('bishop', constants.WHITE_BISHOP), ('queen', constants.WHITE_QUEEN), ('king', constants.WHITE_KING))}
+    pieces.update({'opponent' + name[3:]: piece.swapcase() for name, piece in pieces.items()})
+    pawn = 'w_pawn' if values['pawn'] == 1.0 else '%r * w_pawn' % values['pawn']
+    focal, development, king_security = weights['focal_points'], weights['development'], weights['king_security']
+    return _COLOR_BODY.format(
+        own=own, opponent=opponent, color=color, opponent_color=1 - color, entry=color, structure_entry=2 + color,
+        position_states='\n'.join(position_states), pawn=pawn, king=repr(values['king']),
+        win_bonus=repr(weights['win_bonus']), position=position, score_scale=repr(weights['score_scale']),
+        lazy_margin_low=repr(evaluations.lazy_margin_low), lazy_margin_high=repr(evaluations.lazy_margin_high),
+        lazy_margin_material=repr(evaluations.lazy_margin_material),
+        moves=moves, attack_piece=repr(weights['attacking']['piece']), attack_kings=king_attacks,
+        focal_pawn=repr(focal['pawn']), focal_queen=repr(focal['queen']), focal_piece=repr(focal['piece']),
+        focal_pieces=focal_pieces, center_move=repr(focal['center_move']),
+        wider_center_piece=repr(focal['wider_center_piece']), repeated_piece=repr(development['repeated_piece']),
+        early_major_piece=repr(development['early_major_piece']), development_knight=repr(development['knight']),
+        mobility=repr(weights['mobility']), immediate_pawn=repr(king_security['immediate_pawn']),
+        wide_pawn=repr(king_security['wide_pawn']), sinu_wide_pawn=repr(king_security['sinu_wide_pawn']),
+        shelter_queen=repr(king_security['queen']), shelter_rook=repr(king_security['rook']),
+        shelter_knight=repr(king_security['knight']), shelter_bishop=repr(king_security['bishop']),
+        king_mobility=repr(weights['endgame']['king_mobility']), king_ranks='\n'.join(king_rank_lines),
+        advanced_pawns='(pawns << 8) & full' if color == constants.WHITE else 'pawns >> 8',
+        defensive=repr(weights['defensive']), **pieces)
+
+'''
+    Generates the source of a scoring function for an Evaluations helper's weights: a single function doing the work of
+    Evaluations.get_bounded_score and every term it calls, with one specialized body per color, every weight folded into the
+    source as a constant and only the moves the terms count generated
+
+    PARAMS
+    evaluations: the Evaluations helper whose weights are compiled
+
+    RETURNS
+    the source of a function get_bounded_score(self, board, color, winning_board, lower, upper)
+'''
+def get_score_source(evaluations):
+    return _HEADER + '    if color == WHITE:\n' + _indent(_get_color_source(evaluations, constants.WHITE), 8) + \
+        '\n    else:\n' + _indent(_get_color_source(evaluations, constants.BLACK), 8) + '\n'
+
+'''
+    Compiles the scoring function of an Evaluations helper's weights (see get_score_source). Functions are kept by weights,
+    so helpers with the same weights share one, compiled the first time it is asked for.
+
+    PARAMS
+    evaluations: the Evaluations helper whose weights are compiled
+
+    RETURNS
+    a function with the signature and results of Evaluations.get_bounded_score, to be bound to the helper
+'''
+def compile_score_function(evaluations):
+    key = evaluations.weights_key
+    function = _compiled_functions.get(key)
+    if (function is None):
+        source = get_score_source(evaluations)
+        filename = '<compiled evaluation %d>' % len(_compiled_functions)
+        # keep the source where tracebacks and profilers look for it
+        linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+        namespace = {
+            'PHASE_WEIGHTS': [tuple(weights[term] for term in PHASE_TERMS) for weights in evaluations.phase_weights],
+            'MAX_PHASE': constants.MAX_PHASE, 'WEIGHTS_KEY': key, 'WHITE': constants.WHITE, 'BLACK': constants.BLACK,
+            'FULL_BOARD': constants.FULL_BOARD, 'CENTER': 0x1818 << 8 * 3, 'WIDER_CENTER': 0x3c24243c00 << 8,
+            'MINOR_PIECE_SQUARES': [sum(1 << index for index in knights + bishops) for knights, bishops in (
+                (constants.WHITE_KNIGHT_INDEXES, constants.WHITE_BISHOP_INDEXES),
+                (constants.BLACK_KNIGHT_INDEXES, constants.BLACK_BISHOP_INDEXES))],
+            'BISHOP_SQUARES': [sum(1 << index for index in bishops) for bishops in (
+                constants.WHITE_BISHOP_INDEXES, constants.BLACK_BISHOP_INDEXES)],
+            'PAWN_ATTACKS': tables.PAWN_ATTACKS, 'KNIGHT_ATTACKS': tables.KNIGHT_ATTACKS,
+            'KING_ATTACKS': tables.KING_ATTACKS, 'bishop_attacks': tables.bishop_attacks,
+            'rook_attacks': tables.rook_attacks, 'queen_attacks': tables.queen_attacks, 'tables': tables, 'utils': utils
+        }
+        exec(compile(source, filename, 'exec'), namespace)
+        function = _compiled_functions[key] = namespace['get_bounded_score']
+    return function
@@ -0,0 +1,168 @@
+from algorithms.evaluations import Evaluations
+import math
+import time
+
+
+class EvalProfiler:
+    '''
+        Per-term timings and score contributions of the evaluation, collected while a search runs with MiniMax.profile_eval
+        set. For each term it keeps the number of calls, the time spent in the term, and the distribution (mean, standard
+        deviation, minimum and maximum) of what the term added to the score. Contributions are in score units, so the terms
+        scaled (by 1/4) in Evaluations.get_score are reported scaled.
+
+        ATTRIBUTES
+        terms: a dictionary mapping each term name to its [calls, seconds, contribution count, sum, sum of squares, minimum,
+            maximum] record
+        lazy_exits: the number of evaluations that stopped after their first stage
+
+        METHODS
+        record(term, elapsed, contribution)
+            adds a call of a term to its record
+            returns None
+
+        get_summary()
+            returns a table of every term's calls, time and contribution distribution as a string
+
+        reset()
+            clears every record
+            returns None
+    '''
+
+    # the order terms are listed in the summary
+    TERMS = ('evaluation', 'attack maps', 'pawn structure', 'position', 'focal points', 'development', 'mobility',
+             'attacking', 'king security', 'endgame', 'defensive')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.terms = {}
+        self.lazy_exits = 0
+
+    '''
+        Adds a call of an evaluation term to its record
+
+        PARAMS
+        term: the name of the term
+        elapsed: the seconds the call took
+        contribution: what the call added to the score, or None for terms that only take time (such as the attack maps)
+    '''
+    def record(self, term, elapsed, contribution=None):
+        entry = self.terms.get(term)
+        if (entry is None):
+            entry = self.terms[term] = [0, 0.0, 0, 0.0, 0.0, math.inf, -math.inf]
+        entry[0] += 1
+        entry[1] += elapsed
+        if (contribution is not None):
+            entry[2] += 1
+            entry[3] += contribution
+            entry[4] += contribution * contribution
+            entry[5] = min(entry[5], contribution)
+            entry[6] = max(entry[6], contribution)
+
+    def get_summary(self):
+        total = self.terms['evaluation'][1] if 'evaluation' in self.terms else 0.0
+        lines = ['%-15s %9s %9s %7s %6s %9s %9s %9s %9s' % ('term', 'calls', 'seconds', 'us/call', 'time%', 'mean', 'std',
+                                                             'min', 'max')]
+        names = [term for term in self.TERMS if term in self.terms] + sorted(set(self.terms) - set(self.TERMS))
+        for term in names:
+            calls, seconds, count, total_contribution, squares, minimum, maximum = self.terms[term]
+            line = '%-15s %9d %9.3f %7.1f %6.1f' % (term, calls, seconds, seconds / calls * 1e6,
+                                                    100 * seconds / total if total else 0.0)
+            if (count):
+                mean = total_contribution / count
+                std = math.sqrt(max(squares / count - mean * mean, 0.0))
+                line += ' %9.4f %9.4f %9.4f %9.4f' % (mean, std, minimum, maximum)
+            lines.append(line)
+        if ('evaluation' in self.terms):
+            lines.append('%d of %d evaluations stopped after the first stage' % (self.lazy_exits, self.terms['evaluation'][0]))
+        return '\n'.join(lines)
+
+
+class ProfiledEvaluations(Evaluations):
+    '''
+        An Evaluations helper that times every evaluation term and records what it adds to the score in an EvalProfiler.
+        MiniMax swaps it in for the board's helper while profiling, so the plain Evaluations carries no instrumentation. It
+        always runs the hand-written terms rather than the compiled scoring function, which has no terms to time.
+
+        ATTRIBUTES
+        profiler: the EvalProfiler the terms are recorded in
+
+        METHODS
+        The same as Evaluations, each recording its term in the profiler
+    '''
+    '''
+        PARAMS
+        profiler: the EvalProfiler to record the terms in
+        weights: the evaluation weights, or None for the weights in eval_weights.json
+    '''
+    def __init__(self, profiler, weights=None):
+        super().__init__(weights, compiled=False)
+        self.profiler = profiler
+
+    def get_bounded_score(self, board, color, winning_board, lower, upper):
+        start = time.perf_counter()
+        score, exact = super().get_bounded_score(board, color, winning_board, lower, upper)
+        self.profiler.record('evaluation', time.perf_counter() - start)
+        self.profiler.lazy_exits += not exact
+        return score, exact
+
+    def get_attack_maps(self, board):
+        start = time.perf_counter()
+        all_moves = super().get_attack_maps(board)
+        self.profiler.record('attack maps', time.perf_counter() - start)
+        return all_moves
+
+    def get_pawn_structure(self, board):
+        start = time.perf_counter()
+        structure = super().get_pawn_structure(board)
+        self.profiler.record('pawn structure', time.perf_counter() - start)
+        return structure
+
+    def get_position_score(self, board, color):
+        start = time.perf_counter()
+        score = super().get_position_score(board, color)
+        self.profiler.record('position', time.perf_counter() - start, score * self.weights['score_scale'])
+        return score
+
+    def get_focal_points(self, board, color, piece_moves):
+        start = time.perf_counter()
+        score = super().get_focal_points(board, color, piece_moves)
+        self.profiler.record('focal points', time.perf_counter() - start, score * self.weights['score_scale'])
+        return score
+
+    def get_development_order_points(self, board, color):
+        start = time.perf_counter()
+        score = super().get_development_order_points(board, color)
+        self.profiler.record('development', time.perf_counter() - start, score * self.weights['score_scale'])
+        return score
+
+    def get_mobility_score(self, board, all_moves, color):
+        start = time.perf_counter()
+        score = super().get_mobility_score(board, all_moves, color)
+        self.profiler.record('mobility', time.perf_counter() - start, score * self.weights['score_scale'])
+        return score
+
+    def get_attacking_potential(self, board, all_moves, color, queen, rook, bishop, knight, pawn):
+        start = time.perf_counter()
+        score = super().get_attacking_potential(board, all_moves, color, queen, rook, bishop, knight, pawn)
+        self.profiler.record('attacking', time.perf_counter() - start, score * self.weights['score_scale'])
+        return score
+
+    def get_king_security(self, board, color):
+        start = time.perf_counter()
+        score = super().get_king_security(board, color)
+        self.profiler.record('king security', time.perf_counter() - start, score * self.weights['score_scale'])
+        return score
+
+    def get_endgame_points(self, board, color):
+        start = time.perf_counter()
+        score = super().get_endgame_points(board, color)
+        self.profiler.record('endgame', time.perf_counter() - start, score * self.weights['score_scale'])
+        return score
+
+    def get_defensive_potential(self, board, color, queen, rook, bishop, knight, pawn):
+        start = time.perf_counter()
+        score = super().get_defensive_potential(board, color, queen, rook, bishop, knight, pawn)
+        self.profiler.record('defensive', time.perf_counter() - start, score * self.weights['score_scale'])
+        return score
@@ -0,0 +1,39 @@
+import copy
+import json
+import os
+
+# the weights the evaluation uses unless it is given others
+EVAL_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eval_weights.json')
+
+# weights already read, by path
+_loaded_weights = {}
+
+'''
+    Loads evaluation weights from a JSON configuration file, in the layout of eval_weights.json: the base piece values and
+    their position state scaling, the (midgame, endgame) taper of each term, and the points of every evaluation term.
+    Each file is only read once.
+
+    PARAMS
+    path: the path of the configuration file, or None for EVAL_WEIGHTS_PATH
+
+    RETURNS
+    a dictionary of the weights, which the caller is free to change
+'''
+def load_eval_weights(path=None):
+    path = EVAL_WEIGHTS_PATH if path is None else path
+    if (path not in _loaded_weights):
+        with open(path) as weights_file:
+            _loaded_weights[path] = json.load(weights_file)
+    return copy.deepcopy(_loaded_weights[path])
+
+'''
+    Gets a key identifying a set of weights, equal for equal weights
+
+    PARAMS
+    weights: a dictionary of weights, as returned by load_eval_weights
+
+    RETURNS
+    a string key
+'''
+def get_weights_key(weights):
+    return json.dumps(weights, sort_keys=True)
@@ -1,53 +1,138 @@
-from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants
+from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants, BoardTables as tables
+from game_logic.board_utils import RANK_POINTS
+from algorithms.eval_weights import load_eval_weights, get_weights_key
+from algorithms.eval_compiler import compile_score_function
 import math
+import types
+
+'''
+    Blends (midgame, endgame) weights for every game phase
+
+    PARAMS
+    taper_weights: a dictionary mapping each term to its (midgame, endgame) weights
+
+    RETURNS
+    a list with a dictionary of the blended weight of each term for every phase from 0 to BoardConstants.MAX_PHASE
+'''
+def _get_phase_weights(taper_weights):
+    phase_weights = []
+    for phase in range(constants.MAX_PHASE + 1):
+        midgame = phase / constants.MAX_PHASE
+        phase_weights.append({term: midgame_weight * midgame + endgame_weight * (1 - midgame)
+                              for term, (midgame_weight, endgame_weight) in taper_weights.items()})
+    return phase_weights
+
 
 class Evaluations():
     '''
         A helper used to evaluate a board and generate utility scores based on various strategic parameters
         
+        The weights of every term are read from a configuration file (see eval_weights.load_eval_weights), and by default
+        get_bounded_score is replaced by a function compiled from them (see eval_compiler), which folds the weights into its
+        source. The methods below remain the reference the compiled function is checked against.
+
         ATTRIBUTES
-        board: the integer representation of the current board
+        weights: the dictionary of evaluation weights, in the layout of eval_weights.json
+        weights_key: a string identifying the weights, used to key the pawn structure cache
+        phase_weights: the blended weights of each term for each game phase from 0 to BoardConstants.MAX_PHASE
+        lazy_margin_low, lazy_margin_high: bounds on the scaled contribution of the terms get_bounded_score leaves for its
+            second stage. The upper bound grows with the pieces on the board (the mobility, attacking and defensive terms do),
+            by lazy_margin_material for every point of material besides the kings
+        lazy_margin_material: the growth of the upper margin per point of material on the board
+        board_rank_points: whether the weights' rank points are the ones the board keeps running sums of
+        compiled: whether get_bounded_score is the compiled scoring function
+
+        The evaluated board is passed to every method rather than stored, so one helper can be shared by any number of
+        boards (and threads) at once.
         
         METHODS
-        get_focal_points(color,pieces_move)
+        get_score(board, color, winning_board)
+            Gets the score of the board from a color's perspective
+            returns floating point number representing the score
+
+        get_bounded_score(board, color, winning_board, lower, upper)
+            Gets the score of the board from a color's perspective, skipping the costly terms when the score can't reach a window
+            returns a tuple (score, exact), where score is only a bound outside the window when exact is False
+
+        get_attack_maps(board)
+            Gets the pseudo-legal moves of every piece on the board from the precomputed attack tables
+            returns a dictionary mapping each piece character to a list of (index, moves) pairs
+
+        get_focal_points(board, color,pieces_move)
 
-        get_development_order_points(color)
+        get_development_order_points(board, color)
 
-        get_mobility_score(all_moves, color)
+        get_mobility_score(board, all_moves, color)
             Gets board score based on the free spaces accessible by a color's pieces
             returns floating point number representing the score
             
-        get_position_score(color)
+        get_position_score(board, color)
             Gets board score based on the position of a color's pieces
             returns floating point number representing the score
             
-        get_attacking_potential(all_moves, color, queen, rook, bishop, knight, pawn)
+        get_attacking_potential(board, all_moves, color, queen, rook, bishop, knight, pawn)
             Gets board score based on a color's pieces ability to attack enemy pieces
             returns floating point number representing the score
             
-        get_defensive_potential(color, queen, rook, bishop, knight, pawn)
+        get_defensive_potential(board, color, queen, rook, bishop, knight, pawn)
             Gets board score based on a color's pieces ability to defend each other
             returns floating point number representing the score
             
-        get_king_security(color)
+        get_king_security(board, color)
             Gets board score based on quantity and type of pieces occupying the king's shelter region
             returns floating point number representing the score
             
-        get_endgame_points(color)
+        get_endgame_points(board, color)
+
+        get_pawn_structure(board)
+            Gets the pawn counts and pawn structure scores of both colors, from the board's pawn cache when possible
+            returns a tuple (white pawn count, black pawn count, white structure score, black structure score)
+
+        get_pawn_structure_score(pawns, opponent_pawns, color)
+            Gets a color's pawn structure score from its passed, isolated and doubled pawns
+            returns floating point number representing the score
 
     '''
     
-    def __init__(self, board):
-        self.board = board
+    '''
+        PARAMS
+        weights: a dictionary of evaluation weights, or None for the weights in eval_weights.json. The taper weights
+            ('taper') of the pawn's base value and of each term are (midgame, endgame) pairs; the weights used for a board
+            are blended from these by its game phase. The lazy margins ('lazy_margin', and 'lazy_margin_material' for the
+            upper margin's growth with the material on the board) must bound what the second stage terms can add.
+        compiled: whether to score boards with a function compiled from the weights
+    '''
+    def __init__(self, weights=None, compiled=True):
+        self.weights = load_eval_weights() if weights is None else weights
+        self.weights_key = get_weights_key(self.weights)
+        self.phase_weights = _get_phase_weights(self.weights['taper'])
+        self.lazy_margin_low, self.lazy_margin_high = self.weights['lazy_margin']
+        self.lazy_margin_material = self.weights['lazy_margin_material']
+        self.board_rank_points = tuple(self.weights['rank_points']) == RANK_POINTS
+        self.compiled = compiled
+        if (compiled):
+            self.get_bounded_score = types.MethodType(compile_score_function(self), self)
+
+    # the helper holds no board state, so copies of a board can share it
+    def __deepcopy__(self, memo):
+        return self
+
+    # the compiled function can't be pickled, so it is looked up again when the helper is unpickled
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('get_bounded_score', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if (self.compiled):
+            self.get_bounded_score = types.MethodType(compile_score_function(self), self)
         
     '''
         Gets the score of the current board from a given color's perspective based on evaluation functions and base point strengths. Piece
-        strengths are scaled according to the board's position state, and pawn strength is scaled according to the boards game state.
-        
-        Game states are defined as follows:
-            Opening - overall board strength is between 45 and 60
-            Middlegame - overall board strength is between 30 and 60
-            Endgame - overall board strength is between 0 and 30
+        strengths are scaled according to the board's position state. Pawn strength and each evaluation function are weighted for
+        the board's game phase, kept up to date by the board as pieces are traded: every weight slides smoothly from its midgame
+        to its endgame value in the weights' taper, so scores don't jump as the game moves from one stage to the next.
             
         Position states for the board are defined as follows:
             closed position - 13 to 16 pawns on the board
@@ -58,157 +143,190 @@ class Evaluations():
         This method also calls all other evaluation functions
         
         PARAMS
+        board: the Board being evaluated
         color: the color from whose perspective we are scoring the board
         winning_board: integer, where 1 indicates this board is a winning board (checkmate), and 2 indicates a stalemate (>max allowable moves)
         
         RETURNS
         score of the current board based on evaluation functions
     '''
-    def get_score(self, color, winning_board):
-        board_development = self.board.board_development
-        # get all moves for every piece as a dictionary, for use in evaluation functions
-        all_moves = {piece_type:[] for piece_type in constants.ALL_PIECE_TYPES}
-        for i in range (0,64):
-            if (self.board.board & (1<<i)):
-                square = utils.index_to_square(i)
-                moves = self.board.get_moves(square)
-                piece = self.board.get_piece(i)
-                all_moves[piece].append((square,moves))     
-        self.board.board_development = board_development
-        
-        # Get initial piece scores and the current game state
-        opening = False
-        middle = False
-        endgame = False
-        
+    def get_score(self, board, color, winning_board):
+        return self.get_bounded_score(board, color, winning_board, -math.inf, math.inf)[0]
+
+    '''
+        Gets the score of the current board like get_score, in stages, stopping early when the score is bound to fall outside a
+        window. Material and the terms the board keeps up to date are added first; the terms that need every piece's moves
+        (focal points, development, mobility, attacking and defensive potential, king security and endgame points) are only
+        computed if their largest possible contribution, bounded by lazy_margin_low and by lazy_margin_high plus
+        lazy_margin_material for every point of material on the board, could still bring the score into the window.
+
+        PARAMS
+        board: the Board being evaluated
+        color: the color from whose perspective we are scoring the board
+        winning_board: integer, where 1 indicates this board is a winning board (checkmate), and 2 indicates a stalemate (>max allowable moves)
+        lower: the score at or below which the caller no longer needs the exact score
+        upper: the score at or above which the caller no longer needs the exact score
+
+        RETURNS
+        a tuple (score, exact). When exact is False the score is a bound on the board's score that lies outside the window: an
+        upper bound at or below lower, or a lower bound at or above upper
+    '''
+    def get_bounded_score(self, board, color, winning_board, lower, upper):
+        # the weight of each term at the board's game phase, blended between its midgame and endgame weights
+        weights = self.phase_weights[min(board.phase, constants.MAX_PHASE)]
+
         # base point values
-        queen = 9.0
-        rook = 4.5
-        knight = 3.0
-        bishop = 3.0
-        pawn = 1.0
-        king = 100.0 
+        values = self.weights['piece_values']
+        pawn = values['pawn'] * weights['pawn']
+        king = values['king']
         
-        # count pawns and pieces for grading base values
+        # count pawns for grading base values
+        white_pawn_count, black_pawn_count, white_structure, black_structure = self.get_pawn_structure(board)
         if (color == constants.WHITE):
-            pawn_count = self.board.white_pawns.bit_count()
+            pawn_count = white_pawn_count
+            pawn_structure = white_structure
         else:
-            pawn_count = self.board.black_pawns.bit_count()
-
-        # count total board piece strength
-        overall_piece_strength = bishop*self.board.white_bishops.bit_count() +  \
-            rook*self.board.white_rooks.bit_count() + \
-            knight*self.board.white_knights.bit_count() + \
-            queen*self.board.white_queens.bit_count() + \
-            king*self.board.white_king.bit_count() + \
-            bishop*self.board.black_bishops.bit_count() +  \
-            rook*self.board.black_rooks.bit_count() + \
-            knight*self.board.black_knights.bit_count() + \
-            queen*self.board.black_queens.bit_count() + \
-            king*self.board.black_king.bit_count()
-        
-        # find current game state, and scale pawn strength based on overal piece strength
-        if (overall_piece_strength >= 45): # opening
-            middle = True
-            opening = True
-        elif (overall_piece_strength >= 30): # middle game
-            middle = True
-            pawn = pawn * 0.05
-        elif (overall_piece_strength >= 15): # Early endgame
-            endgame = True
-            pawn = pawn * 1.10
-        else:  # late endgame
-            endgame = True
-            pawn = pawn * 1.15
-        
-        # scale piece strengths based on the number of pawns
-        if (pawn_count >= 13): # closed positions
-            queen = 0.95*queen
-            rook = 0.85*rook
-            bishop = bishop*1.05
-            knight = knight*1.15
-        elif (pawn_count >= 9): # semi-closed positions
-            queen = 0.95*queen
-            rook = 0.90*rook
-            bishop = bishop*1.05
-            knight = knight*1.10
-        elif (pawn_count >= 5): # semi-open positions
-            queen = 1.20*queen
-            rook = 1.10*rook
-            bishop = bishop*1.15
-            knight = knight*0.9
-        else: # open positions
-            queen = 1.30*queen
-            rook = 1.10*rook
-            bishop = bishop*1.20
-            knight = knight*0.85
+            pawn_count = black_pawn_count
+            pawn_structure = black_structure
+
+        # scale piece strengths based on the number of pawns, from closed to open positions (the last state applies to
+        # any number of pawns)
+        states = self.weights['position_states']
+        for state in states:
+            if (pawn_count >= state['min_pawns'] or state is states[-1]):
+                break
+        queen = state['queen']*values['queen']
+        rook = state['rook']*values['rook']
+        bishop = state['bishop']*values['bishop']
+        knight = state['knight']*values['knight']
             
-        score_mod = 0.0 # add to the returned score based on various evaluation functions
-        
-        # check evaluation functions: 
-        if (winning_board): score_mod += 200.0   
-        if opening:
-            score_mod += self.get_focal_points(color, all_moves)
-            score_mod += self.get_development_order_points(color)
-        score_mod += self.get_mobility_score(all_moves,color)
-        score_mod += self.get_position_score(color)
-        score_mod += self.get_attacking_potential(all_moves, color, queen, rook, bishop, knight, pawn)
-        score_mod += self.get_king_security(color)
-        score_mod += self.get_endgame_points(color)
-        score_mod += self.get_defensive_potential(color, queen, rook, bishop, knight, pawn)
-        
-        score_mod /= 4 # scale evaluation point assignments, so they don't overpower the base point values 
-        # (base point values give weight to captures)
-
-        # count total white piece strengths
-        white_count = bishop*self.board.white_bishops.bit_count() +  \
-            pawn*self.board.white_pawns.bit_count() + \
-            rook*self.board.white_rooks.bit_count() + \
-            knight*self.board.white_knights.bit_count() + \
-            queen*self.board.white_queens.bit_count() + \
-            king*self.board.white_king.bit_count()
+        # count total white and black piece strengths from the board's running piece counts
+        counts = board.piece_counts
+        white_count = bishop*counts[constants.WHITE_BISHOP] +  \
+            pawn*counts[constants.WHITE_PAWN] + \
+            rook*counts[constants.WHITE_ROOK] + \
+            knight*counts[constants.WHITE_KNIGHT] + \
+            queen*counts[constants.WHITE_QUEEN] + \
+            king*counts[constants.WHITE_KING]
             
-        # count total black piece strengths
-        black_count = bishop*self.board.black_bishops.bit_count() +  \
-            pawn*self.board.black_pawns.bit_count() + \
-            rook*self.board.black_rooks.bit_count() + \
-            knight*self.board.black_knights.bit_count() + \
-            queen*self.board.black_queens.bit_count() + \
-            king*self.board.black_king.bit_count()
+        black_count = bishop*counts[constants.BLACK_BISHOP] +  \
+            pawn*counts[constants.BLACK_PAWN] + \
+            rook*counts[constants.BLACK_ROOK] + \
+            knight*counts[constants.BLACK_KNIGHT] + \
+            queen*counts[constants.BLACK_QUEEN] + \
+            king*counts[constants.BLACK_KING]
+        material = white_count - black_count if color == constants.WHITE else black_count - white_count
+
+        score_mod = 0.0 # add to the returned score based on various evaluation functions
         
-        # Return score
-        if (color == constants.WHITE):
-            return white_count - black_count + score_mod
-        else:
-            return black_count - white_count + score_mod
+        # first stage: the terms the board and the pawn cache keep ready
+        if (winning_board): score_mod += self.weights['win_bonus']
+        score_mod += weights['position'] * self.get_position_score(board, color)
+        score_mod += weights['pawn structure'] * pawn_structure
+
+        # score_mod is scaled by 1/4 so evaluation point assignments don't overpower the base point values (base point values
+        # give weight to captures). Stop here if no value of the remaining terms could bring the score into the window
+        partial_score = material + score_mod * self.weights['score_scale']
+        margin_high = self.lazy_margin_high + self.lazy_margin_material * \
+            (white_count + black_count - king*(counts[constants.WHITE_KING] + counts[constants.BLACK_KING]))
+        if (partial_score + margin_high <= lower):
+            return partial_score + margin_high, False
+        if (partial_score + self.lazy_margin_low >= upper):
+            return partial_score + self.lazy_margin_low, False
 
+        # second stage: the terms that need the moves of every piece, skipping those the game phase gives no weight
+        all_moves = self.get_attack_maps(board)
+        if (weights['focal points']):
+            score_mod += weights['focal points'] * self.get_focal_points(board, color, all_moves)
+        if (weights['development']):
+            score_mod += weights['development'] * self.get_development_order_points(board, color)
+        score_mod += weights['mobility'] * self.get_mobility_score(board, all_moves,color)
+        score_mod += weights['attacking'] * \
+            self.get_attacking_potential(board, all_moves, color, queen, rook, bishop, knight, pawn)
+        score_mod += weights['king security'] * self.get_king_security(board, color)
+        if (weights['endgame']):
+            score_mod += weights['endgame'] * self.get_endgame_points(board, color)
+        score_mod += weights['defensive'] * self.get_defensive_potential(board, color, queen, rook, bishop, knight, pawn)
         
+        return material + score_mod * self.weights['score_scale'], True
+
+
+    '''
+        Gets the pseudo-legal moves of every piece on the board with table lookups, in a single pass over the pieces. Checks and
+        pins are ignored (evaluation terms only need the squares each piece reaches), so this is far cheaper than generating the
+        legal moves of each piece with Board.get_moves.
+
+        PARAMS
+        board: the Board being evaluated
+
+        RETURNS
+        a dictionary mapping each piece character to a list of (index, moves) pairs, one per piece of that type, where moves is
+        an integer mask of the empty and opponent squares the piece can move to
+    '''
+    def get_attack_maps(self, board):
+        occupancy = board.board & constants.FULL_BOARD
+        all_moves = {piece_type: [] for piece_type in constants.ALL_PIECE_TYPES}
+        for piece, board_name in board.PIECE_BOARDS:
+            piece_board = getattr(board, board_name) & constants.FULL_BOARD
+            if (piece.isupper()):
+                color, player, opponent = constants.WHITE, board.white_pieces, board.black_pieces
+            else:
+                color, player, opponent = constants.BLACK, board.black_pieces, board.white_pieces
+            piece_type = piece.upper()
+            piece_moves = all_moves[piece]
+            while piece_board:
+                mask = piece_board & -piece_board
+                piece_board ^= mask
+                index = mask.bit_length() - 1
+                if (piece_type == constants.WHITE_PAWN):
+                    # diagonal captures, then one square forward and two from the starting rank
+                    moves = tables.PAWN_ATTACKS[color][index] & opponent
+                    step = mask << 8 if color == constants.WHITE else mask >> 8
+                    if (not step & occupancy):
+                        moves |= step
+                        double_step = step << 8 if color == constants.WHITE else step >> 8
+                        if ((index < 16 if color == constants.WHITE else index > 47) and not double_step & occupancy):
+                            moves |= double_step
+                elif (piece_type == constants.WHITE_KNIGHT):
+                    moves = tables.KNIGHT_ATTACKS[index]
+                elif (piece_type == constants.WHITE_BISHOP):
+                    moves = tables.bishop_attacks(index, occupancy)
+                elif (piece_type == constants.WHITE_ROOK):
+                    moves = tables.rook_attacks(index, occupancy)
+                elif (piece_type == constants.WHITE_QUEEN):
+                    moves = tables.queen_attacks(index, occupancy)
+                else:
+                    moves = tables.KING_ATTACKS[index]
+                piece_moves.append((index, moves & ~player))
+        return all_moves
+
     '''
         TODO: comment
         
     '''
     
-    def get_focal_points(self, color, piece_moves):
+    def get_focal_points(self, board, color, piece_moves):
         pawn_check = constants.WHITE_PAWN
         piece_color_check = constants.WHITE_PIECES
         queen_check = constants.WHITE_QUEEN
-        player = self.board.white_pieces
+        player = board.white_pieces
         if color == constants.BLACK:
             pawn_check = constants.BLACK_PAWN
             piece_color_check = constants.BLACK_PIECES
             queen_check = constants.BLACK_QUEEN
-            player = self.board.black_pieces
+            player = board.black_pieces
 
+        points = self.weights['focal_points']
         evaluate_value = 0
         focal_square = ('e4','d4','e5','d5')
         for square in focal_square:
-            piece = self.board.get_piece(square)
+            piece = board.get_piece(square)
             if piece == pawn_check:
-                evaluate_value += 0.4
+                evaluate_value += points['pawn']
             elif piece == queen_check:
-                evaluate_value += 0.3
+                evaluate_value += points['queen']
             elif piece in piece_color_check:
-                evaluate_value += 0.2
+                evaluate_value += points['piece']
 
         focal_square_mask = 0x1818 << 8 * 3
         wider_focal_square_mask = 0x3c24243c00 << 8
@@ -217,9 +335,9 @@ class Evaluations():
             for move_board in [move_board[1] for move_board in piece_moves[piece_type]]:
                 inner_moves |= move_board
         inner_moves &= focal_square_mask
-        evaluate_value += inner_moves.bit_count() * 0.1
+        evaluate_value += inner_moves.bit_count() * points['center_move']
         wider_focal_square_mask &= player
-        evaluate_value += wider_focal_square_mask.bit_count() * 0.1
+        evaluate_value += wider_focal_square_mask.bit_count() * points['wider_center_piece']
 
         return evaluate_value
 
@@ -229,10 +347,11 @@ class Evaluations():
         
     '''
     
-    def get_development_order_points(self, color):
+    def get_development_order_points(self, board, color):
+        points = self.weights['development']
         evaluate_value = 0.0
-        if self.board.last_move[0] == self.board.last_last_move[0]:
-            evaluate_value -= 0.35
+        if board.last_move[0] == board.last_last_move[0]:
+            evaluate_value += points['repeated_piece']
         
         knight_indexes = constants.WHITE_KNIGHT_INDEXES
         bishop_indexes = constants.WHITE_BISHOP_INDEXES
@@ -249,29 +368,30 @@ class Evaluations():
 
         minor_pieces_developed = 0
         for index in knight_indexes:
-            if not self.board.board_development & 1 << index:
+            if not board.board_development & 1 << index:
                 minor_pieces_developed += 1
 
         for index in bishop_indexes:
-            if not self.board.board_development & 1 << index:
+            if not board.board_development & 1 << index:
                 minor_pieces_developed += 1
-        if self.board.last_move[0] == queen and minor_pieces_developed < 2:
-            evaluate_value -= 0.5
-        elif self.board.last_move[0] == rook and minor_pieces_developed < 2:
-            evaluate_value -= 0.5
-        if self.board.last_move[0] == knight:
+        if board.last_move[0] == queen and minor_pieces_developed < 2:
+            evaluate_value += points['early_major_piece']
+        elif board.last_move[0] == rook and minor_pieces_developed < 2:
+            evaluate_value += points['early_major_piece']
+        if board.last_move[0] == knight:
             left_bishop, right_bishop = bishop_indexes
-            if self.board.board_development & 1 << left_bishop or self.board.board_development & 1 << right_bishop:
-                evaluate_value += 0.2
+            if board.board_development & 1 << left_bishop or board.board_development & 1 << right_bishop:
+                evaluate_value += points['knight']
 
         return evaluate_value
     
     '''
         Evaluates the utility of the current board for a given color based on the mobility of that color's pieces. 
-        This method adds .1 for each free space a piece has access to.
+        This method adds the 'mobility' weight (.1) for each free space a piece has access to.
              
         PARAMS
-        all_moves: a dictionary containing integer representations of all possible moves for all pieces on the board
+        board: the Board being evaluated
+        all_moves: a dictionary of the pseudo-legal moves of every piece on the board, from get_attack_maps
         color: the color whose perspective we are evaluating from
         
         RETURNS
@@ -279,7 +399,7 @@ class Evaluations():
         
     '''
     
-    def get_mobility_score(self, all_moves, color):
+    def get_mobility_score(self, board, all_moves, color):
         mobility = 0
         if (color == constants.WHITE): 
             for piece in constants.WHITE_PIECES: # for each white piece type
@@ -291,11 +411,11 @@ class Evaluations():
                 piece_moves = all_moves[piece] # get possible moves for all instances of the piece type
                 for each_piece_move in piece_moves:
                     mobility += each_piece_move[1].bit_count() # sum all free spaces pieces have access to
-        return mobility * 0.10
+        return mobility * self.weights['mobility']
     
     '''
         Evaluates the utility of a the current board for a given color based on the positioning of that color's pieces.
-        Uses the following point scheme for different ranks (relative to the color):
+        Uses the following point scheme ('rank_points') for different ranks (relative to the color):
             -.015 for pieces in the first rank
             +.015 for pieces in the second rank
             +.03 for pieces in the third rank
@@ -306,6 +426,7 @@ class Evaluations():
             +.03 for pieces in the eigth rank
             
         PARAMS
+        board: the Board being evaluated
         color: the color whose perspective we are evaluating from
         
         RETURNS
@@ -313,40 +434,29 @@ class Evaluations():
                 
     '''
     
-    def get_position_score(self,color):
-        position_score = 0
-        if (color == constants.WHITE):
-            position_score -= 0.015*((self.board.white_pieces & 0xff).bit_count()) # use a mask to isolate and sum scores from the first rank
-            position_score += 0.015*((self.board.white_pieces & (0xff << 8)).bit_count()) # second rank
-            position_score += 0.030*((self.board.white_pieces & (0xff << 8*2)).bit_count()) # third rank
-            position_score += 0.45*((self.board.white_pieces & (0xff << 8*3)).bit_count()) # fourth rank
-            position_score += 0.60*((self.board.white_pieces & (0xff << 8*4)).bit_count()) # fifth rank
-            position_score += 0.75*((self.board.white_pieces & (0xff << 8*5)).bit_count()) # sixth rank
-            position_score += 0.60*((self.board.white_pieces & (0xff << 8*6)).bit_count()) # seventh rank
-            position_score += 0.030*((self.board.white_pieces & (0xff << 8*7)).bit_count()) # eigth rank           
-        else:
-            position_score -= 0.015*((self.board.black_pieces & 0xff << 8*7).bit_count()) # sum scores from the first rank, reverse orientation
-            position_score += 0.015*((self.board.black_pieces & (0xff << 8*6)).bit_count()) # second rank
-            position_score += 0.030*((self.board.black_pieces & (0xff << 8*5)).bit_count()) # third rank
-            position_score += 0.45*((self.board.black_pieces & (0xff << 8*4)).bit_count()) # fourth rank
-            position_score += 0.60*((self.board.black_pieces & (0xff << 8*3)).bit_count()) # fifth rank
-            position_score += 0.75*((self.board.black_pieces & (0xff << 8*2)).bit_count()) # sixth rank
-            position_score += 0.60*((self.board.black_pieces & (0xff << 8*1)).bit_count()) # seventh rank
-            position_score += 0.030*((self.board.black_pieces & 0xff).bit_count()) # eigth rank
-        return position_score
+    def get_position_score(self, board, color):
+        # the board keeps each color's sum of rank points (board_utils.RANK_POINTS) up to date as pieces move
+        if (self.board_rank_points):
+            if (color == constants.WHITE):
+                return board.white_position_score
+            return board.black_position_score
+        pieces = board.white_pieces if color == constants.WHITE else board.black_pieces
+        rank_points = self.weights['rank_points'] if color == constants.WHITE else self.weights['rank_points'][::-1]
+        return sum(points * (pieces & 0xff << 8 * row).bit_count() for row, points in enumerate(rank_points))
     
     '''
         Evaluates the utility of the current board for a given color based on that color's pieces potential to attack enemy pieces.
               
-        Uses the following point scheme based on the types of enemy pieces the given color can attack, with extra weight on pieces
-        which are attacking the king:
+        Uses the following point scheme ('attacking') based on the types of enemy pieces the given color can attack, with extra
+        weight on pieces which are attacking the king:
             + 1/10 of all attacked pieces strength
             + 1/10 of the attacking piece's strength if it attacks the enemy king
             + 1/20 of the attacking piece's strength if it attacks pieces in the enemy king's immediate shelter
             + 1/20 * 2/3 of the attacking piece's strength if it attacks pieces in the enemy king's wide shelter
             
         PARAMS
-        all_moves: a dictionary containing integer representations of all possible moves for all pieces on the board
+        board: the Board being evaluated
+        all_moves: a dictionary of the pseudo-legal moves of every piece on the board, from get_attack_maps
         color: the color whose perspective we are evaluating from
         queen: the piece strength of a queen
         rook: the piece strength of a rook
@@ -358,81 +468,86 @@ class Evaluations():
         a number equalt to the attacking potential utility score of the given color for the current board
     '''
     
-    def get_attacking_potential(self, all_moves, color, queen, rook, bishop, knight, pawn):
+    def get_attacking_potential(self, board, all_moves, color, queen, rook, bishop, knight, pawn):
+        points = self.weights['attacking']
         attack_potential = 0
         
         if (color == constants.WHITE):
-            wide_shelter = self.board.black_cross_wide_shelter | self.board.black_diag_wide_shelter | self.board.black_sinu_wide_shelter # gets a mask of the enemy king's wide shelter
+            immediate_shelter, diag_wide_shelter, cross_wide_shelter, sinu_wide_shelter = board.get_king_shelter(constants.BLACK)
+            wide_shelter = cross_wide_shelter | diag_wide_shelter | sinu_wide_shelter # gets a mask of the enemy king's wide shelter
             for piece in constants.WHITE_PIECES:
                 piece_moves = all_moves[piece]
                 for each_piece_move in piece_moves: # for each set of moves by white's pieces
-                    attack_potential += queen/10*(each_piece_move[1] & self.board.black_queens).bit_count() # sum general attacking potential, weighting points by attacked piece strength
-                    attack_potential += rook/10*(each_piece_move[1] & self.board.black_rooks).bit_count()
-                    attack_potential += bishop/10*(each_piece_move[1] & self.board.black_bishops).bit_count()
-                    attack_potential += knight/10*(each_piece_move[1] & self.board.black_knights).bit_count()
-                    attack_potential += pawn/10*(each_piece_move[1] & self.board.black_pawns).bit_count()
+                    attack_potential += queen*points['piece']*(each_piece_move[1] & board.black_queens).bit_count() # sum general attacking potential, weighting points by attacked piece strength
+                    attack_potential += rook*points['piece']*(each_piece_move[1] & board.black_rooks).bit_count()
+                    attack_potential += bishop*points['piece']*(each_piece_move[1] & board.black_bishops).bit_count()
+                    attack_potential += knight*points['piece']*(each_piece_move[1] & board.black_knights).bit_count()
+                    attack_potential += pawn*points['piece']*(each_piece_move[1] & board.black_pawns).bit_count()
                     
                     # king and king's shelter attack potentials
                     if (piece == constants.WHITE_QUEEN):
-                        attack_potential += queen/10*(each_piece_move[1] & self.board.black_king).bit_count() # check whether the queen is attacking the enemy king
-                        attack_potential += queen/20*(each_piece_move[1] & self.board.black_pieces & self.board.black_immediate_shelter).bit_count() # check whether the queen attacks king's immediate shelter pieces
-                        attack_potential += queen/20 * 2/3 * (each_piece_move[1] & self.board.black_pieces & wide_shelter).bit_count() # check whether the queen attacks the king's wide shelter pieces
+                        attack_potential += queen*points['king']*(each_piece_move[1] & board.black_king).bit_count() # check whether the queen is attacking the enemy king
+                        attack_potential += queen*points['immediate_shelter']*(each_piece_move[1] & board.black_pieces & immediate_shelter).bit_count() # check whether the queen attacks king's immediate shelter pieces
+                        attack_potential += queen*points['wide_shelter']*(each_piece_move[1] & board.black_pieces & wide_shelter).bit_count() # check whether the queen attacks the king's wide shelter pieces
                     elif (piece == constants.WHITE_ROOK):
-                        attack_potential += rook/10*(each_piece_move[1] & self.board.black_king).bit_count() # rook king attack potential
-                        attack_potential += rook/20*(each_piece_move[1] & self.board.black_pieces & self.board.black_immediate_shelter).bit_count()
-                        attack_potential += rook/20 * 2/3 * (each_piece_move[1] & self.board.black_pieces & wide_shelter).bit_count()
+                        attack_potential += rook*points['king']*(each_piece_move[1] & board.black_king).bit_count() # rook king attack potential
+                        attack_potential += rook*points['immediate_shelter']*(each_piece_move[1] & board.black_pieces & immediate_shelter).bit_count()
+                        attack_potential += rook*points['wide_shelter']*(each_piece_move[1] & board.black_pieces & wide_shelter).bit_count()
                     elif (piece == constants.WHITE_BISHOP):
-                        attack_potential += bishop/10*(each_piece_move[1] & self.board.black_king).bit_count() # bishop king attack potential
-                        attack_potential += bishop/20*(each_piece_move[1] & self.board.black_pieces & self.board.black_immediate_shelter).bit_count()
-                        attack_potential += bishop/20 * 2/3 * (each_piece_move[1] & self.board.black_pieces & wide_shelter).bit_count()
+                        attack_potential += bishop*points['king']*(each_piece_move[1] & board.black_king).bit_count() # bishop king attack potential
+                        attack_potential += bishop*points['immediate_shelter']*(each_piece_move[1] & board.black_pieces & immediate_shelter).bit_count()
+                        attack_potential += bishop*points['wide_shelter']*(each_piece_move[1] & board.black_pieces & wide_shelter).bit_count()
                     if (piece == constants.WHITE_KNIGHT):
-                        attack_potential += knight/10*(each_piece_move[1] & self.board.black_king).bit_count() # knight king attack potential
-                        attack_potential += knight/20*(each_piece_move[1] & self.board.black_pieces & self.board.black_immediate_shelter).bit_count()
-                        attack_potential += knight/20 * 2/3 * (each_piece_move[1] & self.board.black_pieces & wide_shelter).bit_count()
+                        attack_potential += knight*points['king']*(each_piece_move[1] & board.black_king).bit_count() # knight king attack potential
+                        attack_potential += knight*points['immediate_shelter']*(each_piece_move[1] & board.black_pieces & immediate_shelter).bit_count()
+                        attack_potential += knight*points['wide_shelter']*(each_piece_move[1] & board.black_pieces & wide_shelter).bit_count()
                     if (piece == constants.WHITE_PAWN):
-                        attack_potential += pawn/10*(each_piece_move[1] & self.board.black_king).bit_count() # pawn king attack potential
-                        attack_potential += pawn/20*(each_piece_move[1] & self.board.black_pieces & self.board.black_immediate_shelter).bit_count()
-                        attack_potential += pawn/20 * 2/3 * (each_piece_move[1] & self.board.black_pieces & wide_shelter).bit_count()
+                        attack_potential += pawn*points['king']*(each_piece_move[1] & board.black_king).bit_count() # pawn king attack potential
+                        attack_potential += pawn*points['immediate_shelter']*(each_piece_move[1] & board.black_pieces & immediate_shelter).bit_count()
+                        attack_potential += pawn*points['wide_shelter']*(each_piece_move[1] & board.black_pieces & wide_shelter).bit_count()
         else:
+            immediate_shelter, diag_wide_shelter, cross_wide_shelter, sinu_wide_shelter = board.get_king_shelter(constants.WHITE)
+            wide_shelter = cross_wide_shelter | diag_wide_shelter | sinu_wide_shelter
             for piece in constants.BLACK_PIECES:
-                wide_shelter = self.board.white_cross_wide_shelter | self.board.white_diag_wide_shelter | self.board.white_sinu_wide_shelter
                 piece_moves = all_moves[piece]
                 for each_piece_move in piece_moves: # for each set of moves by black's pieces
-                    attack_potential += queen/10*(each_piece_move[1] & self.board.white_queens).bit_count() # sum of general attacking potentials
-                    attack_potential += rook/10*(each_piece_move[1] & self.board.white_rooks).bit_count()
-                    attack_potential += bishop/10*(each_piece_move[1] & self.board.white_bishops).bit_count()
-                    attack_potential += knight/10*(each_piece_move[1] & self.board.white_knights).bit_count()
-                    attack_potential += pawn/10*(each_piece_move[1] & self.board.white_pawns).bit_count()
+                    attack_potential += queen*points['piece']*(each_piece_move[1] & board.white_queens).bit_count() # sum of general attacking potentials
+                    attack_potential += rook*points['piece']*(each_piece_move[1] & board.white_rooks).bit_count()
+                    attack_potential += bishop*points['piece']*(each_piece_move[1] & board.white_bishops).bit_count()
+                    attack_potential += knight*points['piece']*(each_piece_move[1] & board.white_knights).bit_count()
+                    attack_potential += pawn*points['piece']*(each_piece_move[1] & board.white_pawns).bit_count()
                     
                     # king and king's shelter attack potentials
                     if (piece == constants.BLACK_QUEEN):
-                        attack_potential += queen/10*(each_piece_move[1] & self.board.white_king).bit_count() # check whether the queen is attacking the enemy king
-                        attack_potential += queen/20*(each_piece_move[1] & self.board.white_pieces & self.board.white_immediate_shelter).bit_count() # check whether the queen attacks king's immediate shelter pieces
-                        attack_potential += queen/20 * 2/3 * (each_piece_move[1] & self.board.white_pieces & wide_shelter).bit_count() # check whether the queen attacks the king's wide shelter piece
+                        attack_potential += queen*points['king']*(each_piece_move[1] & board.white_king).bit_count() # check whether the queen is attacking the enemy king
+                        attack_potential += queen*points['immediate_shelter']*(each_piece_move[1] & board.white_pieces & immediate_shelter).bit_count() # check whether the queen attacks king's immediate shelter pieces
+                        attack_potential += queen*points['wide_shelter']*(each_piece_move[1] & board.white_pieces & wide_shelter).bit_count() # check whether the queen attacks the king's wide shelter piece
                     elif (piece == constants.BLACK_ROOK):
-                        attack_potential += rook/10*(each_piece_move[1] & self.board.white_king).bit_count() # rook king attack potential
-                        attack_potential += rook/20*(each_piece_move[1] & self.board.white_pieces & self.board.white_immediate_shelter).bit_count()
-                        attack_potential += rook/20 * 2/3 * (each_piece_move[1] & self.board.white_pieces & wide_shelter).bit_count()
+                        attack_potential += rook*points['king']*(each_piece_move[1] & board.white_king).bit_count() # rook king attack potential
+                        attack_potential += rook*points['immediate_shelter']*(each_piece_move[1] & board.white_pieces & immediate_shelter).bit_count()
+                        attack_potential += rook*points['wide_shelter']*(each_piece_move[1] & board.white_pieces & wide_shelter).bit_count()
                     elif (piece == constants.BLACK_BISHOP):
-                        attack_potential += bishop/10*(each_piece_move[1] & self.board.white_king).bit_count() # bishop king attack potential
-                        attack_potential += bishop/20*(each_piece_move[1] & self.board.white_pieces & self.board.white_immediate_shelter).bit_count()
-                        attack_potential += bishop/20 * 2/3 * (each_piece_move[1] & self.board.white_pieces & wide_shelter).bit_count()
+                        attack_potential += bishop*points['king']*(each_piece_move[1] & board.white_king).bit_count() # bishop king attack potential
+                        attack_potential += bishop*points['immediate_shelter']*(each_piece_move[1] & board.white_pieces & immediate_shelter).bit_count()
+                        attack_potential += bishop*points['wide_shelter']*(each_piece_move[1] & board.white_pieces & wide_shelter).bit_count()
                     if (piece == constants.BLACK_KNIGHT):
-                        attack_potential += knight/10*(each_piece_move[1] & self.board.white_king).bit_count() # knight king attack potential
-                        attack_potential += knight/20*(each_piece_move[1] & self.board.white_pieces & self.board.white_immediate_shelter).bit_count()
-                        attack_potential += knight/20 * 2/3 * (each_piece_move[1] & self.board.white_pieces & wide_shelter).bit_count()
+                        attack_potential += knight*points['king']*(each_piece_move[1] & board.white_king).bit_count() # knight king attack potential
+                        attack_potential += knight*points['immediate_shelter']*(each_piece_move[1] & board.white_pieces & immediate_shelter).bit_count()
+                        attack_potential += knight*points['wide_shelter']*(each_piece_move[1] & board.white_pieces & wide_shelter).bit_count()
                     if (piece == constants.BLACK_PAWN):
-                        attack_potential += pawn/10*(each_piece_move[1] & self.board.white_king).bit_count() # pawn king attack potential
-                        attack_potential += pawn/20*(each_piece_move[1] & self.board.white_pieces & self.board.white_immediate_shelter).bit_count()
-                        attack_potential += pawn/20 * 2/3 * (each_piece_move[1] & self.board.white_pieces & wide_shelter).bit_count()
+                        attack_potential += pawn*points['king']*(each_piece_move[1] & board.white_king).bit_count() # pawn king attack potential
+                        attack_potential += pawn*points['immediate_shelter']*(each_piece_move[1] & board.white_pieces & immediate_shelter).bit_count()
+                        attack_potential += pawn*points['wide_shelter']*(each_piece_move[1] & board.white_pieces & wide_shelter).bit_count()
         return attack_potential
     
     '''
         Evaluates the utility of the current board for a given color based on that its pieces are defended by other pieces.
-        For each defended piece, 1/20 of that piece's strength is added to the score.
+        For each defended piece, the 'defensive' fraction (1/20) of that piece's strength is added to the score. The defended
+        pieces are the color's own pieces within the squares its pieces attack, found with the precomputed attack tables.
         
              
         PARAMS
+        board: the Board being evaluated
         color: the color whose perspective we are evaluating from
         queen: the piece strength of a queen
         rook: the piece strength of a rook
@@ -444,53 +559,46 @@ class Evaluations():
         a number equal to the defensive potential utility score of the given color for the current board
         
     '''
-    def get_defensive_potential(self, color, queen, rook, bishop, knight, pawn):
-        defensive_potential = 0 # initialize
-        defended_mask = 0x0000 # this will be a cumulative defensive mask
+    def get_defensive_potential(self, board, color, queen, rook, bishop, knight, pawn):
+        occupancy = board.board & constants.FULL_BOARD
         if (color == constants.WHITE):
-            # get an integer mask of the defended pieces
-            for i in range(64):
-                if self.board.white_pieces & (1 << i): # for each white piece
-                    piece = self.board.get_piece(utils.index_to_square(i))
-                    if (piece == constants.WHITE_KING): 
-                        defended_mask |= self.board.white_immediate_shelter # the king can defend any piece in its immediate shelter
-                    elif (piece == constants.WHITE_PAWN):
-                        index = i
-                        if (index%8>0 and index < 56): defended_mask |= 1 << (index+7) # the pawn can defend the diagonals in its direction of advance
-                        if (index%8<7 and index < 56): defended_mask |= 1 << (index+9)
-                    else: # use get_moves with is_swapped set to True, so it gets the squares a piece defends rather than attacks
-                        defended_mask |= self.board.get_moves(utils.index_to_square(i),True) 
-            # sum defended piece points, weighted according to piece strength
-            defensive_potential += queen/20*(defended_mask & self.board.white_queens).bit_count() 
-            defensive_potential += rook/20*(defended_mask & self.board.white_rooks).bit_count()
-            defensive_potential += bishop/20*(defended_mask & self.board.white_bishops).bit_count()
-            defensive_potential += knight/20*(defended_mask & self.board.white_knights).bit_count()
-            defensive_potential += pawn/20*(defended_mask & self.board.white_pawns).bit_count()
+            player = board.white_pieces
+            queens, rooks, bishops, knights, pawns = board.white_queens, board.white_rooks, board.white_bishops, \
+                board.white_knights, board.white_pawns
+            defended_mask = board.get_king_shelter(constants.WHITE)[0] # the king can defend any piece in its immediate shelter
+            advanced_pawns = (pawns << 8) & constants.FULL_BOARD
         else:
-            # get an integer mask of the defended pieces
-            for i in range(64):
-                if self.board.black_pieces & (1 << i): # for each black piece
-                    piece = self.board.get_piece(utils.index_to_square(i))
-                    if (piece == constants.BLACK_KING):
-                        defended_mask |= self.board.black_immediate_shelter # the king can defend any piece in its immediate shelter
-                    elif (piece == constants.BLACK_PAWN):
-                        index = i
-                        defended_mask = 0x0000
-                        if (index%8>0 and index < 56): defended_mask |= 1 << (index-9) # the pawn can defend the diagonals in its direction of advance
-                        if (index%8<7 and index < 56): defended_mask |= 1 << (index-7)
-                    else: # use get_moves with is_swapped set to True, so it gets the squares a piece defends rather than attacks
-                        defended_mask |= self.board.get_moves(utils.index_to_square(i),True)
-            # sum defended piece points, weighted according to piece strength
-            defensive_potential += queen/20*(defended_mask & self.board.black_queens).bit_count()
-            defensive_potential += rook/20*(defended_mask & self.board.black_rooks).bit_count()
-            defensive_potential += bishop/20*(defended_mask & self.board.black_bishops).bit_count()
-            defensive_potential += knight/20*(defended_mask & self.board.black_knights).bit_count()
-            defensive_potential += pawn/20*(defended_mask & self.board.black_pawns).bit_count()
+            player = board.black_pieces
+            queens, rooks, bishops, knights, pawns = board.black_queens, board.black_rooks, board.black_bishops, \
+                board.black_knights, board.black_pawns
+            defended_mask = board.get_king_shelter(constants.BLACK)[0]
+            advanced_pawns = pawns >> 8
+
+        # the pawns defend the diagonals in their direction of advance
+        defended_mask |= tables.shift_east(advanced_pawns) | tables.shift_west(advanced_pawns)
+
+        # the other pieces defend the squares they attack, up to and including the first blocker on each ray
+        for piece_board, attacks in ((knights, None), (bishops | queens, tables.bishop_attacks), (rooks | queens, tables.rook_attacks)):
+            piece_board &= constants.FULL_BOARD
+            while piece_board:
+                mask = piece_board & -piece_board
+                piece_board ^= mask
+                index = mask.bit_length() - 1
+                defended_mask |= tables.KNIGHT_ATTACKS[index] if attacks is None else attacks(index, occupancy)
+        defended_mask &= player
+
+        # sum defended piece points, weighted according to piece strength
+        points = self.weights['defensive']
+        defensive_potential = queen*points*(defended_mask & queens).bit_count()
+        defensive_potential += rook*points*(defended_mask & rooks).bit_count()
+        defensive_potential += bishop*points*(defended_mask & bishops).bit_count()
+        defensive_potential += knight*points*(defended_mask & knights).bit_count()
+        defensive_potential += pawn*points*(defended_mask & pawns).bit_count()
         return defensive_potential
     
     '''
         Evaluates the utility of the current board for a given color based on the security of that color's king. This method adds points 
-        when pieces occupy the sheltering region around the king using the following point scheme:
+        when pieces occupy the sheltering region around the king using the following point scheme ('king_security'):
             +.5 for pawns in the immediate king shelter
             +.5/2 for pawns in the cross or diagonal wide shelter
             +.5/3 for pawns in the sinuous wide shelter
@@ -498,8 +606,13 @@ class Evaluations():
             +.15 for rooks in any part of the king's shelter region
             +.25 for knights in any part of the king's shelter region
             +.3 for bishops in any part of the king's shelter region
+
+        The pawn points depend only on the pawns and the king's square, but they are not kept in the pawn cache: with the
+        shelter masks looked up from a table they take three masked bit counts, several times cheaper than building a key
+        and probing the cache for them.
             
         PARAMS
+        board: the Board being evaluated
         color: the color whose perspective we are evaluating from
         
         RETURNS
@@ -507,58 +620,62 @@ class Evaluations():
         
     '''
     
-    def get_king_security(self,color):
+    def get_king_security(self, board, color):
+        points = self.weights['king_security']
         king_security = 0.0
+        immediate_shelter, diag_wide_shelter, cross_wide_shelter, sinu_wide_shelter = board.get_king_shelter(color)
         if (color == constants.WHITE):
             # count and weight pawns in the shelter regions
-            king_security += .50*(self.board.white_pawns & self.board.white_immediate_shelter).bit_count() \
-                + .50/2*(self.board.white_pawns & (self.board.white_cross_wide_shelter | self.board.white_diag_wide_shelter)).bit_count() \
-                + .50/3*(self.board.white_pawns & self.board.white_sinu_wide_shelter).bit_count()
+            king_security += points['immediate_pawn']*(board.white_pawns & immediate_shelter).bit_count() \
+                + points['wide_pawn']*(board.white_pawns & (cross_wide_shelter | diag_wide_shelter)).bit_count() \
+                + points['sinu_wide_pawn']*(board.white_pawns & sinu_wide_shelter).bit_count()
             # get a mask of the full king shelter region
-            full_shelter = self.board.white_cross_wide_shelter | self.board.white_diag_wide_shelter | self.board.white_immediate_shelter | self.board.white_sinu_wide_shelter
+            full_shelter = cross_wide_shelter | diag_wide_shelter | immediate_shelter | sinu_wide_shelter
             # count and weight pieces in the king shelter region 
-            king_security += 0.1*(full_shelter & self.board.white_queens).bit_count() \
-                + 0.15*(full_shelter & self.board.white_rooks).bit_count() \
-                + 0.25*(full_shelter & self.board.white_knights).bit_count() \
-                + 0.30*(full_shelter & self.board.white_bishops).bit_count()
+            king_security += points['queen']*(full_shelter & board.white_queens).bit_count() \
+                + points['rook']*(full_shelter & board.white_rooks).bit_count() \
+                + points['knight']*(full_shelter & board.white_knights).bit_count() \
+                + points['bishop']*(full_shelter & board.white_bishops).bit_count()
         else:
             # count and weight pawns in the shelter eregion
-            king_security += .50*(self.board.black_pawns & self.board.black_immediate_shelter).bit_count() \
-                + .50/2*(self.board.black_pawns & (self.board.black_cross_wide_shelter | self.board.black_diag_wide_shelter)).bit_count() \
-                + .50/3*(self.board.black_pawns & self.board.black_sinu_wide_shelter).bit_count()
+            king_security += points['immediate_pawn']*(board.black_pawns & immediate_shelter).bit_count() \
+                + points['wide_pawn']*(board.black_pawns & (cross_wide_shelter | diag_wide_shelter)).bit_count() \
+                + points['sinu_wide_pawn']*(board.black_pawns & sinu_wide_shelter).bit_count()
             # get a mask of the full king shelter region
-            full_shelter = self.board.black_cross_wide_shelter | self.board.black_diag_wide_shelter | self.board.black_immediate_shelter | self.board.black_sinu_wide_shelter
+            full_shelter = cross_wide_shelter | diag_wide_shelter | immediate_shelter | sinu_wide_shelter
             # count and weight pieces in teh king shelter region
-            king_security += 0.1*(full_shelter & self.board.black_queens).bit_count() \
-                + 0.15*(full_shelter & self.board.black_rooks).bit_count() \
-                + 0.25*(full_shelter & self.board.black_knights).bit_count() \
-                + 0.30*(full_shelter & self.board.black_bishops).bit_count()
+            king_security += points['queen']*(full_shelter & board.black_queens).bit_count() \
+                + points['rook']*(full_shelter & board.black_rooks).bit_count() \
+                + points['knight']*(full_shelter & board.black_knights).bit_count() \
+                + points['bishop']*(full_shelter & board.black_bishops).bit_count()
         return king_security
     
     '''
         Evaluates board utility for a certain color in the endgame by checking the mobility of that colors king and the king's position.
         
         PARAMS
+        board: the Board being evaluated
         color: the color whose king this method finds the shelter of
 
         RETURNS
         evaluate_value: score of the current board for a given color based on endgame king mobility and position
     '''
     
-    def get_endgame_points(self, color):
+    def get_endgame_points(self, board, color):
         evaluate_value = 0
-        point_rank_per_row = [0.75, 0.5, 0.35, 0.25]
+        points = self.weights['endgame']
+        point_rank_per_row = points['king_rank']
         if color == constants.BLACK:
-            king = self.board.black_king
+            king = board.black_king
         else:
             point_rank_per_row = point_rank_per_row[::-1]
-            king = self.board.white_king
+            king = board.white_king
 
         # king mobility
         king_index = utils.singleton_board_to_index(king)
-        king_moves = self.board.get_moves(king_index)
+        king_moves = board.get_moves(king_index)
         
-        evaluate_value += king_moves.bit_count() * 0.15
+        evaluate_value += king_moves.bit_count() * points['king_mobility']
 
         for i, row_rank_val in enumerate(point_rank_per_row):
             row_mask = 60 << 8 * (i + 2)
@@ -566,3 +683,70 @@ class Evaluations():
                 evaluate_value += row_rank_val
             
         return evaluate_value
+
+    '''
+        Gets the pawn counts and pawn structure scores of both colors. These only depend on where the pawns are, which rarely
+        changes during a search, so they are kept in the board's pawn cache under a key of the pawns alone.
+
+        PARAMS
+        board: the Board being evaluated
+
+        RETURNS
+        a tuple (white pawn count, black pawn count, white structure score, black structure score)
+    '''
+
+    def get_pawn_structure(self, board):
+        white_pawns, black_pawns = board.white_pawns, board.black_pawns
+        key = (board.get_pawn_key(), white_pawns, black_pawns, self.weights_key)
+        entry = board.pawn_cache.probe(key)
+        if entry is None:
+            entry = (white_pawns.bit_count(), black_pawns.bit_count(),
+                     self.get_pawn_structure_score(white_pawns, black_pawns, constants.WHITE),
+                     self.get_pawn_structure_score(black_pawns, white_pawns, constants.BLACK))
+            board.pawn_cache.store(key, entry)
+        return entry
+
+    '''
+        Evaluates a color's pawn structure with bitboard fills, using the following point scheme ('pawn_structure'):
+            + a bonus for each passed pawn (no enemy pawn ahead of it on its own or an adjacent file), growing as it advances:
+              .1 on the second and third ranks, .2 on the fourth, .35 on the fifth, .6 on the sixth and 1 on the seventh
+            -.15 for each isolated pawn (no friendly pawn on an adjacent file)
+            -.15 for each doubled pawn (a friendly pawn behind it on the same file)
+
+        PARAMS
+        pawns: the integer representation of the color's pawns
+        opponent_pawns: the integer representation of the enemy pawns
+        color: the color whose pawns are being evaluated
+
+        RETURNS
+        a number equal to the pawn structure utility score of the given color
+    '''
+
+    def get_pawn_structure_score(self, pawns, opponent_pawns, color):
+        pawns &= constants.FULL_BOARD
+        opponent_pawns &= constants.FULL_BOARD
+        points = self.weights['pawn_structure']
+        passed_pawn_points = points['passed']
+
+        # squares ahead of the enemy pawns (towards this color) on their own and adjacent files
+        if color == constants.WHITE:
+            front_span = tables.south_fill(opponent_pawns) >> 8
+            behind = tables.north_fill(pawns) << 8
+        else:
+            front_span = tables.north_fill(opponent_pawns) << 8 & constants.FULL_BOARD
+            behind = tables.south_fill(pawns) >> 8
+        front_span |= tables.shift_east(front_span) | tables.shift_west(front_span)
+
+        evaluate_value = 0.0
+        passed = pawns & ~front_span
+        while passed:
+            lowest = passed & -passed
+            row = (lowest.bit_length() - 1) // 8
+            evaluate_value += passed_pawn_points[row if color == constants.WHITE else 7 - row]
+            passed ^= lowest
+
+        files = tables.file_fill(pawns)
+        isolated = pawns & ~(tables.shift_east(files) | tables.shift_west(files))
+        evaluate_value += points['isolated'] * isolated.bit_count()
+        evaluate_value += points['doubled'] * (pawns & behind).bit_count()
+        return evaluate_value
@@ -1,8 +1,16 @@
 from game_logic.board import Board
 from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants
+from algorithms.transposition_table import TranspositionTable
+from algorithms.search_stats import SearchStats
+from algorithms.search_handle import SearchHandle, SearchStopped
+from algorithms.batch_evaluations import BatchEvaluations
+from algorithms.eval_profiler import EvalProfiler, ProfiledEvaluations
+from algorithms.search_profiler import SearchProfiler
 import math
 import copy
-import datetime
+
+# the history table's slots per from index: king moves can land up to 9 squares past the last one (see Board.get_moves)
+HISTORY_TARGETS = 73
 
 class MiniMax():
     '''
@@ -11,27 +19,128 @@ class MiniMax():
         ATTRIBUTES
         MAX_DEPTH: the depth at which we call minimax recursively (ply depth is MAX_DEPTH + 1)
         next_move: a tuple of squares to hold the next move to make
+        root_score: the score of the root board found by the last get_next_move search, from the searching player's
+            perspective, or None before any search
+        principal_variation: the list of moves (as square tuples) both players are expected to make from the last searched board
+        pv_table: the best line found so far below each search depth, used to build the principal variation
+        use_eval_functions: whether boards are scored with the evaluation functions (otherwise every board scores 0)
+        use_move_ordering: whether moves are searched in static exchange order rather than board order
+        use_batch_eval: whether the boards at max depth are scored together with the light BatchEvaluations, rather than one
+            at a time with the board's full evaluation
+        batch_evaluations: the BatchEvaluations used when use_batch_eval is set
+        profile_eval: whether get_next_move times each evaluation term and prints a summary table once the search is done.
+            Off by default, when the plain Evaluations helper runs without any instrumentation
+        eval_profiler: the EvalProfiler of the last profiled search, or None
+        profile_search: None, or the SearchProfiler mode ('cprofile' or 'sampling') get_next_move runs the search under,
+            printing the time spent in each engine function once the search is done. Off by default, when the search
+            runs without a profiler
+        profile_path: the file the profiled search's call stacks are written to in the collapsed format of flame graph
+            tools, or None
+        search_profiler: the SearchProfiler of the last profiled search, or None
+        transposition_table: a TranspositionTable used to reuse results for positions reached more than once (including in
+            later searches), or None
+        history: a history score for each (from index, to index) pair, raised whenever a quiet move causes a cutoff and used
+            to order quiet moves. It is kept between searches and halved each time the root changes
+        root_key: the Zobrist key of the root of the last search
+        expected_key: the Zobrist key of the position expected two plies after the last search's root, or None
+        expected_line: the moves (as index pairs) expected from the root of the current search, searched first at each depth
+            along the line
+        pv_follow_depth: the depth of the node being searched along expected_line, or -1 once the search has left the line
+        stats: the SearchStats of the last (or current) search
+        cancel_flag: an object whose value is set to 1 to abandon the search (by raising SearchStopped), or None
         
         METHODS
-        get_next_move(board,player)
+        get_next_move(board,player,with_stats)
             initiates minimax for the given player (black or white) for the given board, and deposits the recommended move
             into next_move
-            returns the best move represented as a tuple
+            returns the best move represented as a tuple, paired with the search's SearchStats if with_stats is set
+
+        get_search_result(with_stats)
+            returns the result of the last search in the form get_next_move returns it
+
+        prepare_search(board, player)
+            ages the search state kept from earlier searches if the root has changed, and picks the line to search first
+            returns None
+
+        finish_search(board, player)
+            records the position the principal variation expects two plies from now, for the next search to start from
+            returns None
+
+        copy_search_state(searcher)
+            takes the search state kept between searches from another searcher, such as one that ran in the background
+            returns None
+
+        get_search_copy()
+            returns a copy of this searcher for a background search, sharing its settings and transposition table
+
+        start_search(board, player, on_progress)
+            starts searching for the player's next move in a background thread
+            returns a SearchHandle used to follow, stop or wait for the search
+
+        start_ponder(board, player, principal_variation)
+            starts searching, on the opponent's time, the position after the opponent's expected reply
+            returns a SearchHandle for the ponder search, or None if there is no expected reply
             
         minimax(maximizing, board, player, depth, alpha, beta)
             recursive function for searching the minimax tree
             returns the score of the given board state
             
-        get_max(board,color,is_terminal_board)
+        probe_transposition_table(board, player, maximizing, depth, alpha, beta)
+            looks up the given node in the transposition table
+            returns a pair (score if the stored result settles the node or None, stored best move or None)
+
+        store_transposition_table(board, player, maximizing, depth, alpha, beta, best_val)
+            saves the result of searching the given node in the transposition table
+            returns None
+
+        update_pv(depth, from_index, to_index, is_leaf)
+            records a move and the line below it as the best line found so far at the given depth
+
+        update_history(board, depth, from_index, to_index)
+            raises the history score of a move that caused a cutoff, if the move is quiet
+
+        order_moves(board, possible_moves, player)
+            returns the player's moves as (from index, to index) pairs, with captures ranked by static exchange evaluation
+
+        get_max(board,color,is_terminal_board,alpha,beta)
             returns the score of the given board for a maximizing player, using the board's get_score function
         
-        get_min(board,color,is_terminal_board)
+        get_leaf_scores(board, player, moves, maximizing)
+            scores the boards reached by each of the player's moves in one batch
+            returns a list of scores, one per move, from the perspective of the node's maximizer or minimizer
+
+        get_min(board,color,is_terminal_board,alpha,beta)
             returns the score of the given board for a minimizing player, which will equal -get_max with the same parameters
     '''
-    def __init__(self, depth=2):
+    '''
+        PARAMS
+        depth: the MAX_DEPTH to search to
+        transposition_table: the TranspositionTable to search with (such as one shared with other searchers), or None for
+            a new table of its own
+    '''
+    def __init__(self, depth=2, transposition_table=None):
         self.MAX_DEPTH = depth # ply depth is MAX_DEPTH + 1
         self.next_move = tuple()
+        self.root_score = None
+        self.principal_variation = []
+        self.pv_table = []
         self.use_eval_functions = True
+        self.use_move_ordering = True
+        self.use_batch_eval = False
+        self.profile_eval = False
+        self.eval_profiler = None
+        self.profile_search = None
+        self.profile_path = None
+        self.search_profiler = None
+        self.batch_evaluations = BatchEvaluations()
+        self.transposition_table = TranspositionTable() if transposition_table is None else transposition_table
+        self.history = [0] * 64 * HISTORY_TARGETS
+        self.root_key = None
+        self.expected_key = None
+        self.expected_line = []
+        self.pv_follow_depth = -1
+        self.stats = SearchStats()
+        self.cancel_flag = None
 
     '''
         Gets the minimax optimized next move for the given player on a given board
@@ -39,13 +148,176 @@ class MiniMax():
         PARAMS
         board: the current board for the chess game
         player: the player (black or white) asking for a move
+        with_stats: whether to return the search's SearchStats along with the move
         
         RETURNS
-        the recommended move for the player in the form (from_square, to_square)
+        the recommended move for the player in the form (from_square, to_square), or a pair (move, SearchStats) if with_stats
+        is set
+    '''
+    def get_next_move(self,board,player,with_stats=False):
+        self.stats = SearchStats()
+        self.stats.start()
+        self.prepare_search(board, player)
+        self.pv_table = [[] for _ in range(self.MAX_DEPTH + 1)]
+        evaluations = board.evaluations
+        if (self.profile_eval): # the board's copies made during the search share the profiled helper
+            self.eval_profiler = EvalProfiler()
+            board.evaluations = ProfiledEvaluations(self.eval_profiler, evaluations.weights)
+        try:
+            if (self.profile_search):
+                self.search_profiler = SearchProfiler(self.profile_search)
+                self.root_score = self.search_profiler.run(self.minimax, True, board, player, 0, -math.inf, math.inf)
+            else:
+                self.root_score = self.minimax(True,board,player,0,-math.inf,math.inf)
+        finally:
+            board.evaluations = evaluations
+        if (self.profile_eval):
+            print(self.eval_profiler.get_summary())
+        if (self.profile_search):
+            print(self.search_profiler.get_summary())
+            if (self.profile_path):
+                self.search_profiler.write_collapsed_stacks(self.profile_path)
+        self.principal_variation = self.pv_table[0]
+        self.finish_search(board, player)
+        self.stats.end_iteration(self.MAX_DEPTH)
+        self.stats.stop()
+        return self.get_search_result(with_stats)
+
+    '''
+        Gets the result of the last search in the form get_next_move returns it
+
+        PARAMS
+        with_stats: whether to pair the move with the search's SearchStats
+
+        RETURNS
+        next_move, or the pair (next_move, stats) if with_stats is set
+    '''
+    def get_search_result(self, with_stats):
+        return (self.next_move, self.stats) if with_stats else self.next_move
+
+    '''
+        Prepares the search state kept from earlier searches for a search of the given root. When the root has changed, the
+        transposition table starts a new generation and the history scores are halved, so that older results give way to
+        newer ones. The line searched first is the last principal variation when the root is unchanged (as when a search
+        deepens one ply at a time), or its continuation when the game followed the first two moves of that variation.
+
+        PARAMS
+        board: the root board
+        player: the player (black or white) to move at the root
+    '''
+    def prepare_search(self, board, player):
+        root_key = board.get_zobrist_key(player)
+        if (root_key == self.root_key):
+            line = self.principal_variation
+        elif (root_key == self.expected_key):
+            line = self.principal_variation[2:]
+        else:
+            line = []
+        if (root_key != self.root_key):
+            self.root_key = root_key
+            history = self.history
+            for i in range(len(history)):
+                history[i] >>= 1
+        if (self.transposition_table is not None):
+            self.transposition_table.new_search(root_key)
+        self.expected_line = [(utils.square_to_index(from_square), utils.square_to_index(to_square))
+                              for from_square, to_square in line]
+        self.pv_follow_depth = 0
+
+    '''
+        Records the Zobrist key of the position reached if both players follow the first two moves of the principal
+        variation, so that the next search can recognise it and start from the rest of the variation
+
+        PARAMS
+        board: the root board
+        player: the player (black or white) to move at the root
+    '''
+    def finish_search(self, board, player):
+        self.expected_key = None
+        if (len(self.principal_variation) < 3):
+            return
+        expected_board = copy.deepcopy(board)
+        for from_square, to_square in self.principal_variation[:2]:
+            if (expected_board.move_piece(from_square, to_square)):
+                return
+        self.expected_key = expected_board.get_zobrist_key(player)
+
+    '''
+        Takes the search state kept between searches from another searcher, so that a search run on a copy of this searcher
+        (such as a background search) benefits the searches that follow it
+
+        PARAMS
+        searcher: the MiniMax that ran the search
+    '''
+    def copy_search_state(self, searcher):
+        self.next_move = searcher.next_move
+        self.principal_variation = searcher.principal_variation
+        self.history = searcher.history
+        self.root_key = searcher.root_key
+        self.expected_key = searcher.expected_key
+
+    '''
+        Copies this searcher for a search run in the background. The copy shares the settings and the transposition table
+        (so the search's results reach later searches), but has its own next move and history, so an abandoned search
+        leaves this searcher's history as it was. What a finished search learned is taken back with copy_search_state.
+
+        RETURNS
+        the copy
+    '''
+    def get_search_copy(self):
+        searcher = copy.copy(self)
+        searcher.next_move = tuple()
+        searcher.history = list(self.history)
+        return searcher
+
+    '''
+        Starts searching for the next move in a background thread, so the caller's event loop keeps running. The search
+        deepens one ply at a time up to MAX_DEPTH with a copy of this searcher's settings.
+
+        PARAMS
+        board: the current board for the chess game
+        player: the player (black or white) asking for a move
+        on_progress: a function called from the search thread as on_progress(depth, move, stats) each time a depth
+            completes, or None
+
+        RETURNS
+        a SearchHandle whose stop() returns the best move found so far and whose result() waits for the full search
+    '''
+    def start_search(self, board, player, on_progress=None):
+        return SearchHandle(self, board, player, on_progress)
+
+    '''
+        Starts pondering: while the opponent thinks, searches the position reached if the opponent plays the reply the last
+        search expected. Once the opponent moves, the handle's ponder_hit either keeps the search (the reply was predicted)
+        or stops it. Pondering hands its results to later searches through the transposition table, so a table is created
+        if this searcher does not have one yet.
+
+        PARAMS
+        board: the board after this player's move
+        player: the player (black or white) who just moved, and who the ponder search finds a move for
+        principal_variation: the line expected from the search that chose this player's move, starting with that move
+            (defaults to the principal variation of this searcher's last search)
+
+        RETURNS
+        a SearchHandle for the ponder search, or None if no reply is expected or the expected reply ends the game
     '''
-    def get_next_move(self,board,player):
-        self.minimax(True,board,player,0,-math.inf,math.inf)
-        return self.next_move
+    def start_ponder(self, board, player, principal_variation=None):
+        if (principal_variation is None):
+            principal_variation = self.principal_variation
+        if (len(principal_variation) < 2):
+            return None
+        if (self.transposition_table is None):
+            self.transposition_table = TranspositionTable()
+
+        ponder_move = principal_variation[1]
+        from_index, to_index = utils.square_to_index(ponder_move[0]), utils.square_to_index(ponder_move[1])
+        opponent = constants.BLACK if player == constants.WHITE else constants.WHITE
+        ponder_board = copy.deepcopy(board)
+        if (not ponder_board.check_piece(from_index, opponent) or not ponder_board.get_moves(from_index) & (1 << to_index)):
+            return None # the line does not follow from this board
+        if (ponder_board.move_piece(ponder_move[0], ponder_move[1])):
+            return None
+        return SearchHandle(self, ponder_board, player, ponder_move=ponder_move)
 
     '''
         Implements the minimax algorith with alpha-beta pruning
@@ -62,8 +334,18 @@ class MiniMax():
         the best score (maximized or minimized) of the current search tree depth, 
     '''
     def minimax(self, maximizing, board, player, depth, alpha, beta):
+        if (self.cancel_flag is not None and self.cancel_flag.value):
+            raise SearchStopped()
         possible_moves = []
-        break_cond = False # flag to help break out of nested for loops
+        self.pv_table[depth] = []
+        stats = self.stats
+        stats.interior_nodes += 1
+
+        hash_move = None
+        if (self.transposition_table is not None):
+            hash_score, hash_move = self.probe_transposition_table(board, player, maximizing, depth, alpha, beta)
+            if (hash_score is not None):
+                return hash_score
 
         board_cpy = copy.deepcopy(board)
         # get bit board possible moves for each of the current player's pieces
@@ -71,83 +353,254 @@ class MiniMax():
             if (board_cpy.check_piece(i,player)):
                 moves = board_cpy.get_moves(utils.index_to_square(i))
                 possible_moves.append((i,moves))
+        ordered_moves = self.order_moves(board_cpy, possible_moves, player)
+        if (hash_move in ordered_moves): # search the best move from an earlier visit first
+            ordered_moves.remove(hash_move)
+            ordered_moves.insert(0, hash_move)
+        pv_move = None
+        if (depth == self.pv_follow_depth and depth < len(self.expected_line)): # still on the expected line, search it first
+            pv_move = self.expected_line[depth]
+            if (pv_move in ordered_moves):
+                ordered_moves.remove(pv_move)
+                ordered_moves.insert(0, pv_move)
 
+        alpha_bound, beta_bound = alpha, beta # the window the node was searched with, for the transposition table
         if (maximizing):
             best_val = -math.inf
             if (depth < self.MAX_DEPTH):
-                for moves in possible_moves:     # for each piece of player's color
-                    if (break_cond): break       # break if alpha-beta break was signaled in the nested loop
-                    for i in range (0,64):           # for each square in the board
-                        if moves[1] & (1<<i):        # if the piece can move to that square
-                            is_terminal_board = board_cpy.move_piece(utils.index_to_square(moves[0]),utils.index_to_square(i)) # make move
-                            if (not is_terminal_board and player == constants.WHITE): # if not a terminal board call minimax to continue the search tree
-                                score = (self.minimax(not maximizing, board_cpy, constants.BLACK, depth+1, alpha, beta))
-                            elif (not is_terminal_board): # same except for the other color 
-                                score = (self.minimax(not maximizing, board_cpy, constants.WHITE, depth+1, alpha, beta))
-                            else: # if terminal state, use the get_max function to return a score
-                                score = self.get_max(board,player,is_terminal_board)
-                            board_cpy.undo_last() # undo move
-
-                            if (score >= best_val): # keeping a running max
-                                if (depth == 0): # if we are at, depth 0, these are the moves the starting player would make
-                                    self.next_move = (utils.index_to_square(moves[0]),utils.index_to_square(i)) # track the next move
-                                best_val = score
-
-                            alpha = max(alpha,best_val) # prune states with alpha-beta
-                            if (beta <= alpha):
-                                break_cond = True
-                                break
+                for move_number, (from_index, to_index) in enumerate(ordered_moves):  # for each move the player's pieces can make
+                    self.pv_follow_depth = depth + 1 if (from_index, to_index) == pv_move else -1
+                    is_terminal_board = board_cpy.move_piece(utils.index_to_square(from_index),utils.index_to_square(to_index)) # make move
+                    if (not is_terminal_board and player == constants.WHITE): # if not a terminal board call minimax to continue the search tree
+                        score = (self.minimax(not maximizing, board_cpy, constants.BLACK, depth+1, alpha, beta))
+                    elif (not is_terminal_board): # same except for the other color 
+                        score = (self.minimax(not maximizing, board_cpy, constants.WHITE, depth+1, alpha, beta))
+                    else: # if terminal state, use the get_max function to return a score
+                        score = self.get_max(board,player,is_terminal_board,alpha,beta)
+                    board_cpy.undo_last() # undo move
+
+                    # keeping a running max. Ties keep the earlier move, since a later move that failed low can return a bound
+                    # equal to alpha without actually being as good
+                    if (score > best_val or best_val == -math.inf):
+                        if (depth == 0): # if we are at, depth 0, these are the moves the starting player would make
+                            self.next_move = (utils.index_to_square(from_index),utils.index_to_square(to_index)) # track the next move
+                        best_val = score
+                        self.update_pv(depth, from_index, to_index, is_terminal_board)
+
+                    alpha = max(alpha,best_val) # prune states with alpha-beta
+                    if (beta <= alpha):
+                        stats.beta_cutoffs += 1
+                        stats.first_move_cutoffs += move_number == 0
+                        self.update_history(board, depth, from_index, to_index)
+                        break
             else: # if we've reached max depth
-                for moves in possible_moves:    # for each piece of player's color
-                    if (break_cond): break      # break if alpha-beta break was signaled in the nested loop
-                    for i in range (0,64):          # for each square in the board
-                        if moves[1] & (1<<i):       # if the piece can move to that square
-                            is_terminal_board = board_cpy.move_piece(utils.index_to_square(moves[0]),utils.index_to_square(i))
-                            score = self.get_max(board,player,is_terminal_board) # use get max to get the score
-                            board_cpy.undo_last()
-                            best_val = max(score,best_val) # track running max
-
-                            alpha = max(alpha,best_val) # prune with alpha-beta
-                            if (beta <= alpha):
-                                break_cond = True
-                                break
-            return best_val
+                leaf_scores = self.get_leaf_scores(board_cpy, player, ordered_moves, True) if self.use_batch_eval else None
+                for move_number, (from_index, to_index) in enumerate(ordered_moves):
+                    if (leaf_scores is not None):
+                        score = leaf_scores[move_number]
+                    else:
+                        is_terminal_board = board_cpy.move_piece(utils.index_to_square(from_index),utils.index_to_square(to_index))
+                        score = self.get_max(board,player,is_terminal_board,alpha,beta) # use get max to get the score
+                        board_cpy.undo_last()
+                    if (score > best_val):
+                        if (depth == 0): # a search with MAX_DEPTH 0 picks the root move here
+                            self.next_move = (utils.index_to_square(from_index),utils.index_to_square(to_index))
+                        self.update_pv(depth, from_index, to_index, True)
+                    best_val = max(score,best_val) # track running max
+
+                    alpha = max(alpha,best_val) # prune with alpha-beta
+                    if (beta <= alpha):
+                        stats.beta_cutoffs += 1
+                        stats.first_move_cutoffs += move_number == 0
+                        self.update_history(board, depth, from_index, to_index)
+                        break
         else:
             best_val = math.inf
             if (depth < self.MAX_DEPTH):
-                for moves in possible_moves:    # for each piece of player's color
-                    if (break_cond): break      # break if alpha-beta break was signaled in the nested loop
-                    for i in range (0,64):          # for each square in the board
-                        if moves[1] & (1<<i):       # if the piece can move to that square
-                            is_terminal_board = board_cpy.move_piece(utils.index_to_square(moves[0]),utils.index_to_square(i))
-                            if (not is_terminal_board and player == constants.WHITE): # if not a terminal board call minimax to continue the search tree
-                                score = (self.minimax(not maximizing, board_cpy, constants.BLACK, depth+1, alpha, beta))
-                            elif (not is_terminal_board): # recursive call for the other color
-                                score = (self.minimax(not maximizing, board_cpy, constants.WHITE, depth+1, alpha, beta))
-                            else:
-                                score = self.get_min(board,player,is_terminal_board) # if reached a terminal state, use get_min to get a score
-                            board_cpy.undo_last()
-
-                            best_val = min(score, best_val) # track running min
-                            beta = min(best_val, beta) # prune with alpha-beta
-                            if (beta <= alpha):
-                                break_cond = True
-                                break
+                for move_number, (from_index, to_index) in enumerate(ordered_moves):
+                    self.pv_follow_depth = depth + 1 if (from_index, to_index) == pv_move else -1
+                    is_terminal_board = board_cpy.move_piece(utils.index_to_square(from_index),utils.index_to_square(to_index))
+                    if (not is_terminal_board and player == constants.WHITE): # if not a terminal board call minimax to continue the search tree
+                        score = (self.minimax(not maximizing, board_cpy, constants.BLACK, depth+1, alpha, beta))
+                    elif (not is_terminal_board): # recursive call for the other color
+                        score = (self.minimax(not maximizing, board_cpy, constants.WHITE, depth+1, alpha, beta))
+                    else:
+                        score = self.get_min(board,player,is_terminal_board,alpha,beta) # if reached a terminal state, use get_min to get a score
+                    board_cpy.undo_last()
+
+                    if (score < best_val):
+                        self.update_pv(depth, from_index, to_index, is_terminal_board)
+                    best_val = min(score, best_val) # track running min
+                    beta = min(best_val, beta) # prune with alpha-beta
+                    if (beta <= alpha):
+                        stats.beta_cutoffs += 1
+                        stats.first_move_cutoffs += move_number == 0
+                        self.update_history(board, depth, from_index, to_index)
+                        break
             else:
-                for moves in possible_moves:    # for each piece of player's color
-                    if (break_cond): break      # break if alpha-beta break was signaled in the nested loop
-                    for i in range (0,64):          # for each square in the board
-                        if moves[1] & (1<<i):       # if the piece can move to that square
-                            is_terminal_board = board_cpy.move_piece(utils.index_to_square(moves[0]),utils.index_to_square(i))
-                            score = self.get_min(board,player,is_terminal_board)  
-                            board_cpy.undo_last()
-                            best_val = min(score,best_val,player)
-
-                            beta = min(best_val, beta) # track running min
-                            if (beta <= alpha): # prune with alpha-beta
-                                break_cond = True
-                                break
-            return best_val
+                leaf_scores = self.get_leaf_scores(board_cpy, player, ordered_moves, False) if self.use_batch_eval else None
+                for move_number, (from_index, to_index) in enumerate(ordered_moves):
+                    if (leaf_scores is not None):
+                        score = leaf_scores[move_number]
+                    else:
+                        is_terminal_board = board_cpy.move_piece(utils.index_to_square(from_index),utils.index_to_square(to_index))
+                        score = self.get_min(board,player,is_terminal_board,alpha,beta)
+                        board_cpy.undo_last()
+                    if (score < best_val):
+                        self.update_pv(depth, from_index, to_index, True)
+                    best_val = min(score,best_val,player)
+
+                    beta = min(best_val, beta) # track running min
+                    if (beta <= alpha): # prune with alpha-beta
+                        stats.beta_cutoffs += 1
+                        stats.first_move_cutoffs += move_number == 0
+                        self.update_history(board, depth, from_index, to_index)
+                        break
+
+        if (self.transposition_table is not None):
+            self.store_transposition_table(board, player, maximizing, depth, alpha_bound, beta_bound, best_val)
+        return best_val
+
+    '''
+        Looks up the current node in the transposition table. Stored scores are from the perspective of the player to move,
+        which is the maximizer's score at maximizing nodes and the negated minimizer's score at minimizing nodes, so the same
+        entry serves the position whether it is reached as a maximizing or a minimizing node. The root is never settled from
+        the table, since its move still has to be chosen. The table is keyed by the Zobrist key alone, unlike the evaluation
+        cache, so a transposition reached along another path shares its entry (see TranspositionTable).
+
+        PARAMS
+        board: the board at the current node
+        player: the player (black or white) to move at the current node
+        maximizing: whether the current node is a maximizing node
+        depth: the current search tree depth
+        alpha: the current alpha bound
+        beta: the current beta bound
+
+        RETURNS
+        a pair (score, move) where score is the node's score if the stored result is deep enough and its bound settles the
+        node (None otherwise), and move is the stored best (from index, to index) pair (or None)
+    '''
+    def probe_transposition_table(self, board, player, maximizing, depth, alpha, beta):
+        stats = self.stats
+        stats.tt_probes += 1
+        entry = self.transposition_table.probe(board.get_zobrist_key(player))
+        if (entry is None):
+            return None, None
+        stats.tt_hits += 1
+        stored_score, draft, bound, move = entry
+        if (depth == 0 or draft < self.MAX_DEPTH - depth):
+            return None, move
+
+        score = stored_score if maximizing else -stored_score
+        if (not maximizing and bound != TranspositionTable.EXACT): # a lower bound for the player to move is an upper bound for the minimizer
+            bound = TranspositionTable.UPPER_BOUND if bound == TranspositionTable.LOWER_BOUND else TranspositionTable.LOWER_BOUND
+        if (bound == TranspositionTable.EXACT or
+                (bound == TranspositionTable.LOWER_BOUND and score >= beta) or
+                (bound == TranspositionTable.UPPER_BOUND and score <= alpha)):
+            stats.tt_cutoffs += 1
+            return score, move
+        return None, move
+
+    '''
+        Saves the result of searching the current node in the transposition table, with a bound type derived from the window
+        the node was searched with: a score at or below alpha is an upper bound, a score at or above beta is a lower bound
+        and anything in between is exact
+
+        PARAMS
+        board: the board at the current node
+        player: the player (black or white) to move at the current node
+        maximizing: whether the current node is a maximizing node
+        depth: the current search tree depth
+        alpha: the alpha bound the node was searched with
+        beta: the beta bound the node was searched with
+        best_val: the score the search of the node returned
+    '''
+    def store_transposition_table(self, board, player, maximizing, depth, alpha, beta, best_val):
+        if (best_val <= alpha):
+            bound = TranspositionTable.UPPER_BOUND
+        elif (best_val >= beta):
+            bound = TranspositionTable.LOWER_BOUND
+        else:
+            bound = TranspositionTable.EXACT
+        if (not maximizing): # store from the perspective of the player to move
+            best_val = -best_val
+            if (bound != TranspositionTable.EXACT):
+                bound = TranspositionTable.UPPER_BOUND if bound == TranspositionTable.LOWER_BOUND else TranspositionTable.LOWER_BOUND
+
+        move = None
+        if (self.pv_table[depth]):
+            from_square, to_square = self.pv_table[depth][0]
+            move = (utils.square_to_index(from_square), utils.square_to_index(to_square))
+        self.transposition_table.store(board.get_zobrist_key(player), best_val, self.MAX_DEPTH - depth, bound, move)
+
+    '''
+        Records a move as the best found so far at the given depth, followed by the best line found below it
+
+        PARAMS
+        depth: the search tree depth the move was made at
+        from_index: the index the moving piece started on
+        to_index: the index the moving piece landed on
+        is_leaf: whether nothing was searched below the move (a terminal board, or a move at max depth)
+    '''
+    def update_pv(self, depth, from_index, to_index, is_leaf):
+        move = (utils.index_to_square(from_index),utils.index_to_square(to_index))
+        self.pv_table[depth] = [move] if is_leaf else [move] + self.pv_table[depth+1]
+
+    '''
+        Raises the history score of a move that caused a cutoff, by more the more plies were left to search below it.
+        Captures are left out, since they are already ordered by static exchange evaluation.
+
+        PARAMS
+        board: the board the move was made from
+        depth: the search tree depth the move was made at
+        from_index: the index the moving piece started on
+        to_index: the index the moving piece landed on
+    '''
+    def update_history(self, board, depth, from_index, to_index):
+        if (board.board & (1 << to_index)):
+            return
+        plies_left = self.MAX_DEPTH - depth + 1
+        self.history[from_index * HISTORY_TARGETS + to_index] += plies_left * plies_left
+
+    '''
+        Orders the moves of the current player so that alpha-beta sees the strongest candidates first. Captures are ranked with the
+        move generator's static exchange evaluation: captures that win or trade material come first (best exchange first), then
+        quiet moves by history score, then captures that lose material.
+
+        PARAMS
+        board: the board the moves will be made on
+        possible_moves: a list of (from index, integer mask of to squares) pairs for the current player's pieces
+        player: the current player (black or white)
+
+        RETURNS
+        a list of (from index, to index) pairs in search order
+    '''
+    def order_moves(self, board, possible_moves, player):
+        quiet_moves = []
+        if (not self.use_move_ordering):
+            for from_index, moves in possible_moves:
+                quiet_moves.extend((from_index, to_index) for to_index in utils.board_to_indexes(moves))
+            return quiet_moves
+
+        opponent = board.black_pieces if player == constants.WHITE else board.white_pieces
+        good_captures = []
+        bad_captures = []
+        for from_index, moves in possible_moves:
+            if (not moves): continue
+            for to_index in utils.board_to_indexes(moves):
+                if (opponent & (1 << to_index)): # rank captures by the exchange they start
+                    exchange = board.move_generator.static_exchange_eval(board, from_index, to_index)
+                    if (exchange >= 0):
+                        good_captures.append((exchange, from_index, to_index))
+                    else:
+                        bad_captures.append((exchange, from_index, to_index))
+                else:
+                    quiet_moves.append((from_index, to_index))
+        history = self.history
+        quiet_moves.sort(key=lambda move: -history[move[0] * HISTORY_TARGETS + move[1]]) # stable, so unscored moves keep board order
+        good_captures.sort(key=lambda capture: -capture[0]) # stable, so equal exchanges keep board order
+        bad_captures.sort(key=lambda capture: -capture[0])
+        return [capture[1:] for capture in good_captures] + quiet_moves + [capture[1:] for capture in bad_captures]
 
     '''
         Gets the score of the current board for the current color for minimax, from the perspective of a maximizer
@@ -156,16 +609,46 @@ class MiniMax():
         board: current board state
         color: color currently making a move
         is_terminal_board: an integer, where 1 indicates a winning board state (checkmate), and 2 indicates a stalemate (exceeded max moves)
+        alpha, beta: the search window; a score outside it may be a bound rather than the exact score (see Board.get_score)
         
         RETURNS
         score of the given board
     '''
-    def get_max(self,board,color,is_terminal_board):
-        # start = datetime.datetime.now()
-        score = board.get_score(color, is_terminal_board) if self.use_eval_functions else 0 # get score using a function of the board
-        # end = datetime.datetime.now()
-        # print((end-start).total_seconds())
-        return score
+    def get_max(self,board,color,is_terminal_board,alpha=-math.inf,beta=math.inf):
+        stats = self.stats
+        stats.leaf_nodes += 1
+        if (not self.use_eval_functions):
+            return 0
+        stats.eval_calls += 1
+        return board.get_score(color, is_terminal_board, alpha, beta) # get score using a function of the board
+
+    '''
+        Scores the boards reached by each of the player's moves at max depth in a single batch with batch_evaluations. Unlike
+        get_max, every board is scored after its move is made, and with the light evaluation only.
+
+        PARAMS
+        board: the board the moves are made from, which is left as it was
+        player: the player making the moves
+        moves: the (from index, to index) pairs of the moves
+        maximizing: whether the node is a maximizing node
+
+        RETURNS
+        a list of scores, one per move, from the perspective of the node's maximizer (or, for a minimizing node, negated)
+    '''
+    def get_leaf_scores(self, board, player, moves, maximizing):
+        stats = self.stats
+        stats.leaf_nodes += len(moves)
+        if (not self.use_eval_functions):
+            return [0] * len(moves)
+        stats.eval_calls += len(moves)
+        batch_evaluations = self.batch_evaluations
+        rows, winning_boards = [], []
+        for from_index, to_index in moves:
+            winning_boards.append(board.move_piece(utils.index_to_square(from_index), utils.index_to_square(to_index)))
+            rows.append(batch_evaluations.encode(board))
+            board.undo_last()
+        scores = batch_evaluations.get_scores(rows, player, winning_boards)
+        return scores if maximizing else [-score for score in scores]
 
     '''
         Gets the score of the current board for the current color for minimax, from the perspective of a minimizer
@@ -174,9 +657,10 @@ class MiniMax():
         board: current board state
         color: color currently making a move
         is_terminal_board: an integer, where 1 indicates a winning board state (checkmate), and 2 indicates a stalemate (exceeded max moves)
+        alpha, beta: the search window, from the maximizer's perspective
         
         RETURNS
         score of the given board
     '''
-    def get_min(self,board,color,is_terminal_board):
-        return -self.get_max(board,color,is_terminal_board)
+    def get_min(self,board,color,is_terminal_board,alpha=-math.inf,beta=math.inf):
+        return -self.get_max(board,color,is_terminal_board,-beta,-alpha)
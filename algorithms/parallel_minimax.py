@@ -0,0 +1,591 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants
+from algorithms.minimax import MiniMax
+from algorithms.search_handle import SearchStopped
+from algorithms.transposition_table import TranspositionTable, SharedTranspositionTable
+from algorithms.search_stats import SearchStats
+from algorithms.eval_cache import EvalCache
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import multiprocessing
+import math
+import copy
+import os
+import sys
+import weakref
+
+# shared alpha bound, its lock and the process's root move searcher (which stops once the search's shared stop flag is set),
+# set in each root split worker process by _init_worker
+_shared_alpha = None
+_shared_alpha_lock = None
+_root_searcher = None
+
+# shared transposition table and stop flag, set in each lazy SMP helper process by _init_lazy_smp_worker
+_shared_table = None
+_stop_flag = None
+
+
+class SharedAlphaMiniMax(MiniMax):
+    '''
+        A minimax searcher that tightens its alpha bound from a value shared between processes at every node, so that a root
+        move finished by any worker immediately prunes the subtrees being searched by every other worker.
+
+        Since alpha is always from the root player's perspective, raising it anywhere in a subtree is sound.
+
+        ATTRIBUTES
+        shared_alpha: a multiprocessing value holding the best root score found so far by any worker
+
+        METHODS
+        minimax(maximizing, board, player, depth, alpha, beta)
+            the minimax search, with alpha raised to the shared alpha on entry to every node
+    '''
+    def __init__(self, depth, shared_alpha):
+        super().__init__(depth)
+        self.shared_alpha = shared_alpha
+
+    def minimax(self, maximizing, board, player, depth, alpha, beta):
+        alpha = max(alpha, self.shared_alpha.value)
+        return super().minimax(maximizing, board, player, depth, alpha, beta)
+
+
+class HelperMiniMax(MiniMax):
+    '''
+        A minimax searcher for lazy SMP helpers. It searches exactly like MiniMax, but is built with a stop flag shared with
+        the main search, so it abandons its search (raising SearchStopped) once the main search has reported its result,
+        and with the transposition table shared with the main search rather than a table of its own.
+    '''
+    def __init__(self, depth, stop_flag, transposition_table):
+        super().__init__(depth, transposition_table)
+        self.cancel_flag = stop_flag
+
+
+class ParallelMiniMax(MiniMax):
+    '''
+        Base class for minimax searchers that spread their work across a pool of worker processes. The pool is created on
+        the first search and kept between searches, since starting processes costs more than a shallow search.
+
+        A copy of the searcher made for a background search (see get_search_copy) shares the pool, which is started before
+        the copy is made, so close still shuts it down. Only one search may use the pool at a time.
+
+        ATTRIBUTES
+        workers: the number of processes to search with
+        pool: the worker pool, or None until the first parallel search
+
+        METHODS
+        start_pool()
+            starts the worker pool, and whatever the workers share, if it is not running and there are workers to use
+            returns None
+
+        get_search_copy()
+            starts the pool, then copies the searcher for a background search
+            returns the copy
+
+        close()
+            shuts down the worker pool
+            returns None
+    '''
+    def __init__(self, depth=2, workers=None):
+        super().__init__(depth)
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+
+    # each kind of search starts its own pool, along with the state its workers share
+    def start_pool(self):
+        pass
+
+    def get_search_copy(self):
+        self.start_pool()
+        return super().get_search_copy()
+
+    '''
+        creates the worker pool on first use
+
+        PARAMS
+        processes: the number of worker processes
+        initializer: a function run once in each worker process as it starts
+        initargs: the arguments to the initializer
+    '''
+    def _start_pool(self, processes, initializer, initargs):
+        if (self.pool is None):
+            self.pool = multiprocessing.Pool(processes, initializer, initargs)
+
+    '''
+        shuts down the worker pool, if one was started
+    '''
+    def close(self):
+        if (self.pool is not None):
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+class RootSplitMiniMax(ParallelMiniMax):
+    '''
+        Runs minimax with alpha-beta pruning across a pool of worker processes by splitting the root moves between them.
+
+        The eldest (first ordered) root move is searched in the calling process first, in the spirit of young brothers wait,
+        so that the workers start with a real alpha bound. The remaining root moves are then searched in parallel. Each worker
+        receives the position as a compact encoding rather than a pickled board, and all workers share the current alpha bound
+        through shared memory. Every process searches its root moves with one searcher kept for as long as the pool, so its
+        transposition table and history carry over from one root move (and one search) to the next.
+
+        A search with a cancel flag (such as one run by a SearchHandle) watches it while the workers search, and passes a stop
+        on to them through a shared stop flag, so a stopped search returns without waiting for the remaining root moves.
+
+        ATTRIBUTES
+        shared_alpha: the best root score found so far in the current search, shared with the workers
+        stop_flag: a shared value set to 1 to stop the workers' searches once the search is cancelled
+        root_searcher: the SharedAlphaMiniMax searching the eldest root move in the calling process
+        root_scores: a list of (move, score, is_exact) tuples for each root move of the last search, where is_exact is False
+            if the move failed low against the shared alpha (so its score is only an upper bound)
+
+        METHODS
+        get_next_move(board,player,with_stats)
+            splits the root moves of the given board across the worker pool and deposits the best move into next_move
+            returns the best move represented as a tuple, paired with the SearchStats of all workers if with_stats is set
+    '''
+    # the seconds between checks of the cancel flag while waiting for the workers
+    CANCEL_POLL_INTERVAL = 0.01
+
+    def __init__(self, depth=2, workers=None):
+        super().__init__(depth, workers)
+        self.shared_alpha = None
+        self.shared_alpha_lock = None
+        self.stop_flag = multiprocessing.RawValue('b', 0)
+        self.root_searcher = None
+        self.root_scores = []
+
+    def start_pool(self):
+        if (self.pool is None and self.workers > 1):
+            self.shared_alpha = multiprocessing.RawValue('d', -math.inf)
+            self.shared_alpha_lock = multiprocessing.Lock()
+            self.root_searcher = SharedAlphaMiniMax(self.MAX_DEPTH, self.shared_alpha)
+            self._start_pool(self.workers, _init_worker, (self.shared_alpha, self.shared_alpha_lock, self.stop_flag))
+
+    '''
+        Gets the minimax optimized next move for the given player on a given board, searching the root moves in parallel
+
+        PARAMS
+        board: the current board for the chess game
+        player: the player (black or white) asking for a move
+        with_stats: whether to return the combined SearchStats of every worker along with the move
+
+        RETURNS
+        the recommended move for the player in the form (from_square, to_square), or a pair (move, SearchStats) if with_stats
+        is set
+    '''
+    def get_next_move(self, board, player, with_stats=False):
+        # nothing to split when the root is already the last searched level
+        if (self.workers <= 1 or self.MAX_DEPTH < 1):
+            return super().get_next_move(board, player, with_stats)
+
+        root = copy.deepcopy(board)
+        possible_moves = []
+        for i in range(0, 64):
+            if (root.check_piece(i, player)):
+                possible_moves.append((i, root.get_moves(i)))
+        ordered_moves = self.order_moves(root, possible_moves, player)
+        if (not ordered_moves):
+            return super().get_next_move(board, player, with_stats)
+
+        self.stats = SearchStats()
+        self.stats.start()
+        self.stats.interior_nodes += 1 # the root
+        self.prepare_search(board, player)
+        if (self.expected_line and self.expected_line[0] in ordered_moves): # the expected move is the eldest brother
+            ordered_moves.remove(self.expected_line[0])
+            ordered_moves.insert(0, self.expected_line[0])
+
+        self.start_pool()
+        self.shared_alpha.value = -math.inf
+        self.stop_flag.value = 0
+        self.root_searcher.cancel_flag = self.cancel_flag
+        encoding = root.get_position_encoding()
+        config = (self.MAX_DEPTH, self.use_eval_functions, self.use_move_ordering)
+
+        # search the eldest brother here to establish alpha, then split the rest across the pool
+        first_from, first_to = ordered_moves[0]
+        results = [_search_root_move(self.root_searcher, self.shared_alpha_lock, encoding, player,
+                                     0, first_from, first_to, config)]
+        self.next_move = results[0][3][0] # a move to offer if the search is stopped from here on
+        tasks = [(encoding, player, order, from_index, to_index, config)
+                 for order, (from_index, to_index) in enumerate(ordered_moves[1:], 1)]
+        results.extend(self._get_worker_results(self.pool.imap_unordered(_search_root_move_task, tasks), len(tasks)))
+
+        # take the best score, preferring exact scores over fail-low bounds and earlier moves on ties (as minimax does)
+        results.sort(key=lambda result: result[0])
+        self.root_scores = []
+        best = None
+        for order, score, is_exact, pv, stats in results:
+            self.root_scores.append((pv[0], score, is_exact))
+            self.stats.merge(stats)
+            if (best is None or (score, is_exact) > (best[1], best[2])):
+                best = (order, score, is_exact, pv)
+        self.principal_variation = best[3]
+        self.next_move = best[3][0]
+        self.root_score = best[1]
+        self.finish_search(board, player)
+        self.stats.end_iteration(self.MAX_DEPTH)
+        self.stats.stop()
+        return self.get_search_result(with_stats)
+
+    '''
+        Collects the results of the root moves searched by the workers. Without a cancel flag this simply waits for them;
+        otherwise the flag is checked while waiting, and once it is set the workers are told to stop through the shared stop
+        flag, their abandoned searches are drained so the pool is idle for the next search, and the search is abandoned.
+
+        PARAMS
+        pending: the iterator over the workers' results
+        count: the number of results to collect
+
+        RETURNS
+        a list of the results, as returned by _search_root_move
+    '''
+    def _get_worker_results(self, pending, count):
+        if (self.cancel_flag is None):
+            return list(pending)
+        results = []
+        while (len(results) < count):
+            if (self.cancel_flag.value):
+                self.stop_flag.value = 1
+            try:
+                results.append(pending.next(self.CANCEL_POLL_INTERVAL))
+            except multiprocessing.TimeoutError:
+                pass
+        if (self.stop_flag.value):
+            raise SearchStopped()
+        return results
+
+
+class LazySMPMiniMax(ParallelMiniMax):
+    '''
+        Runs minimax with lazy SMP: every process searches the same root position, and they cooperate only through a single
+        transposition table kept in shared memory. The calling process runs the main search at MAX_DEPTH and reports its
+        result, while the helper processes search the same position at MAX_DEPTH or one ply deeper (alternating by helper)
+        and keep deepening until the main search finishes. Helper results reach the main search through the table, as deeper
+        entries and best moves that settle or reorder its nodes.
+
+        ATTRIBUTES
+        table_size: the number of entries in the shared transposition table
+        transposition_table: the SharedTranspositionTable used by the main search (and shared with the helpers). It is only
+            allocated when the helper pool starts, and released by close or, failing that, once the searcher is garbage
+            collected or the interpreter exits. Until then (and for good without helpers) it is an ordinary table
+        stop_flag: a shared value set to 1 to stop the helpers once the main search has finished
+        helper_depths: the deepest depth each helper completed during the last search
+
+        METHODS
+        get_next_move(board,player,with_stats)
+            searches the given board in every process and deposits the main search's move into next_move
+            returns the best move represented as a tuple, paired with the main search's SearchStats if with_stats is set
+
+        close()
+            stops the helpers and releases the shared transposition table
+            returns None
+    '''
+    def __init__(self, depth=2, workers=None, table_size=1 << 18):
+        super().__init__(depth, workers)
+        self.table_size = table_size
+        self.stop_flag = multiprocessing.RawValue('b', 0)
+        self.helper_depths = []
+        self._table_finalizer = None
+
+    '''
+        Gets the minimax optimized next move for the given player on a given board, with helper processes filling the
+        shared transposition table in the background
+
+        PARAMS
+        board: the current board for the chess game
+        player: the player (black or white) asking for a move
+        with_stats: whether to return the main search's SearchStats along with the move
+
+        RETURNS
+        the recommended move for the player in the form (from_square, to_square), or a pair (move, SearchStats) if with_stats
+        is set
+    '''
+    def get_next_move(self, board, player, with_stats=False):
+        helpers = self.workers - 1
+        if (helpers < 1):
+            return super().get_next_move(board, player, with_stats)
+
+        self.start_pool()
+        self.stop_flag.value = 0
+        encoding = board.get_position_encoding()
+        # start the table's new generation here, so the helpers (whose copies of the table keep their own age) share it
+        table = self.transposition_table
+        table.new_search(board.get_zobrist_key(player))
+        config = (self.use_eval_functions, self.use_move_ordering, table.age, table.root_key)
+        searches = [self.pool.apply_async(_lazy_smp_helper_task, ((encoding, player, self.MAX_DEPTH + helper % 2, config),))
+                    for helper in range(helpers)]
+        try:
+            super().get_next_move(board, player)
+        finally:
+            self.stop_flag.value = 1
+            self.helper_depths = [search.get() for search in searches]
+        return self.get_search_result(with_stats)
+
+    def start_pool(self):
+        if (self.pool is None and self.workers > 1):
+            # the shared memory block outlives the process unless it is unlinked, so make sure it is
+            self.transposition_table = SharedTranspositionTable(self.table_size)
+            self._table_finalizer = weakref.finalize(self, self.transposition_table.close)
+            self._start_pool(self.workers - 1, _init_lazy_smp_worker,
+                             (self.transposition_table.name, self.table_size, self.stop_flag))
+
+    def close(self):
+        super().close()
+        if (self._table_finalizer is not None):
+            self._table_finalizer()
+            self._table_finalizer = None
+            self.transposition_table = None
+
+
+class ThreadedMiniMax(ParallelMiniMax):
+    '''
+        Runs lazy SMP with threads instead of processes, for free-threaded (no-GIL) builds of Python. Each helper thread owns
+        its own copy of the position, with evaluation caches of its own (copies of a board otherwise share them), and its
+        own searcher, and all threads share one ordinary transposition table, so no
+        process is started and nothing is pickled. The table needs no lock: a torn entry fails its check word and reads as a
+        miss, exactly as it does between processes.
+
+        On a build with the GIL the threads could not run at the same time, so the search falls back to a plain serial
+        search on the calling thread.
+
+        ATTRIBUTES
+        table_size: the number of entries in the shared transposition table
+        transposition_table: the TranspositionTable shared by the main search and the helper threads
+        stop_flag: an object whose value is set to 1 to stop the helpers once the main search has finished
+        helper_depths: the deepest depth each helper completed during the last search
+
+        METHODS
+        get_next_move(board,player,with_stats)
+            searches the given board in every thread and deposits the main search's move into next_move
+            returns the best move represented as a tuple, paired with the main search's SearchStats if with_stats is set
+
+        is_free_threaded()
+            determines if the running interpreter can run threads in parallel
+            returns True if the GIL is disabled, False otherwise
+
+        close()
+            shuts down the helper threads
+            returns None
+    '''
+    def __init__(self, depth=2, workers=None, table_size=1 << 18):
+        super().__init__(depth, workers)
+        self.table_size = table_size
+        self.transposition_table = TranspositionTable(table_size)
+        self.stop_flag = SimpleNamespace(value=0)
+        self.helper_depths = []
+
+    '''
+        Gets the minimax optimized next move for the given player on a given board, with helper threads filling the
+        shared transposition table in the background
+
+        PARAMS
+        board: the current board for the chess game
+        player: the player (black or white) asking for a move
+        with_stats: whether to return the main search's SearchStats along with the move
+
+        RETURNS
+        the recommended move for the player in the form (from_square, to_square), or a pair (move, SearchStats) if with_stats
+        is set
+    '''
+    def get_next_move(self, board, player, with_stats=False):
+        helpers = self.workers - 1
+        if (helpers < 1 or not self.is_free_threaded()):
+            self.helper_depths = []
+            return super().get_next_move(board, player, with_stats)
+
+        self.start_pool()
+        self.stop_flag.value = 0
+        self.transposition_table.new_search(board.get_zobrist_key(player))
+        config = (self.use_eval_functions, self.use_move_ordering)
+        # copy the position for each helper before any search starts, so no board is shared between threads
+        searches = [self.pool.submit(_threaded_helper_task, _get_helper_board(board), player, self.MAX_DEPTH + helper % 2,
+                                     config, self.transposition_table, self.stop_flag)
+                    for helper in range(helpers)]
+        try:
+            super().get_next_move(board, player)
+        finally:
+            self.stop_flag.value = 1
+            self.helper_depths = [search.result() for search in searches]
+        return self.get_search_result(with_stats)
+
+    def start_pool(self):
+        if (self.pool is None and self.workers > 1 and self.is_free_threaded()):
+            self.pool = ThreadPoolExecutor(self.workers - 1)
+
+    def is_free_threaded(self):
+        is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+        return is_gil_enabled is not None and not is_gil_enabled()
+
+    def close(self):
+        if (self.pool is not None):
+            self.stop_flag.value = 1
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+
+'''
+    Stores the shared alpha bound in a newly started worker process, and creates the searcher the process searches its root
+    moves with
+
+    PARAMS
+    shared_alpha: a multiprocessing value holding the best root score found so far
+    shared_alpha_lock: the lock guarding updates to shared_alpha
+    stop_flag: a multiprocessing value set to 1 when the worker's searches should stop
+'''
+def _init_worker(shared_alpha, shared_alpha_lock, stop_flag):
+    global _shared_alpha, _shared_alpha_lock, _root_searcher
+    _shared_alpha = shared_alpha
+    _shared_alpha_lock = shared_alpha_lock
+    _root_searcher = SharedAlphaMiniMax(0, shared_alpha)
+    _root_searcher.cancel_flag = stop_flag
+
+
+'''
+    Attaches a newly started lazy SMP helper process to the shared transposition table
+
+    PARAMS
+    table_name: the name of the shared memory block holding the table
+    table_size: the number of entries in the table
+    stop_flag: a multiprocessing value set to 1 when helpers should stop searching
+'''
+def _init_lazy_smp_worker(table_name, table_size, stop_flag):
+    global _shared_table, _stop_flag
+    _shared_table = SharedTranspositionTable(table_size, table_name)
+    _stop_flag = stop_flag
+
+
+'''
+    Searches the root position with iterative deepening from the given depth until the main search sets the stop flag,
+    writing every result into the shared transposition table
+
+    PARAMS
+    task: a tuple (encoding, player, starting depth, config) where config is (use evaluation functions, use move ordering,
+        table age, table root key)
+
+    RETURNS
+    the deepest depth the helper finished searching, or -1 if it was stopped before finishing any
+'''
+def _lazy_smp_helper_task(task):
+    encoding, player, depth, config = task
+    board = Board()
+    board.set_position_encoding(encoding)
+    searcher = HelperMiniMax(depth, _stop_flag, _shared_table)
+    searcher.use_eval_functions, searcher.use_move_ordering, _shared_table.age, _shared_table.root_key = config
+
+    completed_depth = -1
+    try:
+        while (not _stop_flag.value):
+            searcher.MAX_DEPTH = depth
+            searcher.get_next_move(board, player)
+            completed_depth = depth
+            depth += 1
+    except SearchStopped:
+        pass
+    return completed_depth
+
+
+'''
+    Searches the root position in a helper thread with iterative deepening from the given depth until the main search sets
+    the stop flag, writing every result into the shared transposition table
+
+    PARAMS
+    board: the helper's own copy of the root position
+    player: the player (black or white) to move at the root
+    depth: the depth of the helper's first search
+    config: a tuple (use evaluation functions, use move ordering)
+    transposition_table: the table shared with the main search
+    stop_flag: an object whose value is set to 1 when the helper should stop
+
+    RETURNS
+    the deepest depth the helper finished searching, or -1 if it was stopped before finishing any
+'''
+def _threaded_helper_task(board, player, depth, config, transposition_table, stop_flag):
+    searcher = HelperMiniMax(depth, stop_flag, transposition_table)
+    searcher.use_eval_functions, searcher.use_move_ordering = config
+
+    completed_depth = -1
+    try:
+        while (not stop_flag.value):
+            searcher.MAX_DEPTH = depth
+            searcher.get_next_move(board, player)
+            completed_depth = depth
+            depth += 1
+    except SearchStopped:
+        pass
+    return completed_depth
+
+
+'''
+    Copies a board for a helper thread. Copies of a board share its evaluation caches, whose slots and hit counters the
+    helpers would then all write to at once, so the copy gets empty caches of its own.
+
+    PARAMS
+    board: the root position
+
+    RETURNS
+    a copy of the board sharing no mutable state with it
+'''
+def _get_helper_board(board):
+    helper_board = copy.deepcopy(board)
+    helper_board.eval_cache = EvalCache(board.eval_cache.size)
+    helper_board.pawn_cache = EvalCache(board.pawn_cache.size)
+    return helper_board
+
+
+# a stopped search returns None, as the main process abandons the search anyway
+def _search_root_move_task(task):
+    encoding, player, order, from_index, to_index, config = task
+    try:
+        return _search_root_move(_root_searcher, _shared_alpha_lock, encoding, player, order, from_index, to_index, config)
+    except SearchStopped:
+        return None
+
+
+'''
+    Searches a single root move to the configured depth, then publishes its score as the new shared alpha if it improves on it
+
+    PARAMS
+    searcher: the SharedAlphaMiniMax of the process, whose transposition table and history are kept between root moves
+    shared_alpha_lock: the lock guarding updates to the searcher's shared alpha
+    encoding: the root position, as returned by Board.get_position_encoding
+    player: the player (black or white) to move at the root
+    order: the position of the move in the root move ordering
+    from_index: the index the moving piece starts on
+    to_index: the index the moving piece lands on
+    config: a tuple (max depth, use evaluation functions, use move ordering)
+
+    RETURNS
+    a tuple (order, score, is_exact, principal variation starting with the root move, SearchStats of the search)
+'''
+def _search_root_move(searcher, shared_alpha_lock, encoding, player, order, from_index, to_index, config):
+    depth, use_eval_functions, use_move_ordering = config
+    searcher.MAX_DEPTH = depth
+    searcher.use_eval_functions = use_eval_functions
+    searcher.use_move_ordering = use_move_ordering
+    searcher.pv_table = [[] for _ in range(depth + 1)]
+    searcher.stats = SearchStats()
+
+    root = Board()
+    root.set_position_encoding(encoding)
+    searcher.prepare_search(root, player) # ages the searcher's table and history when the root changes
+    shared_alpha = searcher.shared_alpha
+    board = copy.deepcopy(root)
+    move = (utils.index_to_square(from_index), utils.index_to_square(to_index))
+    is_terminal_board = board.move_piece(move[0], move[1])
+    if (is_terminal_board):
+        score = searcher.get_max(root, player, is_terminal_board)
+        pv = [move]
+    else:
+        opponent = constants.BLACK if player == constants.WHITE else constants.WHITE
+        score = searcher.minimax(False, board, opponent, 1, -math.inf, math.inf)
+        pv = [move] + searcher.pv_table[1]
+
+    # the search never used an alpha above the current shared alpha, so a score above it is exact,
+    # while a score at or below it may only be an upper bound
+    with shared_alpha_lock:
+        is_exact = score > shared_alpha.value
+        if (is_exact):
+            shared_alpha.value = score
+    return order, score, is_exact, pv, searcher.stats
@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+import threading
+import copy
+
+
+class SearchStopped(Exception):
+    '''
+        Raised inside a search to unwind it once it has been asked to stop
+    '''
+    pass
+
+
+class SearchHandle:
+    '''
+        A handle on a search running in a background thread, returned by MiniMax.start_search. The search deepens one ply at
+        a time up to the searcher's MAX_DEPTH, so a move is available early and improves as the search goes on, and the
+        caller (such as the pygame event loop) keeps running while it does.
+
+        The search works on its own copy of the board and its own copy of the searcher, so the caller may keep using both.
+        Progress callbacks are called from the search thread, once per completed depth.
+
+        ATTRIBUTES
+        player: the player (black or white) the search is finding a move for
+        best_move: the best move found by the deepest completed depth, or None before the first depth completes
+        completed_depth: the deepest depth completed so far, or -1
+        principal_variation: the line both players are expected to play, found by the deepest completed depth
+        stats: the SearchStats of the deepest completed depth, or None
+        error: the exception the search failed with, or None
+        ponder_move: for a ponder search, the opponent move the searched position assumes, otherwise None
+
+        METHODS
+        stop()
+            stops the search and waits for the thread to finish
+            returns the best move found so far
+
+        result(timeout)
+            waits for the search to finish on its own
+            returns the best move, or None if the timeout expired first
+
+        is_done()
+            returns True once the search thread has finished, False otherwise
+
+        ponder_hit(move)
+            tells a ponder search which move the opponent actually played
+            returns this handle if the search assumed that move, otherwise stops the search and returns None
+    '''
+    def __init__(self, minimax, board, player, on_progress=None, ponder_move=None):
+        self.player = player
+        self.best_move = None
+        self.completed_depth = -1
+        self.principal_variation = []
+        self.stats = None
+        self.error = None
+        self.ponder_move = ponder_move
+        self.on_progress = on_progress
+        self.cancel_flag = SimpleNamespace(value=0)
+
+        # copy the board now, on the caller's thread, so the caller is free to change its own board afterwards
+        self.board = copy.deepcopy(board)
+        self.minimax = minimax
+        self.searcher = minimax.get_search_copy()
+        self.searcher.cancel_flag = self.cancel_flag
+        self.max_depth = minimax.MAX_DEPTH
+
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.cancel_flag.value = 1
+        self.thread.join()
+        return self.best_move
+
+    '''
+        Waits for the search to finish on its own, re-raising any error it failed with
+
+        PARAMS
+        timeout: the number of seconds to wait, or None to wait for as long as it takes
+
+        RETURNS
+        the best move found, or None if the search did not finish in time
+    '''
+    def result(self, timeout=None):
+        if (not self.done.wait(timeout)):
+            return None
+        if (self.error is not None):
+            raise self.error
+        return self.best_move
+
+    def is_done(self):
+        return self.done.is_set()
+
+    '''
+        Resolves a ponder search once the opponent has moved. If the opponent played the expected move, the search is
+        already on the right position and carries on; otherwise its work is thrown away.
+
+        PARAMS
+        move: the (from_square, to_square) pair the opponent played
+
+        RETURNS
+        this handle, to be used as the search for the next move, if the opponent played the ponder move, None otherwise
+    '''
+    def ponder_hit(self, move):
+        if (self.ponder_move is not None and tuple(move) == tuple(self.ponder_move)):
+            return self
+        self.stop()
+        return None
+
+    '''
+        Runs the search on the search thread, deepening one ply at a time and reporting each completed depth
+    '''
+    def _run(self):
+        searcher = self.searcher
+        try:
+            for depth in range(self.max_depth + 1):
+                searcher.MAX_DEPTH = depth
+                move, stats = searcher.get_next_move(self.board, self.player, with_stats=True)
+                self.best_move, self.completed_depth, self.stats = move, depth, stats
+                self.principal_variation = searcher.principal_variation
+                if (self.on_progress is not None):
+                    self.on_progress(depth, move, stats)
+            # hand what the finished search learned back to the searcher it was started from, for its next search
+            self.minimax.copy_search_state(searcher)
+        except SearchStopped:
+            # the root's first move is always searched in full, so a partly searched depth still has a move to offer
+            if (self.best_move is None and searcher.next_move):
+                self.best_move = searcher.next_move
+        except Exception as error:
+            self.error = error
+        finally:
+            self.done.set()
@@ -0,0 +1,204 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+
+
+class SearchProfiler:
+    '''
+        Profiles a search, collected while a search runs with MiniMax.profile_search set. It works in one of two modes:
+            'cprofile' runs the search under cProfile, which counts every call exactly but slows the search down. Since
+            cProfile only records callers and callees, the call stacks are rebuilt from that graph, splitting the time of
+            each function among its callers in proportion to the time spent under each, with recursive calls folded into
+            the outermost one.
+            'sampling' records the stack of the searching thread from another thread every interval seconds, which
+            barely slows the search down and gives the real stacks, but only estimates the time of each function and has
+            no call counts.
+        Either way, the time is summed by engine function (such as move_generator.generate_moves or board.get_piece), and
+        the stacks can be written in the collapsed format read by flame graph tools (one 'outer;inner;leaf value' line
+        per stack).
+
+        ATTRIBUTES
+        mode: 'cprofile' or 'sampling'
+        interval: the seconds between samples in sampling mode
+        functions: a dictionary mapping each function name to its [calls (None when sampling), own seconds, total
+            seconds] record, filled in once the search is done
+        stacks: a dictionary mapping each collapsed stack (function names from the outermost call, separated by ';') to
+            its value: microseconds of own time in cprofile mode, samples in sampling mode
+        elapsed: the seconds the profiled search took
+
+        METHODS
+        run(function, *args)
+            calls the function with the given arguments under the profiler
+            returns what the function returns
+
+        get_summary(limit)
+            returns a table of the functions with the most own time as a string
+
+        get_collapsed_stacks()
+            returns the stacks in the collapsed format as a string
+
+        write_collapsed_stacks(path)
+            writes the stacks in the collapsed format to a file
+            returns None
+    '''
+
+    MODES = ('cprofile', 'sampling')
+
+    def __init__(self, mode='cprofile', interval=0.001):
+        if (mode not in self.MODES):
+            raise ValueError("unknown profiling mode %s" % mode)
+        self.mode = mode
+        self.interval = interval
+        self.functions = {}
+        self.stacks = {}
+        self.elapsed = 0.0
+
+    '''
+        Calls a function under the profiler, collecting its functions and stacks once it returns (or raises)
+
+        PARAMS
+        function: the function to profile, such as MiniMax.minimax
+        args: its arguments
+
+        RETURNS
+        what the function returns
+    '''
+    def run(self, function, *args):
+        start = time.perf_counter()
+        if (self.mode == 'cprofile'):
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(function, *args)
+            finally:
+                self.elapsed = time.perf_counter() - start
+                profile.create_stats()
+                code = function.__code__
+                self._read_profile(profile.stats, (code.co_filename, code.co_firstlineno, code.co_name))
+        samples = []
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(threading.get_ident(), sys._getframe(), samples, stop),
+                                   daemon=True)
+        sampler.start()
+        try:
+            return function(*args)
+        finally:
+            stop.set()
+            sampler.join()
+            self.elapsed = time.perf_counter() - start
+            self._read_samples(samples)
+
+    def get_summary(self, limit=25):
+        lines = ['%-45s %9s %9s %9s %6s' % ('function', 'calls', 'own s', 'total s', 'own%')]
+        total = sum(own for _, own, _ in self.functions.values())
+        ranked = sorted(self.functions.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (calls, own, cumulative) in ranked[:limit]:
+            lines.append('%-45s %9s %9.3f %9.3f %6.1f' % (name[:45], '-' if calls is None else calls, own, cumulative,
+                                                           100 * own / total if total else 0.0))
+        lines.append('%s profile of a %.3f second search' % (self.mode, self.elapsed))
+        return '\n'.join(lines)
+
+    def get_collapsed_stacks(self):
+        return ''.join('%s %d\n' % (stack, value) for stack, value in sorted(self.stacks.items()) if value > 0)
+
+    def write_collapsed_stacks(self, path):
+        with open(path, 'w') as output:
+            output.write(self.get_collapsed_stacks())
+
+    '''
+        Records the stack of the profiled thread every interval seconds until stopped, leaving out the frames at and above
+        the one that started the search. A stack read once the search has returned (while run waits for this thread) is
+        dropped, so the wait isn't counted as search time
+
+        PARAMS
+        thread: the identifier of the profiled thread
+        root: the frame of run, below which the search's frames are recorded
+        samples: the list the stacks (as tuples of code objects, outermost first) are added to
+        stop: the Event that stops the sampling
+    '''
+    def _sample(self, thread, root, samples, stop):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread)
+            stack = []
+            while frame is not None and frame is not root:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if (frame is root and stack and not stop.is_set()):
+                samples.append(tuple(reversed(stack)))
+
+    def _read_samples(self, samples):
+        seconds = self.elapsed / len(samples) if samples else 0.0
+        for codes in samples:
+            names = [_get_function_name(code.co_filename, code.co_name) for code in codes]
+            stack = ';'.join(names)
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            for name in set(names):
+                entry = self.functions.setdefault(name, [None, 0.0, 0.0])
+                entry[2] += seconds
+            self.functions[names[-1]][1] += seconds
+
+    '''
+        Sums cProfile's records by function name and rebuilds the stacks from its call graph
+
+        PARAMS
+        stats: the stats dictionary of a cProfile.Profile, mapping each (file, line, function) key to its (primitive calls,
+            calls, own seconds, cumulative seconds, callers) record
+        root: the key of the profiled function, which the stacks start from
+    '''
+    def _read_profile(self, stats, root):
+        stats = {key: record for key, record in stats.items() if not _is_profiler_function(key)}
+        children = {}
+        for key, (_, calls, own, cumulative, callers) in stats.items():
+            entry = self.functions.setdefault(_get_function_name(key[0], key[2]), [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += own
+            entry[2] += cumulative
+            for caller, (_, _, _, edge_cumulative) in callers.items():
+                if (caller in stats and caller != key):
+                    children.setdefault(caller, []).append((key, edge_cumulative))
+        if (root in stats):
+            self._add_stacks(stats, children, root, stats[root][3], (), ())
+
+    '''
+        Adds the stacks below a function, reached along a path of callers, to the collapsed stacks
+
+        PARAMS
+        stats: the records of cProfile, as in _read_profile
+        children: a dictionary mapping each function key to its (callee key, cumulative seconds under the call) pairs
+        key: the function key
+        seconds: the share of the function's cumulative time spent along this path
+        path: the function keys of the callers, outermost first
+        names: the function names of the callers
+    '''
+    def _add_stacks(self, stats, children, key, seconds, path, names):
+        path += (key,)
+        names += (_get_function_name(key[0], key[2]),)
+        cumulative = stats[key][3]
+        scale = seconds / cumulative if cumulative > 0 else 0.0
+        own = seconds
+        for child, edge_cumulative in children.get(key, ()):
+            child_seconds = min(edge_cumulative * scale, own)
+            if (child in path or child_seconds < 1e-6): # recursion is folded into the outermost call, tiny calls into their caller
+                continue
+            own -= child_seconds
+            self._add_stacks(stats, children, child, child_seconds, path, names)
+        stack = ';'.join(names)
+        self.stacks[stack] = self.stacks.get(stack, 0) + round(own * 1e6)
+
+
+'''
+    Gets the name a function is reported under: the name of its module followed by its own name, such as
+    board.get_piece, or cProfile's description of a built in function
+
+    PARAMS
+    filename: the file the function is defined in ('~' for built in functions)
+    name: the function's name
+'''
+def _get_function_name(filename, name):
+    if (filename == '~'):
+        return name
+    return os.path.splitext(os.path.basename(filename))[0] + '.' + name
+
+def _is_profiler_function(key):
+    return key[0] == '~' and '_lsprof.Profiler' in key[2]
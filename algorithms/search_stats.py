@@ -0,0 +1,136 @@
+import time
+
+
+class SearchStats:
+    '''
+        Counters describing a single search, filled in by MiniMax as it runs. Every counter is a plain integer incremented
+        in place, so the stats can be left on without slowing the search down noticeably.
+
+        A search is made of one or more iterations (one per depth searched). The effective branching factor of an iteration
+        is the uniform branching factor that would give a tree with as many nodes as the iteration searched, that is
+        nodes ** (1 / plies), where plies is the iteration depth + 1.
+
+        ATTRIBUTES
+        interior_nodes: the number of nodes whose moves were expanded (including nodes settled by the transposition table)
+        leaf_nodes: the number of nodes scored without expanding them (max depth or terminal boards)
+        eval_calls: the number of times a board was scored with the evaluation functions
+        beta_cutoffs: the number of nodes whose remaining moves were pruned by alpha-beta
+        first_move_cutoffs: the number of beta cutoffs caused by the first move searched at a node
+        tt_probes: the number of transposition table lookups
+        tt_hits: the number of lookups that found an entry for the position
+        tt_cutoffs: the number of nodes settled by a transposition table entry without being searched
+        iterations: a list of (depth, nodes, elapsed seconds, effective branching factor) tuples, one per iteration
+        elapsed: the total search time in seconds
+
+        METHODS
+        start()
+            starts timing the search
+            returns None
+
+        end_iteration(depth)
+            records the nodes and time spent since the previous iteration as an iteration of the given depth
+            returns None
+
+        stop()
+            stops timing the search
+            returns None
+
+        get_nodes()
+            returns the total number of nodes visited
+
+        get_nps()
+            returns the number of nodes visited per second
+
+        get_first_move_cutoff_ratio()
+            returns the fraction of beta cutoffs caused by the first move searched, or 0 without any cutoff
+
+        merge(other)
+            adds the counters of another search (such as one run by a worker process) to these counters
+            returns None
+
+        as_dict()
+            returns the counters and derived rates as a dictionary
+    '''
+    def __init__(self):
+        self.interior_nodes = 0
+        self.leaf_nodes = 0
+        self.eval_calls = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.iterations = []
+        self.elapsed = 0.0
+        self._start_time = None
+        self._iteration_start = (0, 0.0) # nodes and elapsed time when the current iteration started
+
+    def start(self):
+        self._start_time = time.perf_counter()
+
+    '''
+        Records the work done since the previous iteration as an iteration of the given depth
+
+        PARAMS
+        depth: the MAX_DEPTH the iteration was searched with
+    '''
+    def end_iteration(self, depth):
+        nodes, elapsed = self.get_nodes(), self._get_elapsed()
+        start_nodes, start_elapsed = self._iteration_start
+        iteration_nodes = nodes - start_nodes
+        ebf = iteration_nodes ** (1 / (depth + 1)) if iteration_nodes else 0.0
+        self.iterations.append((depth, iteration_nodes, elapsed - start_elapsed, ebf))
+        self._iteration_start = (nodes, elapsed)
+
+    def stop(self):
+        self.elapsed = self._get_elapsed()
+        self._start_time = None
+
+    def get_nodes(self):
+        return self.interior_nodes + self.leaf_nodes
+
+    def get_nps(self):
+        return self.get_nodes() / self.elapsed if self.elapsed > 0 else 0.0
+
+    def get_first_move_cutoff_ratio(self):
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    '''
+        Adds the counters of another search to these counters. Iterations and elapsed time are left alone, since searches
+        merged into this one ran during this one's iterations.
+
+        PARAMS
+        other: the SearchStats of the other search
+    '''
+    def merge(self, other):
+        self.interior_nodes += other.interior_nodes
+        self.leaf_nodes += other.leaf_nodes
+        self.eval_calls += other.eval_calls
+        self.beta_cutoffs += other.beta_cutoffs
+        self.first_move_cutoffs += other.first_move_cutoffs
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+        self.tt_cutoffs += other.tt_cutoffs
+
+    def as_dict(self):
+        return {
+            'nodes': self.get_nodes(),
+            'interior_nodes': self.interior_nodes,
+            'leaf_nodes': self.leaf_nodes,
+            'eval_calls': self.eval_calls,
+            'beta_cutoffs': self.beta_cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_ratio': self.get_first_move_cutoff_ratio(),
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_cutoffs': self.tt_cutoffs,
+            'iterations': [{'depth': depth, 'nodes': nodes, 'elapsed': elapsed, 'ebf': ebf}
+                           for depth, nodes, elapsed, ebf in self.iterations],
+            'nps': self.get_nps(),
+            'elapsed': self.elapsed
+        }
+
+    def _get_elapsed(self):
+        if (self._start_time is None):
+            return self.elapsed
+        return time.perf_counter() - self._start_time
@@ -0,0 +1,437 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants
+from algorithms.minimax import MiniMax
+import argparse
+import glob
+import multiprocessing
+import os
+import random
+import struct
+
+# the order pieces are numbered in a record, matching the piece boards of Board.get_position_encoding
+RECORD_PIECES = (constants.WHITE_PAWN, constants.WHITE_ROOK, constants.WHITE_KNIGHT, constants.WHITE_BISHOP,
+                 constants.WHITE_QUEEN, constants.WHITE_KING, constants.BLACK_PAWN, constants.BLACK_ROOK,
+                 constants.BLACK_KNIGHT, constants.BLACK_BISHOP, constants.BLACK_QUEEN, constants.BLACK_KING)
+
+# a shard starts with a header (magic, version, record size, record count, game count), followed by its records and then
+# the number of every game played into it
+SHARD_MAGIC = b'CSPS'
+SHARD_VERSION = 1
+SHARD_HEADER = struct.Struct('<4sHHII')
+# a record holds the occupied squares, a 4 bit piece number for each occupied square (in square order), the search score
+# and game result from white's perspective, the color to move, the ply and the game number: 36 bytes per position
+RECORD = struct.Struct('<Q16sfbBHI')
+GAME_NUMBER = struct.Struct('<I')
+
+'''
+    Encodes a sampled position as a shard record
+
+    PARAMS
+    piece_boards: the twelve piece boards of the position, in the order of RECORD_PIECES
+    color: the color to move
+    score: the search score of the position, from white's perspective
+    result: the result of the game, 1 if white won, -1 if black won and 0 for a draw
+    ply: the number of plies played in the game before the position
+    game: the number of the game
+
+    RETURNS
+    the record, as bytes
+'''
+def encode_record(piece_boards, color, score, result, ply, game):
+    occupancy = 0
+    for piece_board in piece_boards:
+        occupancy |= piece_board
+    pieces = []
+    remaining = occupancy
+    while remaining:
+        mask = remaining & -remaining
+        remaining ^= mask
+        pieces.append(next(number for number, piece_board in enumerate(piece_boards) if piece_board & mask))
+    if (len(pieces) % 2):
+        pieces.append(0)
+    packed = bytes(pieces[i] | pieces[i + 1] << 4 for i in range(0, len(pieces), 2))
+    return RECORD.pack(occupancy, packed, score, result, color, ply, game)
+
+'''
+    Decodes a shard record
+
+    PARAMS
+    record: the bytes of the record
+
+    RETURNS
+    a tuple (piece boards, color, score, result, ply, game), with arguments as in encode_record
+'''
+def decode_record(record):
+    occupancy, packed, score, result, color, ply, game = RECORD.unpack(record)
+    piece_boards = [0] * len(RECORD_PIECES)
+    number = 0
+    while occupancy:
+        mask = occupancy & -occupancy
+        occupancy ^= mask
+        nibble = packed[number >> 1] >> 4 * (number & 1) & 0xf
+        piece_boards[nibble] |= mask
+        number += 1
+    return piece_boards, color, score, result, ply, game
+
+'''
+    Reads the header of a shard
+
+    PARAMS
+    shard: a shard file opened for binary reading, at its start
+
+    RETURNS
+    a tuple (record count, game count)
+'''
+def _read_header(shard):
+    magic, version, record_size, records, games = SHARD_HEADER.unpack(shard.read(SHARD_HEADER.size))
+    if (magic != SHARD_MAGIC or version != SHARD_VERSION or record_size != RECORD.size):
+        raise ValueError("%s is not a self-play shard of version %d" % (shard.name, SHARD_VERSION))
+    return records, games
+
+'''
+    Reads the positions of a shard one at a time, so a shard of any size is read in constant memory
+
+    PARAMS
+    path: the path of the shard
+
+    RETURNS
+    a generator of decoded records (see decode_record)
+'''
+def read_shard(path):
+    with open(path, 'rb') as shard:
+        records, _ = _read_header(shard)
+        for _ in range(records):
+            yield decode_record(shard.read(RECORD.size))
+
+'''
+    Gets the numbers of the games played into a shard
+
+    PARAMS
+    path: the path of the shard
+
+    RETURNS
+    a list of game numbers
+'''
+def read_shard_games(path):
+    with open(path, 'rb') as shard:
+        records, games = _read_header(shard)
+        shard.seek(SHARD_HEADER.size + records * RECORD.size)
+        return [GAME_NUMBER.unpack(shard.read(GAME_NUMBER.size))[0] for _ in range(games)]
+
+
+class ShardWriter:
+    '''
+        Writes self-play positions to numbered shards in a directory, one game at a time. A shard is written to a .part file
+        and renamed to .bin once it holds shard_size positions (or the writer is closed), so every .bin shard is complete and
+        a run stopped part way loses at most the games of its last shard. Only the game numbers of the open shard are kept in
+        memory.
+
+        ATTRIBUTES
+        directory: the directory the shards are written to
+        shard_size: the number of positions after which a shard is completed
+        shard_number: the number of the open (or next) shard
+        records: the number of positions in the open shard
+        games: the numbers of the games in the open shard
+        file: the open shard's .part file, or None until a game is written to it
+
+        METHODS
+        get_path(number, suffix)
+            returns the path of a shard
+
+        write_game(records, game)
+            appends the encoded positions of a finished game to the open shard
+            returns None
+
+        close()
+            completes the open shard, if it holds any game
+            returns None
+    '''
+    def __init__(self, directory, shard_size=1 << 16, shard_number=0):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.shard_number = shard_number
+        self.records = 0
+        self.games = []
+        self.file = None
+
+    '''
+        Gets the path of a shard
+
+        PARAMS
+        number: the number of the shard
+        suffix: '.bin' for a complete shard or '.part' for one being written
+
+        RETURNS
+        the path in the writer's directory
+    '''
+    def get_path(self, number, suffix):
+        return os.path.join(self.directory, 'shard_%05d%s' % (number, suffix))
+
+    '''
+        Appends the positions of a finished game to the open shard, completing the shard once it is full
+
+        PARAMS
+        records: the encoded records of the game's positions (see encode_record)
+        game: the number of the game
+    '''
+    def write_game(self, records, game):
+        if (self.file is None):
+            self.file = open(self.get_path(self.shard_number, '.part'), 'wb')
+            self.file.write(SHARD_HEADER.pack(SHARD_MAGIC, SHARD_VERSION, RECORD.size, 0, 0))
+        for record in records:
+            self.file.write(record)
+        self.records += len(records)
+        self.games.append(game)
+        if (self.records >= self.shard_size):
+            self.close()
+
+    def close(self):
+        if (self.file is None):
+            return
+        for game in self.games:
+            self.file.write(GAME_NUMBER.pack(game))
+        self.file.seek(0)
+        self.file.write(SHARD_HEADER.pack(SHARD_MAGIC, SHARD_VERSION, RECORD.size, self.records, len(self.games)))
+        self.file.close()
+        os.replace(self.get_path(self.shard_number, '.part'), self.get_path(self.shard_number, '.bin'))
+        self.file = None
+        self.shard_number += 1
+        self.records = 0
+        self.games = []
+
+
+class SelfPlayGenerator:
+    '''
+        Generates training positions by playing MiniMax against itself across a pool of worker processes. Each game starts
+        with a few random moves, so games differ, and is then played out by two searchers with the same settings. Positions
+        are sampled after the opening, each recorded with the score of the search made from it and the result of the game,
+        and written to binary shards (see ShardWriter) as the games finish.
+
+        Game numbers seed the random openings and sampling, so game n is the same in every run. Runs are resumable: the
+        games already in the directory's complete shards are skipped, so running again after an interruption only plays
+        the missing games.
+
+        ATTRIBUTES
+        directory: the directory the shards are written to
+        games: the number of games the run should hold
+        depth: the MiniMax depth of both players
+        options: MiniMax attributes set on both players (such as use_move_ordering), by name
+        workers: the number of worker processes
+        seed: the seed the game seeds are derived from
+        opening_plies: the (fewest, most) random plies played at the start of each game
+        sample_rate: the probability a position after the opening is recorded
+        max_plies: the number of plies after which a game is drawn
+        shard_size: the number of positions per shard
+
+        METHODS
+        get_finished_games()
+            returns the set of numbers of the games already in the directory's complete shards
+
+        run(verbose)
+            plays every game not yet played, writing the sampled positions to shards
+            returns the number of games played
+    '''
+    def __init__(self, directory, games, depth=1, options=None, workers=None, seed=0, opening_plies=(4, 8),
+                 sample_rate=0.5, max_plies=200, shard_size=1 << 16):
+        self.directory = directory
+        self.games = games
+        self.depth = depth
+        self.options = options or {}
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.opening_plies = opening_plies
+        self.sample_rate = sample_rate
+        self.max_plies = max_plies
+        self.shard_size = shard_size
+
+    def get_finished_games(self):
+        finished = set()
+        for path in glob.glob(os.path.join(self.directory, 'shard_*.bin')):
+            finished.update(read_shard_games(path))
+        return finished
+
+    '''
+        Plays every game not yet in the directory's shards, in parallel, writing each game's positions as soon as it finishes.
+        Partly written shards left by an interrupted run are discarded, and their games played again.
+
+        PARAMS
+        verbose: whether to print a line as each game finishes
+
+        RETURNS
+        the number of games played
+    '''
+    def run(self, verbose=False):
+        os.makedirs(self.directory, exist_ok=True)
+        for path in glob.glob(os.path.join(self.directory, 'shard_*.part')):
+            os.remove(path)
+        finished = self.get_finished_games()
+        shard_numbers = [int(os.path.basename(path)[len('shard_'):-len('.bin')]) for path in
+                         glob.glob(os.path.join(self.directory, 'shard_*.bin'))]
+        writer = ShardWriter(self.directory, self.shard_size, max(shard_numbers, default=-1) + 1)
+        config = (self.depth, self.options, self.opening_plies, self.sample_rate, self.max_plies)
+        tasks = [(game, self.seed, config) for game in range(self.games) if game not in finished]
+        played = 0
+        pool = multiprocessing.Pool(self.workers) if self.workers > 1 else None
+        try:
+            results = pool.imap_unordered(_self_play_task, tasks) if pool is not None else map(_self_play_task, tasks)
+            for game, result, records in results:
+                writer.write_game(records, game)
+                played += 1
+                if (verbose):
+                    print('game %d: result %d, %d positions (%d of %d games)' % (game, result, len(records), played,
+                                                                                 len(tasks)))
+        finally:
+            if (pool is not None):
+                pool.terminate()
+                pool.join()
+            writer.close()
+        return played
+
+
+'''
+    Creates a MiniMax player
+
+    PARAMS
+    depth: the depth of its search
+    options: MiniMax attributes to set, by name
+
+    RETURNS
+    the MiniMax
+'''
+def create_player(depth, options):
+    player = MiniMax(depth)
+    for name, value in options.items():
+        if (not hasattr(player, name)):
+            raise ValueError("MiniMax has no option %s" % name)
+        setattr(player, name, value)
+    return player
+
+'''
+    Gets the moves of a color as (from index, to index) pairs
+
+    PARAMS
+    board: the board
+    color: the color to move
+
+    RETURNS
+    a list of moves
+'''
+def get_legal_moves(board, color):
+    moves = []
+    for from_index in range(64):
+        if (board.check_piece(from_index, color)):
+            targets = board.get_moves(from_index) & constants.FULL_BOARD
+            while targets:
+                mask = targets & -targets
+                targets ^= mask
+                moves.append((from_index, mask.bit_length() - 1))
+    return moves
+
+'''
+    Plays a game between two players from a position. The game ends when a move mates (Board.move_piece returns 1), a
+    player has no move, a king leaves the board, or max_plies plies have been played, which is a draw.
+
+    PARAMS
+    board: the starting board, which is played on
+    players: the (white, black) MiniMax players
+    color: the color to move first
+    max_plies: the number of plies after which the game is drawn
+    on_position: a function called as on_position(board, color, ply, score) before each move, with the score of the
+        mover's search from the mover's perspective, or None
+
+    RETURNS
+    a tuple (result, plies), where result is 1 if white won, -1 if black won and 0 for a draw
+'''
+def play_game(board, players, color, max_plies, on_position=None):
+    for ply in range(max_plies):
+        if (not board.white_king & constants.FULL_BOARD or not board.black_king & constants.FULL_BOARD):
+            return 0, ply
+        player = players[color]
+        move = player.get_next_move(board, color)
+        if (not move):
+            return 0, ply
+        if (on_position is not None):
+            on_position(board, color, ply, player.root_score)
+        ending = board.move_piece(move[0], move[1])
+        if (ending == 1):
+            return (1 if color == constants.WHITE else -1), ply + 1
+        if (ending):
+            return 0, ply + 1
+        color = 1 - color
+    return 0, max_plies
+
+'''
+    Plays random moves from a board
+
+    PARAMS
+    board: the board, which is played on
+    rng: the random.Random choosing the moves
+    plies: the number of moves to play
+
+    RETURNS
+    the color to move after the opening, or None if a random move ended the game
+'''
+def play_random_opening(board, rng, plies):
+    color = constants.WHITE
+    for _ in range(plies):
+        moves = get_legal_moves(board, color)
+        if (not moves):
+            return None
+        from_index, to_index = rng.choice(moves)
+        if (board.move_piece(utils.index_to_square(from_index), utils.index_to_square(to_index))):
+            return None
+        color = 1 - color
+    return color
+
+'''
+    Plays one self-play game in a worker process
+
+    PARAMS
+    task: a tuple (game number, seed, config) where config is (depth, options, opening plies, sample rate, max plies)
+
+    RETURNS
+    a tuple (game number, result, records) with the encoded records of the sampled positions
+'''
+def _self_play_task(task):
+    game, seed, (depth, options, opening_plies, sample_rate, max_plies) = task
+    rng = random.Random(seed * 1000003 + game)
+    board = Board()
+    opening = rng.randint(*opening_plies)
+    color = play_random_opening(board, rng, opening)
+    if (color is None):
+        return game, 0, []
+    samples = []
+    def on_position(board, color, ply, score):
+        if (rng.random() < sample_rate and score is not None and abs(score) != float('inf')):
+            piece_boards = board.get_position_encoding()[:12]
+            if (all(piece_board <= constants.FULL_BOARD for piece_board in piece_boards)):
+                samples.append((piece_boards, color, score if color == constants.WHITE else -score, opening + ply))
+    result, _ = play_game(board, (create_player(depth, options), create_player(depth, options)), color,
+                          max_plies, on_position)
+    return game, result, [encode_record(piece_boards, color, score, result, ply, game)
+                          for piece_boards, color, score, ply in samples]
+
+
+'''
+    Generates self-play shards from the command line
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Generate training positions by self-play')
+    parser.add_argument('directory', help='the directory the shards are written to (and resumed from)')
+    parser.add_argument('--games', type=int, default=100, help='the number of games the directory should hold')
+    parser.add_argument('--depth', type=int, default=1, help='the MiniMax depth of both players')
+    parser.add_argument('--workers', type=int, help='the number of worker processes (one per CPU by default)')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the random openings and sampling')
+    parser.add_argument('--sample-rate', type=float, default=0.5, help='the probability a position is recorded')
+    parser.add_argument('--max-plies', type=int, default=200, help='the number of plies after which a game is drawn')
+    parser.add_argument('--shard-size', type=int, default=1 << 16, help='the number of positions per shard')
+    arguments = parser.parse_args()
+
+    generator = SelfPlayGenerator(arguments.directory, arguments.games, arguments.depth, workers=arguments.workers,
+                                  seed=arguments.seed, sample_rate=arguments.sample_rate, max_plies=arguments.max_plies,
+                                  shard_size=arguments.shard_size)
+    print('%d games played' % generator.run(verbose=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,427 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.batch_evaluations import BatchEvaluations
+from algorithms.eval_weights import load_eval_weights
+from algorithms.self_play import read_shard
+import argparse
+import copy
+import json
+import math
+import multiprocessing
+import os
+import time
+try:
+    import numpy as np
+except ImportError: # numpy is optional; without it positions are scored one at a time, far slower
+    np = None
+
+
+class TexelTuner:
+    '''
+        Tunes evaluation weights on a corpus of positions labeled with the result of the game they were played in, by
+        minimizing the error between each result and the score of its position mapped to an expected result, as in Texel's
+        tuning method. Positions are scored statically with the batched evaluation (BatchEvaluations) and no search or
+        quiescence, so the corpus should hold quiet positions. The loss of a weight vector is computed in parallel across a
+        pool of worker processes, each scoring its share of the corpus with numpy in one batch.
+
+        Only the weights the batched evaluation computes exactly as Evaluations.get_score does (material, rank points and
+        king security, and their taper) are tuned, and positions are scored without its center control term, which only
+        approximates the engine's focal points. The score fitted is thus the part of the engine's evaluation made of these
+        terms; the other weights, focal points included, are kept as they are.
+
+        Positions are read from FEN or EPD lines holding the game result, either as 1-0, 0-1 or 1/2-1/2 (for instance in a
+        c9 opcode) or as a number in brackets, [1.0], [0.5] or [0.0], or from self-play shards (see self_play). Results are
+        from white's perspective.
+
+        ATTRIBUTES
+        weights: the evaluation weights being tuned, updated by tune
+        parameters: the weights tuned, each a path of keys into the weights
+        workers: the number of processes the loss is computed with
+        scale: the constant mapping a score to an expected result, 1 / (1 + 10^(-scale * score))
+        rows: the encoded positions read so far
+        results: the result of each position, 1 for a white win, 0.5 for a draw and 0 for a black win
+        positions_scored: the number of positions scored so far
+        scoring_time: the seconds spent computing losses so far
+        pool: the worker pool, or None until a loss is computed over more than one shard
+
+        METHODS
+        read_corpus(path)
+            reads labeled positions from a file
+            returns the number of positions read
+
+        read_shard(path)
+            reads the positions of a self-play shard
+            returns the number of positions read
+
+        add_position(piece_boards, result)
+            adds a labeled position from its piece boards
+            returns None
+
+        get_vector()
+            returns the current values of the tuned weights as a list
+
+        get_weights(vector)
+            returns a copy of the weights with the tuned weights set from a vector
+
+        get_loss(vector)
+            returns the mean squared error of the corpus under a vector of tuned weights
+
+        fit_scale()
+            finds the scale minimizing the loss of the current weights
+            returns the scale
+
+        tune(passes, step, min_step)
+            runs a local search over the tuned weights
+            returns the tuned weights
+
+        get_throughput()
+            returns the number of positions scored per second while computing losses
+
+        close()
+            shuts down the worker pool
+            returns None
+    '''
+
+    # the weights the batched evaluation computes as the engine does, tuned by default. The pawn's midgame value is left
+    # out, as the unit the other values are measured in
+    PARAMETERS = tuple([('piece_values', piece) for piece in ('queen', 'rook', 'bishop', 'knight')] +
+                       [('position_states', state, piece) for state in range(4)
+                        for piece in ('queen', 'rook', 'bishop', 'knight')] +
+                       [('taper', 'pawn', 1)] +
+                       [('taper', term, phase) for term in ('position', 'king security') for phase in (0, 1)] +
+                       [('rank_points', rank) for rank in range(8)] +
+                       [('king_security', term) for term in ('immediate_pawn', 'wide_pawn', 'sinu_wide_pawn', 'queen',
+                                                             'rook', 'knight', 'bishop')])
+
+    # how the result of a game is written in a corpus line
+    RESULTS = {'1-0': 1.0, '0-1': 0.0, '1/2-1/2': 0.5}
+
+    # the number of positions sent to a worker at once
+    SHARD_SIZE = 1 << 16
+
+    '''
+        PARAMS
+        weights: the weights to start from, or None for the weights in eval_weights.json
+        parameters: the paths of the weights to tune, or None for PARAMETERS
+        workers: the number of worker processes, or None for one per CPU
+        scale: the constant mapping scores to expected results, fitted with fit_scale if not given
+    '''
+    def __init__(self, weights=None, parameters=None, workers=None, scale=None):
+        self.weights = load_eval_weights() if weights is None else copy.deepcopy(weights)
+        self.parameters = list(self.PARAMETERS if parameters is None else parameters)
+        self.workers = workers or os.cpu_count() or 1
+        self.scale = scale
+        self.rows = []
+        self.results = []
+        self.positions_scored = 0
+        self.scoring_time = 0.0
+        self.evaluations = BatchEvaluations()
+        self.board = Board()
+        self.pool = None
+        self.columns = None
+
+    '''
+        Reads labeled positions from a FEN or EPD file, one per line. Lines without a piece placement or a result are skipped.
+
+        PARAMS
+        path: the path of the file
+
+        RETURNS
+        the number of positions read
+    '''
+    def read_corpus(self, path):
+        count = 0
+        with open(path) as corpus:
+            for line in corpus:
+                fields = line.split()
+                result = _parse_result(line, self.RESULTS)
+                if (not fields or result is None or fields[0].count('/') != 7):
+                    continue
+                self.add_position(parse_placement(fields[0]), result)
+                count += 1
+        return count
+
+    '''
+        Reads the positions of a self-play shard, labeled with the results of their games
+
+        PARAMS
+        path: the path of the shard
+
+        RETURNS
+        the number of positions read
+    '''
+    def read_shard(self, path):
+        count = 0
+        for piece_boards, _, _, result, _, _ in read_shard(path):
+            self.add_position(piece_boards, (result + 1) / 2)
+            count += 1
+        return count
+
+    '''
+        Adds a labeled position to the corpus
+
+        PARAMS
+        piece_boards: the integer boards of the white pawns, rooks, knights, bishops, queens and king, then the same for
+            black, in the order of Board.get_position_encoding
+        result: the result of the game, from white's perspective
+    '''
+    def add_position(self, piece_boards, result):
+        self.board.set_position_encoding(tuple(piece_boards) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+        self.rows.append(self.evaluations.encode(self.board))
+        self.results.append(result)
+        self.close() # the workers hold the corpus they were started with
+        self.columns = None
+
+    def get_vector(self):
+        return [_get_weight(self.weights, path) for path in self.parameters]
+
+    def get_weights(self, vector):
+        weights = copy.deepcopy(self.weights)
+        for path, value in zip(self.parameters, vector):
+            _set_weight(weights, path, value)
+        return weights
+
+    '''
+        Gets the mean squared error between the results of the corpus and the expected results of its positions, scored with
+        a vector of tuned weights. The corpus is split into shards scored in parallel by the worker pool.
+
+        PARAMS
+        vector: the values of the tuned weights, in the order of parameters
+
+        RETURNS
+        the mean squared error
+    '''
+    def get_loss(self, vector):
+        if (not self.rows):
+            raise ValueError("the corpus is empty")
+        start = time.perf_counter()
+        weights = self.get_weights(vector)
+        scale = 1.0 if self.scale is None else self.scale
+        count = len(self.rows)
+        if (self.columns is None):
+            self.columns = (np.array(self.rows, dtype=np.uint64).T if np is not None else self.rows,
+                            np.array(self.results) if np is not None else self.results)
+        if (self.workers == 1 or count <= self.SHARD_SIZE):
+            error = _get_error(weights, scale, self.columns[0], self.columns[1])
+        else:
+            if (self.pool is None):
+                self.pool = multiprocessing.Pool(self.workers, _init_tuning_worker, self.columns)
+            shards = [(weights, scale, shard, min(shard + self.SHARD_SIZE, count))
+                      for shard in range(0, count, self.SHARD_SIZE)]
+            error = sum(self.pool.map(_shard_error_task, shards))
+        self.positions_scored += count
+        self.scoring_time += time.perf_counter() - start
+        return error / count
+
+    '''
+        Finds the scale minimizing the loss of the current weights with a golden section search, and keeps it
+
+        PARAMS
+        low, high: the range the scale is searched in
+        iterations: the number of search steps
+
+        RETURNS
+        the scale
+    '''
+    def fit_scale(self, low=0.05, high=5.0, iterations=30):
+        vector = self.get_vector()
+        ratio = (math.sqrt(5) - 1) / 2
+        losses = {}
+        def get_loss(scale):
+            if (scale not in losses):
+                self.scale = scale
+                losses[scale] = self.get_loss(vector)
+            return losses[scale]
+        for _ in range(iterations):
+            left = high - ratio * (high - low)
+            right = low + ratio * (high - low)
+            if (get_loss(left) < get_loss(right)):
+                high = right
+            else:
+                low = left
+        self.scale = (low + high) / 2
+        return self.scale
+
+    '''
+        Tunes the weights with a local search: each pass tries moving every tuned weight up and then down by a step, keeping
+        any move that lowers the loss. The step is halved after a pass without improvement, until it falls below min_step.
+
+        PARAMS
+        passes: the largest number of passes
+        step: the step weights are moved by at first
+        min_step: the step at which the search stops
+        verbose: whether to print the loss after each pass
+
+        RETURNS
+        a copy of the tuned weights, which are also kept in weights
+    '''
+    def tune(self, passes=50, step=0.05, min_step=0.005, verbose=False):
+        if (self.scale is None):
+            self.fit_scale()
+        vector = self.get_vector()
+        best_loss = self.get_loss(vector)
+        for number in range(passes):
+            improved = False
+            for i in range(len(vector)):
+                for delta in (step, -step):
+                    candidate = list(vector)
+                    candidate[i] += delta
+                    loss = self.get_loss(candidate)
+                    if (loss < best_loss):
+                        vector, best_loss, improved = candidate, loss, True
+                        break
+            if (verbose):
+                print('pass %d: loss %.6f, step %g, %.0f positions/s' % (number + 1, best_loss, step, self.get_throughput()))
+            if (not improved):
+                step /= 2
+                if (step < min_step):
+                    break
+        self.weights = self.get_weights(vector)
+        return copy.deepcopy(self.weights)
+
+    def get_throughput(self):
+        return self.positions_scored / self.scoring_time if self.scoring_time else 0.0
+
+    def close(self):
+        if (self.pool is not None):
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+'''
+    Gets the result of a game written in a corpus line
+
+    PARAMS
+    line: the line
+    results: a dictionary mapping each way of writing a result to its value
+
+    RETURNS
+    the result from white's perspective, or None if the line has none
+'''
+def _parse_result(line, results):
+    if ('[' in line and ']' in line):
+        try:
+            return float(line[line.rindex('[') + 1:line.rindex(']')])
+        except ValueError:
+            pass
+    for token in line.replace('"', ' ').replace(';', ' ').split()[1:]:
+        if (token in results):
+            return results[token]
+    return None
+
+'''
+    Gets the piece boards of the piece placement field of a FEN string
+
+    PARAMS
+    placement: the piece placement, ranks from the eighth to the first separated by slashes
+
+    RETURNS
+    a list of twelve integer boards, in the order of Board.get_position_encoding
+'''
+def parse_placement(placement):
+    order = (constants.WHITE_PAWN, constants.WHITE_ROOK, constants.WHITE_KNIGHT, constants.WHITE_BISHOP,
+             constants.WHITE_QUEEN, constants.WHITE_KING, constants.BLACK_PAWN, constants.BLACK_ROOK,
+             constants.BLACK_KNIGHT, constants.BLACK_BISHOP, constants.BLACK_QUEEN, constants.BLACK_KING)
+    boards = dict.fromkeys(order, 0)
+    for rank, pieces in enumerate(placement.split('/')):
+        col = 0
+        for piece in pieces:
+            if (piece.isdigit()):
+                col += int(piece)
+            else:
+                boards[piece] |= 1 << ((7 - rank) * constants.BOARD_LENGTH + col)
+                col += 1
+    return [boards[piece] for piece in order]
+
+def _get_weight(weights, path):
+    for key in path:
+        weights = weights[key]
+    return weights
+
+def _set_weight(weights, path, value):
+    for key in path[:-1]:
+        weights = weights[key]
+    weights[path[-1]] = value
+
+'''
+    Gets the summed squared error of a batch of labeled positions
+
+    PARAMS
+    weights: the evaluation weights to score the positions with
+    scale: the constant mapping scores to expected results
+    columns: the encoded positions, as a numpy array of columns (see BatchEvaluations.get_array_scores), or a list of rows
+        without numpy
+    results: the results of the positions
+
+    RETURNS
+    the sum of the squared differences between each result and its expected result
+'''
+def _get_error(weights, scale, columns, results):
+    evaluations = BatchEvaluations(weights=weights, center_control=False)
+    if (evaluations.use_numpy):
+        scores = evaluations.get_array_scores(columns, constants.WHITE, np.zeros(columns.shape[1], dtype=np.int64))
+        errors = results - 1 / (1 + np.power(10.0, -scale * scores))
+        return float(np.dot(errors, errors))
+    scores = evaluations.get_scores(columns, constants.WHITE, [0] * len(columns))
+    return sum((result - 1 / (1 + 10 ** (-scale * score))) ** 2 for result, score in zip(results, scores))
+
+'''
+    Keeps the corpus in a newly started tuning worker process
+
+    PARAMS
+    columns: the encoded positions, as passed to _get_error
+    results: the results of the positions
+'''
+def _init_tuning_worker(columns, results):
+    global _tuning_columns, _tuning_results
+    _tuning_columns = columns
+    _tuning_results = results
+
+'''
+    Gets the summed squared error of a shard of the worker's corpus
+
+    PARAMS
+    task: a tuple (weights, scale, start, stop) where start and stop bound the shard's positions
+
+    RETURNS
+    the sum of the squared errors of the shard
+'''
+def _shard_error_task(task):
+    weights, scale, start, stop = task
+    if (np is not None):
+        return _get_error(weights, scale, _tuning_columns[:, start:stop], _tuning_results[start:stop])
+    return _get_error(weights, scale, _tuning_columns[start:stop], _tuning_results[start:stop])
+
+
+'''
+    Tunes the evaluation weights on labeled corpus files and writes them to a configuration file that load_eval_weights (and
+    Evaluations) can read
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Tune the evaluation weights on a corpus of labeled positions')
+    parser.add_argument('corpus', nargs='+', help='FEN or EPD files of positions labeled with game results, or self-play '
+                                                  'shards (.bin)')
+    parser.add_argument('--output', default='tuned_weights.json', help='the file the tuned weights are written to')
+    parser.add_argument('--weights', help='the weights to start from (eval_weights.json by default)')
+    parser.add_argument('--workers', type=int, help='the number of worker processes (one per CPU by default)')
+    parser.add_argument('--passes', type=int, default=50, help='the largest number of local search passes')
+    parser.add_argument('--step', type=float, default=0.05, help='the first step weights are moved by')
+    arguments = parser.parse_args()
+
+    tuner = TexelTuner(load_eval_weights(arguments.weights), workers=arguments.workers)
+    try:
+        for path in arguments.corpus:
+            count = tuner.read_shard(path) if path.endswith('.bin') else tuner.read_corpus(path)
+            print('%s: %d positions' % (path, count))
+        print('scale %.4f, loss %.6f' % (tuner.fit_scale(), tuner.get_loss(tuner.get_vector())))
+        weights = tuner.tune(arguments.passes, arguments.step, verbose=True)
+    finally:
+        tuner.close()
+    with open(arguments.output, 'w') as output:
+        json.dump(weights, output, indent=4)
+    print('weights written to %s (%.0f positions/s)' % (arguments.output, tuner.get_throughput()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.self_play import create_player, play_game
+import argparse
+import ast
+import math
+import multiprocessing
+import os
+
+# openings played when no suite is given, as moves in from and to squares
+DEFAULT_OPENINGS = (
+    'e2e4 e7e5 g1f3 b8c6',
+    'd2d4 d7d5 c2c4 e7e6',
+    'e2e4 c7c5 g1f3 d7d6',
+    'e2e4 e7e6 d2d4 d7d5',
+    'e2e4 c7c6 d2d4 d7d5',
+    'd2d4 g8f6 c2c4 g7g6',
+    'c2c4 e7e5 b1c3 g8f6',
+    'g1f3 d7d5 g2g3 g8f6'
+)
+
+
+class Tournament:
+    '''
+        Plays games between two MiniMax configurations, A and B, across a pool of worker processes, with no board printing.
+        Each opening of the suite is played twice, once with each engine as white, and games are started in that order as
+        workers free up. After every game a sequential probability ratio test weighs the hypothesis that A is elo1 stronger
+        than B against the hypothesis that it is elo0 stronger, and the tournament stops as soon as either is accepted (or
+        after the given number of games). The variance the test uses is measured from the games themselves, which is far
+        off over a handful of games, so the test only stops the tournament after min_games games.
+
+        An engine configuration is a dictionary holding the MiniMax depth ('depth') and any MiniMax attributes to set, such
+        as {'depth': 2, 'use_move_ordering': False}.
+
+        ATTRIBUTES
+        engine_a, engine_b: the configurations of the two engines
+        openings: the opening suite, each opening a list of (from square, to square) moves
+        games: the largest number of games to play
+        workers: the number of worker processes
+        max_plies: the number of plies (after the opening) after which a game is drawn
+        elo0, elo1: the Elo differences of the null and alternative hypotheses of the test
+        alpha, beta: the largest acceptable probabilities of accepting the alternative hypothesis when the null one is true,
+            and the other way round
+        min_games: the number of games before the test may stop the tournament, by default every opening played with both
+            colors
+        wins, draws, losses: the results of the games so far, from A's perspective
+
+        METHODS
+        run(verbose)
+            plays games until the test accepts a hypothesis or every game is played
+            returns the summary of the results as a dictionary
+
+        get_llr()
+            returns the log likelihood ratio of the results so far
+
+        get_bounds()
+            returns the (lower, upper) log likelihood ratios at which the null and alternative hypotheses are accepted
+
+        get_elo()
+            returns the Elo difference of A over B measured so far, with its 95% confidence margin
+
+        get_summary()
+            returns the results, Elo difference and test state as a dictionary
+    '''
+    def __init__(self, engine_a, engine_b, openings=None, games=1000, workers=None, max_plies=200, elo0=0.0, elo1=10.0,
+                 alpha=0.05, beta=0.05, min_games=None):
+        self.engine_a = engine_a
+        self.engine_b = engine_b
+        self.openings = [parse_opening(opening) for opening in (DEFAULT_OPENINGS if openings is None else openings)]
+        self.games = games
+        self.workers = workers or os.cpu_count() or 1
+        self.max_plies = max_plies
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.min_games = 2 * len(self.openings) if min_games is None else min_games
+        self.wins = self.draws = self.losses = 0
+
+    '''
+        Plays the tournament's games in parallel, updating the test after each finished game and stopping the remaining
+        games as soon as it accepts a hypothesis
+
+        PARAMS
+        verbose: whether to print the standing after each game
+
+        RETURNS
+        the summary of the results (see get_summary)
+    '''
+    def run(self, verbose=False):
+        tasks = [(game, self.openings[game // 2 % len(self.openings)], game % 2 == 0, self.engine_a, self.engine_b,
+                  self.max_plies) for game in range(self.games)]
+        pool = multiprocessing.Pool(self.workers) if self.workers > 1 else None
+        try:
+            results = pool.imap_unordered(_tournament_game_task, tasks) if pool is not None \
+                else map(_tournament_game_task, tasks)
+            for game, result in results:
+                if (result > 0):
+                    self.wins += 1
+                elif (result < 0):
+                    self.losses += 1
+                else:
+                    self.draws += 1
+                if (verbose):
+                    elo, margin = self.get_elo()
+                    print('game %d: %+d, W %d D %d L %d, elo %.1f +/- %.1f, llr %.2f' % (
+                        game, result, self.wins, self.draws, self.losses, elo, margin, self.get_llr()))
+                lower, upper = self.get_bounds()
+                llr = self.get_llr()
+                if (self.wins + self.draws + self.losses >= self.min_games and (llr <= lower or llr >= upper)):
+                    break
+        finally:
+            if (pool is not None):
+                pool.terminate()
+                pool.join()
+        return self.get_summary()
+
+    '''
+        Gets the log likelihood ratio of the results so far, with the normal approximation of the generalized SPRT: the
+        mean score and its variance are measured from the wins, draws and losses, and each hypothesis's Elo difference is
+        turned into an expected score with the logistic Elo model
+
+        RETURNS
+        the log likelihood ratio of the alternative hypothesis (elo1) over the null one (elo0), 0 without decisive data
+    '''
+    def get_llr(self):
+        count = self.wins + self.draws + self.losses
+        if (not count or not self.wins + self.losses):
+            return 0.0
+        score = (self.wins + self.draws / 2) / count
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 + self.losses * score ** 2) / count
+        if (variance <= 0):
+            return 0.0
+        score0, score1 = _elo_to_score(self.elo0), _elo_to_score(self.elo1)
+        return count * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+    def get_bounds(self):
+        return math.log(self.beta / (1 - self.alpha)), math.log((1 - self.beta) / self.alpha)
+
+    '''
+        Gets the Elo difference of A over B measured so far, from A's mean score
+
+        RETURNS
+        a tuple (Elo difference, margin), where the difference lies within the margin of the measure with 95% confidence
+        (both are infinite while A has only won or only lost)
+    '''
+    def get_elo(self):
+        count = self.wins + self.draws + self.losses
+        if (not count):
+            return 0.0, math.inf
+        score = (self.wins + self.draws / 2) / count
+        if (score <= 0 or score >= 1):
+            return _score_to_elo(score), math.inf
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 + self.losses * score ** 2) / count
+        deviation = 1.959964 * math.sqrt(variance / count)
+        elo = _score_to_elo(score)
+        margin = (_score_to_elo(score + deviation) - _score_to_elo(score - deviation)) / 2
+        return elo, margin
+
+    def get_summary(self):
+        elo, margin = self.get_elo()
+        llr = self.get_llr()
+        lower, upper = self.get_bounds()
+        count = self.wins + self.draws + self.losses
+        result = 'inconclusive'
+        if (count >= self.min_games and llr >= upper):
+            result = 'H1'
+        elif (count >= self.min_games and llr <= lower):
+            result = 'H0'
+        return {'games': count, 'wins': self.wins, 'draws': self.draws, 'losses': self.losses, 'elo': elo,
+                'elo_margin': margin, 'llr': llr, 'llr_bounds': (lower, upper), 'result': result}
+
+
+'''
+    Parses an opening written as moves in from and to squares separated by spaces, such as 'e2e4 e7e5' (dashes between the
+    squares, as in 'e2-e4', are also read)
+
+    PARAMS
+    opening: the opening as a string, or a list of (from square, to square) moves
+
+    RETURNS
+    a list of (from square, to square) moves
+'''
+def parse_opening(opening):
+    if (not isinstance(opening, str)):
+        return [tuple(move) for move in opening]
+    moves = []
+    for move in opening.replace('-', '').split():
+        moves.append((move[:2], move[2:4]))
+    return moves
+
+'''
+    Reads an opening suite from a file with one opening per line (see parse_opening). Blank lines and lines starting with #
+    are skipped.
+
+    PARAMS
+    path: the path of the file
+
+    RETURNS
+    a list of openings
+'''
+def read_openings(path):
+    with open(path) as suite:
+        return [parse_opening(line) for line in suite if line.strip() and not line.startswith('#')]
+
+'''
+    Converts an Elo difference to the expected score of the stronger side with the logistic Elo model
+'''
+def _elo_to_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+'''
+    Converts a mean score to an Elo difference with the logistic Elo model, infinite for scores of 0 or 1
+'''
+def _score_to_elo(score):
+    if (score <= 0):
+        return -math.inf
+    if (score >= 1):
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+'''
+    Plays one tournament game in a worker process
+
+    PARAMS
+    task: a tuple (game number, opening, whether A is white, configuration of A, configuration of B, max plies)
+
+    RETURNS
+    a tuple (game number, result) with the result from A's perspective: 1 for a win, 0 for a draw and -1 for a loss
+'''
+def _tournament_game_task(task):
+    game, opening, a_is_white, engine_a, engine_b, max_plies = task
+    players = [create_player(engine['depth'], {name: value for name, value in engine.items() if name != 'depth'})
+               for engine in ((engine_a, engine_b) if a_is_white else (engine_b, engine_a))]
+    board = Board()
+    color = constants.WHITE
+    for from_square, to_square in opening:
+        if (board.move_piece(from_square, to_square)):
+            raise ValueError("the opening %s ends the game" % opening)
+        color = 1 - color
+    result, _ = play_game(board, players, color, max_plies)
+    return game, result if a_is_white else -result
+
+'''
+    Parses an engine configuration written as comma separated name=value pairs, such as 'depth=2,use_move_ordering=False'
+
+    PARAMS
+    text: the configuration
+
+    RETURNS
+    the configuration as a dictionary, with depth 2 unless given
+'''
+def parse_engine(text):
+    engine = {'depth': 2}
+    for option in filter(None, text.split(',')):
+        name, value = option.split('=', 1)
+        engine[name.strip()] = ast.literal_eval(value.strip())
+    return engine
+
+
+'''
+    Runs a tournament from the command line
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Play two MiniMax configurations against each other')
+    parser.add_argument('--engine-a', default='', help='the first configuration, as name=value pairs (e.g. depth=2)')
+    parser.add_argument('--engine-b', default='', help='the second configuration')
+    parser.add_argument('--openings', help='a file with one opening per line (a built in suite by default)')
+    parser.add_argument('--games', type=int, default=1000, help='the largest number of games')
+    parser.add_argument('--workers', type=int, help='the number of worker processes (one per CPU by default)')
+    parser.add_argument('--max-plies', type=int, default=200, help='the number of plies after which a game is drawn')
+    parser.add_argument('--elo0', type=float, default=0.0, help='the Elo difference of the null hypothesis')
+    parser.add_argument('--elo1', type=float, default=10.0, help='the Elo difference of the alternative hypothesis')
+    parser.add_argument('--alpha', type=float, default=0.05, help='the false positive rate of the test')
+    parser.add_argument('--beta', type=float, default=0.05, help='the false negative rate of the test')
+    parser.add_argument('--min-games', type=int, help='the number of games before the test may stop the tournament')
+    arguments = parser.parse_args()
+
+    tournament = Tournament(parse_engine(arguments.engine_a), parse_engine(arguments.engine_b),
+                            read_openings(arguments.openings) if arguments.openings else None, arguments.games,
+                            arguments.workers, arguments.max_plies, arguments.elo0, arguments.elo1, arguments.alpha,
+                            arguments.beta, arguments.min_games)
+    summary = tournament.run(verbose=True)
+    print('%d games: W %d D %d L %d, elo %.1f +/- %.1f, llr %.2f (%.2f, %.2f): %s' % (
+        summary['games'], summary['wins'], summary['draws'], summary['losses'], summary['elo'], summary['elo_margin'],
+        summary['llr'], summary['llr_bounds'][0], summary['llr_bounds'][1], summary['result']))
+
+
+if __name__ == '__main__':
+    main()
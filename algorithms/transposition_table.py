@@ -0,0 +1,188 @@
+from multiprocessing import shared_memory
+import struct
+
+
+class TranspositionTable:
+    '''
+        A fixed size transposition table storing search results by Zobrist key, packed into a flat buffer of 64 bit words so
+        that the same table can live in ordinary memory or in a shared memory block used by several processes.
+
+        Each entry is three words: a check word, the score (as the bits of a double) and a data word holding the draft,
+        bound type and best move. The check word is the key xored with the other two words, so an entry only matches a key if
+        all three words were written together. A torn entry (two processes writing the same slot at once) simply fails the
+        check and is treated as a miss, so no locking is needed.
+
+        Scores are stored from the perspective of the player to move in the position, and the draft is the number of plies
+        that were searched below the position. Since drafts do not depend on where the root was, entries stay valid from one
+        search to the next. Each entry also records the age (search generation) it was written in, so that entries left over
+        from earlier searches are replaced before entries from the current one.
+
+        Entries are keyed by the placement and the side to move alone. The evaluation also reads state that depends on the
+        path to a position (the development board, the en passant board and the last moves, which Board.get_score keys its
+        evaluation cache by), but the table deliberately ignores it: positions reached by different move orders always differ
+        in that state, so keying on it would leave the table next to no transpositions to find. A hit may therefore return a
+        score searched along another path, which can differ by the development term (a few tenths of a pawn at most) and by
+        an en passant capture available along one path only.
+
+        ATTRIBUTES
+        EXACT, LOWER_BOUND, UPPER_BOUND: bound types describing how a stored score relates to the true score
+        size: the number of entries (a power of two)
+        buffer: the bytes backing the table
+        words: the buffer viewed as 64 bit words
+        age: the generation of the current search, written into every stored entry
+        root_key: the Zobrist key of the root of the current search, or None
+
+        METHODS
+        probe(key)
+            looks up the entry for a key
+            returns (score, draft, bound, move) if there is one, None otherwise
+
+        store(key, score, draft, bound, move)
+            saves a search result for a key, replacing the existing entry in the slot unless that entry was written during the
+            current search and searched deeper
+            returns None
+
+        new_search(root_key)
+            starts a new generation if the root differs from the current search's root
+            returns None
+
+        clear()
+            empties the table
+            returns None
+    '''
+
+    EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+    WORDS_PER_ENTRY = 3
+    ENTRY_SIZE = WORDS_PER_ENTRY * 8
+
+    # data word layout: draft (8 bits), bound (2 bits), from index (6 bits), to index (7 bits, as king moves can land up to 9
+    # squares past the last one), has move (1 bit), age (8 bits)
+    DRAFT_MASK = 0xff
+    BOUND_SHIFT = 8
+    FROM_SHIFT = 10
+    TO_SHIFT = 16
+    HAS_MOVE_BIT = 1 << 23
+    AGE_SHIFT = 24
+    AGE_MASK = 0xff
+
+    def __init__(self, size=1 << 16, buffer=None):
+        if (size & (size - 1)):
+            raise ValueError("transposition table size must be a power of two")
+        self.size = size
+        self.buffer = buffer if buffer is not None else bytearray(size * self.ENTRY_SIZE)
+        self.words = memoryview(self.buffer).cast('Q')
+        self.age = 0
+        self.root_key = None
+
+    '''
+        Looks up the entry stored for the given key
+
+        PARAMS
+        key: a 64 bit Zobrist key
+
+        RETURNS
+        a tuple (score, draft, bound, move) where move is a (from index, to index) pair or None, or None if the key has no entry
+    '''
+    def probe(self, key):
+        words = self.words
+        slot = (key & (self.size - 1)) * self.WORDS_PER_ENTRY
+        check, score_bits, data = words[slot], words[slot + 1], words[slot + 2]
+        if (check ^ score_bits ^ data != key):
+            return None
+        move = None
+        if (data & self.HAS_MOVE_BIT):
+            move = ((data >> self.FROM_SHIFT) & 63, (data >> self.TO_SHIFT) & 127)
+        return (_bits_to_float(score_bits), data & self.DRAFT_MASK, (data >> self.BOUND_SHIFT) & 3, move)
+
+    '''
+        Stores a search result for the given key. An entry written during an earlier search is always replaced, while an entry
+        from the current search is only replaced by a search at least as deep.
+
+        PARAMS
+        key: a 64 bit Zobrist key
+        score: the score of the position for the player to move
+        draft: the number of plies searched below the position
+        bound: one of EXACT, LOWER_BOUND or UPPER_BOUND
+        move: the best (from index, to index) pair found, or None
+    '''
+    def store(self, key, score, draft, bound, move):
+        words = self.words
+        slot = (key & (self.size - 1)) * self.WORDS_PER_ENTRY
+        old_data = words[slot + 2]
+        if (((old_data >> self.AGE_SHIFT) & self.AGE_MASK) == self.age and (old_data & self.DRAFT_MASK) > draft):
+            return
+
+        data = min(draft, self.DRAFT_MASK) | (bound << self.BOUND_SHIFT) | (self.age << self.AGE_SHIFT)
+        if (move is not None):
+            data |= (move[0] << self.FROM_SHIFT) | (move[1] << self.TO_SHIFT) | self.HAS_MOVE_BIT
+        score_bits = _float_to_bits(score)
+        words[slot + 1] = score_bits
+        words[slot + 2] = data
+        words[slot] = key ^ score_bits ^ data
+
+    def clear(self):
+        memoryview(self.buffer)[:] = bytes(self.size * self.ENTRY_SIZE)
+        self.age = 0
+        self.root_key = None
+
+    '''
+        Starts a new search generation, unless the root is the one already being searched (as when a search deepens one ply
+        at a time, or several searchers share the table)
+
+        PARAMS
+        root_key: the Zobrist key of the new search's root
+    '''
+    def new_search(self, root_key):
+        if (root_key == self.root_key):
+            return
+        self.root_key = root_key
+        self.age = (self.age + 1) & self.AGE_MASK
+
+
+class SharedTranspositionTable(TranspositionTable):
+    '''
+        A transposition table whose entries live in a multiprocessing shared memory block, so every process attached to the
+        block reads and writes the same table. The process that creates the block owns it and must unlink it when done;
+        other processes attach by name.
+
+        ATTRIBUTES
+        shared_memory: the shared memory block backing the table
+        name: the name other processes attach to the block with
+        is_owner: whether this process created (and must unlink) the block
+
+        METHODS
+        close()
+            detaches this process from the block, unlinking it if this process owns it
+            returns None
+    '''
+    def __init__(self, size=1 << 16, name=None):
+        if (name is None):
+            self.shared_memory = shared_memory.SharedMemory(create=True, size=size * self.ENTRY_SIZE)
+            self.is_owner = True
+        else:
+            self.shared_memory = shared_memory.SharedMemory(name=name)
+            self.is_owner = False
+        self.name = self.shared_memory.name
+        super().__init__(size, self.shared_memory.buf)
+
+    def close(self):
+        if (self.shared_memory is None):
+            return
+        self.words.release()
+        self.buffer = None
+        self.shared_memory.close()
+        if (self.is_owner):
+            self.shared_memory.unlink()
+        self.shared_memory = None
+
+
+_DOUBLE = struct.Struct('<d')
+_WORD = struct.Struct('<Q')
+
+
+def _float_to_bits(value):
+    return _WORD.unpack(_DOUBLE.pack(value))[0]
+
+
+def _bits_to_float(bits):
+    return _DOUBLE.unpack(_WORD.pack(bits))[0]
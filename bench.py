@@ -0,0 +1,457 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants
+from algorithms.minimax import MiniMax
+from algorithms.self_play import get_legal_moves
+from algorithms.texel_tuner import parse_placement
+from algorithms.tournament import parse_opening
+import argparse
+import datetime
+import gc
+import hashlib
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# the version of the JSON layout written by BenchmarkSuite.run
+BENCH_FORMAT = 1
+
+# the benchmarks checked against a baseline, and the relative slowdown of each that fails the check when it is also
+# statistically significant
+GATED_BENCHMARKS = ('perft', 'move_generation', 'evaluation', 'search')
+DEFAULT_THRESHOLD = 0.05
+
+# the positions benchmarked, as (name, position) pairs. A position is either a line of moves played from the initial
+# board (see tournament.parse_opening) or a FEN piece placement followed by the color to move
+BENCH_POSITIONS = (
+    ('initial', ''),
+    ('italian', 'e2e4 e7e5 g1f3 b8c6 f1c4 f8c5 c2c3 g8f6 d2d3 d7d6 b1d2 a7a6'),
+    ('queens gambit', 'd2d4 d7d5 c2c4 e7e6 b1c3 g8f6 c1g5 f8e7 e2e3 b8d7 g1f3 c7c6'),
+    ('open sicilian', 'e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6 b1c3 a7a6 c1e3 e7e5 d4b3 c8e6'),
+    ('scandinavian', 'e2e4 d7d5 e4d5 d8d5 b1c3 d5a5 d2d4 g8f6 g1f3 c8f5 f1c4 e7e6'),
+    ('rook endgame', '8/5pk1/6p1/8/3R4/6P1/5PK1/r7 w'),
+    ('minor piece endgame', '8/3k4/2p1p3/1pP1Pp2/1P3P2/3K1B2/8/4n3 b')
+)
+
+
+class BenchmarkSuite:
+    '''
+        Times the engine's hot paths on a fixed set of positions: perft through the move generator and make/undo, raw
+        generate_moves calls, Evaluations.get_score calls, and fixed depth MiniMax searches. Every benchmark runs once
+        untimed to warm up caches, then trials times, and reports its rate over the trials as a mean with its standard
+        deviation, so that results from different commits can be compared with their noise in mind.
+
+        ATTRIBUTES
+        positions: the benchmarked positions, as (name, position) pairs in the form of BENCH_POSITIONS
+        trials: the number of timed runs of each benchmark
+        perft_depth: the depth of the perft run from each position
+        search_depth: the MiniMax depth of the search run from each position
+        move_generation_repeats: the number of times the moves of every piece of each position are generated per trial
+        evaluation_repeats: the number of times each position is scored per trial
+
+        METHODS
+        run(verbose)
+            runs every benchmark
+            returns the results as a JSON serializable dictionary
+
+        run_perft()
+            returns the results of the perft benchmark, with the number of leaves reached from each position
+
+        run_move_generation()
+            returns the results of the generate_moves benchmark
+
+        run_evaluation()
+            returns the results of the Evaluations.get_score benchmark
+
+        run_search()
+            returns the results of the search benchmark, with the nodes searched from each position
+
+        from_settings(settings, trials)
+            returns a suite running the benchmarks of a previous run, as recorded in its results' settings
+    '''
+    def __init__(self, positions=None, trials=5, perft_depth=2, search_depth=2, move_generation_repeats=20,
+                 evaluation_repeats=200):
+        self.positions = list(BENCH_POSITIONS if positions is None else positions)
+        self.trials = trials
+        self.perft_depth = perft_depth
+        self.search_depth = search_depth
+        self.move_generation_repeats = move_generation_repeats
+        self.evaluation_repeats = evaluation_repeats
+        self._boards = [get_bench_board(position) for _, position in self.positions]
+
+    @classmethod
+    def from_settings(cls, settings, trials=None):
+        return cls([tuple(position) for position in settings['positions']], settings['trials'] if trials is None else trials,
+                   settings['perft_depth'], settings['search_depth'], settings['move_generation_repeats'],
+                   settings['evaluation_repeats'])
+
+    '''
+        Runs every benchmark
+
+        PARAMS
+        verbose: whether to print each benchmark's rate to stderr as it finishes
+
+        RETURNS
+        a dictionary with the settings, the machine and commit the suite ran on, the results of each benchmark and the node
+        signature of the results (see get_node_signature)
+    '''
+    def run(self, verbose=False):
+        benchmarks = {}
+        for name, benchmark in (('perft', self.run_perft), ('move_generation', self.run_move_generation),
+                                ('evaluation', self.run_evaluation), ('search', self.run_search)):
+            benchmarks[name] = benchmark()
+            if (verbose):
+                rate = benchmarks[name]['rate']
+                print('%-16s %12.1f %s/s +/- %.1f%%' % (name, rate['mean'], benchmarks[name]['unit'],
+                      100 * rate['stdev'] / rate['mean'] if rate['mean'] else 0.0), file=sys.stderr)
+        return {
+            'format': BENCH_FORMAT,
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': get_commit(),
+            'python': platform.python_implementation() + ' ' + platform.python_version(),
+            'machine': platform.platform(),
+            'settings': {'trials': self.trials, 'perft_depth': self.perft_depth, 'search_depth': self.search_depth,
+                         'move_generation_repeats': self.move_generation_repeats,
+                         'evaluation_repeats': self.evaluation_repeats,
+                         'positions': [[name, position] for name, position in self.positions]},
+            'benchmarks': benchmarks,
+            'node_signature': get_node_signature(self.perft_depth, self.search_depth, self.positions,
+                                                 benchmarks['perft']['leaves'], benchmarks['search']['position_nodes'])
+        }
+
+    def run_perft(self):
+        leaves = [perft(board, color, self.perft_depth) for board, color in self._boards]
+        result = self._time_trials(lambda: sum(perft(board, color, self.perft_depth) for board, color in self._boards),
+                                   'nodes')
+        result['leaves'] = leaves
+        return result
+
+    def run_move_generation(self):
+        squares = [(board, [index for index in range(64) if board.board & (1 << index)]) for board, _ in self._boards]
+
+        def generate():
+            calls = 0
+            for board, indexes in squares:
+                generate_moves = board.move_generator.generate_moves
+                for _ in range(self.move_generation_repeats):
+                    for index in indexes:
+                        generate_moves(board, index)
+                calls += self.move_generation_repeats * len(indexes)
+            return calls
+        return self._time_trials(generate, 'calls')
+
+    '''
+        Gets the results of the evaluation benchmark. The positions are scored with their Evaluations directly, past the
+        board's evaluation cache, which would otherwise answer every call after the first.
+    '''
+    def run_evaluation(self):
+        def evaluate():
+            for board, color in self._boards:
+                get_score = board.evaluations.get_score
+                for _ in range(self.evaluation_repeats):
+                    get_score(board, color, 0)
+            return self.evaluation_repeats * len(self._boards)
+        return self._time_trials(evaluate, 'calls')
+
+    '''
+        Gets the results of the search benchmark. Each position is searched by a new MiniMax with the default settings, so
+        that no search benefits from the transposition table or history of an earlier one, on a new board, since copies of a
+        board share its evaluation caches. Only the searches are timed.
+    '''
+    def run_search(self):
+        nodes = []
+        times = []
+
+        def search():
+            nodes[:] = []
+            elapsed = 0.0
+            for _, position in self.positions:
+                minimax = MiniMax(self.search_depth)
+                board, color = get_bench_board(position)
+                start = time.perf_counter()
+                _, stats = minimax.get_next_move(board, color, with_stats=True)
+                elapsed += time.perf_counter() - start
+                nodes.append(stats.get_nodes())
+            times.append(elapsed)
+            return sum(nodes)
+        result = self._time_trials(search, 'nodes')
+        result['seconds'] = times[1:] # the searches alone, without setting up the searchers
+        result['rate'] = summarize([result['work'] / elapsed for elapsed in result['seconds'] if elapsed > 0])
+        result['time'] = summarize(result['seconds'])
+        result['position_nodes'] = list(nodes)
+        return result
+
+    '''
+        Runs a benchmark once to warm up, then trials times
+
+        PARAMS
+        task: a function running the benchmark once and returning the units of work it did
+        unit: the name of the unit of work
+
+        RETURNS
+        a dictionary with the unit, the work done per trial, the seconds of each trial and the summary of the rates
+    '''
+    def _time_trials(self, task, unit):
+        work = task()
+        seconds = []
+        for _ in range(self.trials):
+            gc.collect()
+            start = time.perf_counter()
+            task()
+            seconds.append(time.perf_counter() - start)
+        return {'unit': unit, 'work': work, 'seconds': seconds,
+                'rate': summarize([work / elapsed for elapsed in seconds if elapsed > 0])}
+
+
+'''
+    Sets up a benchmark position
+
+    PARAMS
+    position: a line of moves from the initial board, or a FEN piece placement followed by the color to move ('w' or 'b')
+
+    RETURNS
+    a tuple (board, color to move)
+'''
+def get_bench_board(position):
+    board = Board()
+    color = constants.WHITE
+    if (position.count('/') == 7):
+        placement, side = position.split()
+        board.set_position_encoding(tuple(parse_placement(placement)) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+        return board, constants.WHITE if side == 'w' else constants.BLACK
+    for from_square, to_square in parse_opening(position):
+        if (board.move_piece(from_square, to_square)):
+            raise ValueError("the line %s ends the game" % position)
+        color = 1 - color
+    board.undo_stack = [] # the searches deep copy the board, undo history included
+    return board, color
+
+'''
+    Counts the leaves of the move tree of a given depth from a board, playing every move with move_piece and taking it back
+    with undo_last. A move that ends the game is counted as a leaf.
+
+    PARAMS
+    board: the board, which is returned to its position
+    color: the color to move
+    depth: the number of plies to play
+
+    RETURNS
+    the number of leaves
+'''
+def perft(board, color, depth):
+    if (depth == 0):
+        return 1
+    leaves = 0
+    for from_index, to_index in get_legal_moves(board, color):
+        if (board.move_piece(utils.index_to_square(from_index), utils.index_to_square(to_index))):
+            leaves += 1
+        else:
+            leaves += perft(board, 1 - color, depth - 1)
+        board.undo_last()
+    return leaves
+
+'''
+    Summarizes a list of samples
+
+    RETURNS
+    a dictionary with the mean, standard deviation, minimum and maximum of the samples, and the samples themselves
+'''
+def summarize(samples):
+    if (not samples):
+        return {'mean': 0.0, 'stdev': 0.0, 'min': 0.0, 'max': 0.0, 'samples': []}
+    return {'mean': statistics.mean(samples), 'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'min': min(samples), 'max': max(samples), 'samples': list(samples)}
+
+'''
+    Gets a signature of the work the benchmarks did, which stays the same as long as move generation and search behave the
+    same: a hash of the settings, the perft leaf counts and the nodes each search visited
+
+    PARAMS
+    perft_depth, search_depth: the depths of the perft runs and searches
+    positions: the benchmarked (name, position) pairs
+    leaves: the number of perft leaves from each position
+    position_nodes: the number of nodes searched from each position
+
+    RETURNS
+    the signature as a hexadecimal string
+'''
+def get_node_signature(perft_depth, search_depth, positions, leaves, position_nodes):
+    work = [perft_depth, search_depth, [position for _, position in positions], list(leaves), list(position_nodes)]
+    return hashlib.sha1(json.dumps(work).encode()).hexdigest()[:16]
+
+'''
+    Compares benchmark results against a baseline. A benchmark regressed when its mean rate fell by more than its threshold
+    (as a fraction of the baseline's rate) and a one sided Welch's t-test on the trial rates finds the drop significant at
+    the given level. The node signatures are compared too, since a change in the nodes searched changes what the timings
+    measure.
+
+    PARAMS
+    baseline: the results of an earlier run, as returned by BenchmarkSuite.run
+    current: the results of the run to check, with the same settings
+    thresholds: a dictionary of the largest allowed slowdown of each benchmark, DEFAULT_THRESHOLD for the others
+    alpha: the significance level of the test
+
+    RETURNS
+    a dictionary holding, for each gated benchmark, the baseline and current mean rates, the relative change, the p-value
+    of the slowdown and whether it is a regression, along with both node signatures and whether the results pass
+'''
+def compare_results(baseline, current, thresholds=None, alpha=0.05):
+    if (baseline.get('format') != BENCH_FORMAT):
+        raise ValueError("the baseline has format %s rather than %d" % (baseline.get('format'), BENCH_FORMAT))
+    thresholds = thresholds or {}
+    comparison = {'baseline_commit': baseline['commit'], 'commit': current['commit'],
+                  'same_machine': baseline['machine'] == current['machine'], 'benchmarks': {}}
+    for name in GATED_BENCHMARKS:
+        before, after = baseline['benchmarks'][name]['rate'], current['benchmarks'][name]['rate']
+        threshold = thresholds.get(name, DEFAULT_THRESHOLD)
+        change = after['mean'] / before['mean'] - 1 if before['mean'] else 0.0
+        p_value = get_slowdown_p_value(before['samples'], after['samples'])
+        comparison['benchmarks'][name] = {'baseline': before['mean'], 'current': after['mean'], 'change': change,
+                                          'threshold': threshold, 'p_value': p_value,
+                                          'regression': -change > threshold and p_value < alpha}
+    comparison['baseline_signature'] = baseline['node_signature']
+    comparison['signature'] = current['node_signature']
+    comparison['same_nodes'] = baseline['node_signature'] == current['node_signature']
+    comparison['passed'] = comparison['same_nodes'] and \
+        not any(result['regression'] for result in comparison['benchmarks'].values())
+    return comparison
+
+'''
+    Tests whether a set of rates is lower than a baseline set with a one sided Welch's t-test
+
+    PARAMS
+    baseline: the baseline rates
+    samples: the rates to test
+
+    RETURNS
+    the p-value of the samples' mean being lower than the baseline's only by chance
+'''
+def get_slowdown_p_value(baseline, samples):
+    if (len(baseline) < 2 or len(samples) < 2):
+        return 1.0
+    difference = statistics.mean(baseline) - statistics.mean(samples)
+    baseline_error = statistics.variance(baseline) / len(baseline)
+    samples_error = statistics.variance(samples) / len(samples)
+    error = baseline_error + samples_error
+    if (error == 0):
+        return 0.0 if difference > 0 else 1.0
+    freedom = error ** 2 / (baseline_error ** 2 / (len(baseline) - 1) + samples_error ** 2 / (len(samples) - 1))
+    return 1 - _t_cdf(difference / math.sqrt(error), freedom)
+
+'''
+    The cumulative distribution function of Student's t distribution, from the regularized incomplete beta function
+'''
+def _t_cdf(t, freedom):
+    tail = _incomplete_beta(freedom / 2, 0.5, freedom / (freedom + t * t)) / 2
+    return 1 - tail if t > 0 else tail
+
+'''
+    The regularized incomplete beta function I_x(a, b), evaluated with its continued fraction
+'''
+def _incomplete_beta(a, b, x):
+    if (x <= 0 or x >= 1):
+        return 0.0 if x <= 0 else 1.0
+    if (x > (a + 1) / (a + b + 2)): # the continued fraction converges quickly below this point
+        return 1 - _incomplete_beta(b, a, 1 - x)
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x)) / a
+    tiny = 1e-300
+    c, d = 1.0, 1 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, 200):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1 + numerator * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+        if (abs(c * d - 1) < 1e-12):
+            break
+    return front * fraction
+
+'''
+    Parses the --threshold options of the command line, each either a slowdown for every benchmark or name=slowdown
+
+    RETURNS
+    a dictionary of the slowdown allowed for each gated benchmark
+'''
+def _parse_thresholds(options):
+    thresholds = dict.fromkeys(GATED_BENCHMARKS, DEFAULT_THRESHOLD)
+    for option in options or []:
+        if ('=' in option):
+            name, value = option.split('=', 1)
+            if (name not in thresholds):
+                raise ValueError("there is no benchmark %s" % name)
+            thresholds[name] = float(value)
+        else:
+            thresholds = dict.fromkeys(GATED_BENCHMARKS, float(option))
+    return thresholds
+
+'''
+    Gets the commit the benchmarked tree is on
+
+    RETURNS
+    the commit hash, or None outside a git checkout
+'''
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=sys.path[0] or None).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+'''
+    Runs the benchmark suite from the command line and writes its results as JSON. Given a baseline, the suite is run with
+    the baseline's settings, the results are compared against it (see compare_results) under a 'comparison' key, and the
+    exit status is 1 if any benchmark regressed or the node signature changed.
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark move generation, evaluation and search')
+    parser.add_argument('--trials', type=int, help='the number of timed runs of each benchmark (5, or as many as the '
+                        'baseline had)')
+    parser.add_argument('--perft-depth', type=int, default=2, help='the perft depth from each position')
+    parser.add_argument('--search-depth', type=int, default=2, help='the MiniMax depth from each position')
+    parser.add_argument('--output', help='the file to write the results to (stdout by default)')
+    parser.add_argument('--quiet', action='store_true', help='do not print the rates to stderr')
+    parser.add_argument('--baseline', help='the results of an earlier run to check these results against')
+    parser.add_argument('--threshold', action='append', help='the largest allowed slowdown, as a fraction, for every '
+                        'benchmark or for one as name=fraction (%.2f by default)' % DEFAULT_THRESHOLD)
+    parser.add_argument('--alpha', type=float, default=0.05, help='the significance level of a slowdown')
+    arguments = parser.parse_args()
+
+    baseline = None
+    if (arguments.baseline):
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        suite = BenchmarkSuite.from_settings(baseline['settings'], arguments.trials)
+    else:
+        suite = BenchmarkSuite(trials=arguments.trials or 5, perft_depth=arguments.perft_depth,
+                               search_depth=arguments.search_depth)
+    results = suite.run(verbose=not arguments.quiet)
+    comparison = None
+    if (baseline is not None):
+        comparison = compare_results(baseline, results, _parse_thresholds(arguments.threshold), arguments.alpha)
+        results['comparison'] = comparison
+    if (arguments.output):
+        with open(arguments.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if (comparison is not None):
+        for name, result in comparison['benchmarks'].items():
+            print('%-16s %+7.1f%% (p %.3f, threshold %.1f%%)%s' % (name, 100 * result['change'], result['p_value'],
+                  100 * result['threshold'], ' REGRESSION' if result['regression'] else ''), file=sys.stderr)
+        if (not comparison['same_nodes']):
+            print('node signature changed: %s -> %s' % (comparison['baseline_signature'], comparison['signature']),
+                  file=sys.stderr)
+        sys.exit(0 if comparison['passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
-from .board_utils import BoardUtils as utils, BoardConstants as constants
+import copy
+import math
+from .board_utils import BoardUtils as utils, BoardConstants as constants, BoardTables as tables
 from .move_generator import MoveGenerator
 from algorithms.evaluations import Evaluations
+from algorithms.eval_cache import EvalCache
 
 
 class Board:
@@ -40,6 +43,15 @@ class Board:
         black_bishops: a 64 bit integer whose bits represent the location of the black bishops
         black_queens: a 64 bit integer whose bits represent the location of the black queens
         black_king: a 64 bit integer whose bits represent the location of the black king
+        eval_cache: an EvalCache of the scores of positions already evaluated, shared by the board and its copies
+        piece_counts: a dictionary mapping each piece character to the number of those pieces on the board
+        phase: the game phase, the sum of the phase weights of every piece on the board (BoardConstants.PHASE_WEIGHTS)
+        white_position_score, black_position_score: the sum of the rank points of every piece of the color
+        undo_stack: the state saved before each move, restored by undo_last
+
+        piece_counts, phase and the position scores are kept up to date by set_piece as pieces come and go, and
+        restored with the rest of the state when a move is undone, so evaluations read them rather than counting pieces
+        pawn_cache: an EvalCache of the pawn structure terms of pawn placements already evaluated, shared likewise
 
         METHODS
         
@@ -55,7 +67,16 @@ class Board:
             returns the character value of the piece in the given square (e.g. K if the piece in the given square is the white king)
 
         move_piece(from_square, to_square)
-            moves the piece in the cell identified by 'from_square' to the cell identified by 'to_square'
+            moves the piece in the cell identified by 'from_square' to the cell identified by 'to_square', saving the state
+            before the move so it can be undone
+            returns None
+
+        undo_last()
+            restores the state from before the last move, including any captured piece
+            returns None
+
+        update_scores()
+            recounts piece_counts, phase and the position scores from the sub-boards
             returns None
 
         get_moves(square)
@@ -69,15 +90,37 @@ class Board:
         get_board_string()
             returns the current state of the board as a string. Any highlighted moves on the highlighted moves board will be represented
             
-        get_score(color,is_winning_board)
-            gets the score of the current board from the perspective of the given color
+        get_score(color,is_winning_board,lower,upper)
+            gets the score of the current board from the perspective of the given color, or a bound on it outside the window
             returns floating point number representing the score
             
         get_king_shelter(color)
-            Updates integer representations of a color's king shelter regions
+            Gets a color's king shelter regions from the precomputed shelter table
+            returns a tuple of integer masks (immediate, diagonal wide, cross wide, sinuous wide)
+
+        get_zobrist_key(color)
+            returns a 64 bit key identifying the piece placement and the color to move
+
+        get_pawn_key()
+            returns a 64 bit key identifying the placement of the pawns alone
+
+        get_position_encoding()
+            returns a compact, picklable tuple of integers (plus the last moves) describing the current position
+
+        set_position_encoding(encoding)
+            restores the position described by an encoding from get_position_encoding
             returns None
     '''
 
+    # each piece character with the name of its sub-board
+    PIECE_BOARDS = ((constants.WHITE_PAWN, 'white_pawns'), (constants.WHITE_ROOK, 'white_rooks'),
+                    (constants.WHITE_KNIGHT, 'white_knights'), (constants.WHITE_BISHOP, 'white_bishops'),
+                    (constants.WHITE_QUEEN, 'white_queens'), (constants.WHITE_KING, 'white_king'),
+                    (constants.BLACK_PAWN, 'black_pawns'), (constants.BLACK_ROOK, 'black_rooks'),
+                    (constants.BLACK_KNIGHT, 'black_knights'), (constants.BLACK_BISHOP, 'black_bishops'),
+                    (constants.BLACK_QUEEN, 'black_queens'), (constants.BLACK_KING, 'black_king'))
+    PIECE_BOARD_NAMES = dict(PIECE_BOARDS)
+
     def __init__(self):
         # total board
         self.black_pieces = 0xffff << constants.BOARD_LENGTH * \
@@ -120,24 +163,27 @@ class Board:
         self.last_move = [1,1,1]
         self.last_last_move = [0,0,0]
         self.last_moves = []
-        self.move_generator = MoveGenerator(self)  
-        self.evaluations = Evaluations(self) 
+        self.move_generator = MoveGenerator()
+        self.evaluations = Evaluations()
+        self.eval_cache = EvalCache()
+        self.pawn_cache = EvalCache(1 << 12)
         
-        # setup king shelter positions
-        self.white_immediate_shelter = 0x0000
-        self.white_diag_wide_shelter = 0x0000
-        self.white_cross_wide_shelter = 0x0000
-        self.white_sinu_wide_shelter = 0x0000    
-        self.black_immediate_shelter = 0x0000
-        self.black_diag_wide_shelter = 0x0000
-        self.black_cross_wide_shelter = 0x0000
-        self.black_sinu_wide_shelter = 0x0000   
         
-        self.get_king_shelter(constants.WHITE)
-        self.get_king_shelter(constants.BLACK)
 
         self.num_moves = 0
-         
+        self.undo_stack = []
+        self.update_scores()
+
+    # copies start with an empty undo stack (they only undo their own moves) and share the board's helpers and caches
+    def __deepcopy__(self, memo):
+        board = Board.__new__(Board)
+        board.__dict__.update(self.__dict__)
+        board.undo_stack = []
+        board.last_moves = list(self.last_moves)
+        board.last_move = copy.copy(self.last_move)
+        board.last_last_move = copy.copy(self.last_last_move)
+        board.piece_counts = dict(self.piece_counts)
+        return board
     
     '''
         Checks whether there is a piece in the given square with the given color
@@ -172,6 +218,15 @@ class Board:
         # set piece location in temporary mask
         mask = 1 << index
 
+        # keep the running scores in step with the sub-boards
+        if piece == constants.EMPTY:
+            if self.board & mask:
+                for board_piece, board_name in Board.PIECE_BOARDS:
+                    if getattr(self, board_name) & mask:
+                        self._add_piece_score(board_piece, index, -1)
+        elif not getattr(self, Board.PIECE_BOARD_NAMES[piece]) & mask:
+            self._add_piece_score(piece, index, 1)
+
         self.board |= mask
         self.board_development &= ~mask
         # check if piece location corresponds with any of the sub-boards
@@ -290,6 +345,7 @@ class Board:
     '''
 
     def move_piece(self, from_square, to_square):
+        self.undo_stack.append(self._get_state())
         if self.num_moves >= 150:
             return 2
         # get pieces
@@ -323,31 +379,88 @@ class Board:
         from_color = self.get_piece_color(from_piece)
         if from_piece == constants.WHITE_PAWN or from_piece == constants.BLACK_PAWN:
             if from_color == self.white_pieces and to_index > 55:
+                self.set_piece(constants.EMPTY, to_square) # the pawn leaves the board as it promotes
                 self.set_piece(constants.WHITE_QUEEN, to_square)
             elif to_index < 8:
+                self.set_piece(constants.EMPTY, to_square)
                 self.set_piece(constants.BLACK_QUEEN, to_square)
 
-        if (from_piece == constants.BLACK_KING):
-            self.get_king_shelter(constants.BLACK)
-        elif (from_piece == constants.WHITE_KING):
-            self.get_king_shelter(constants.WHITE)
         king = self.white_king
         if self.get_piece_color(from_piece) == self.white_pieces:
             king = self.black_king
   
-        if int(self.move_generator._in_mate(king)) and not self.get_moves(utils.singleton_board_to_index(king)):
+        if int(self.move_generator._in_mate(self, king)) and not self.get_moves(utils.singleton_board_to_index(king)):
             return 1
         return 0
         
 
     '''
-        undo the last move made
+        undo the last move made, restoring the whole state saved before it (captured pieces, promoted pawns and running scores
+        included)
 
     '''
     def undo_last(self):
-        if len(self.last_move) != 0:
-            self.move_piece(self.last_move[3],self.last_move[1])
-            self.last_move = tuple()
+        if self.undo_stack:
+            self._set_state(self.undo_stack.pop())
+
+    '''
+        Gets the state of the board that a move can change, for undo_last to restore
+
+        RETURNS
+        a dictionary of the board's attributes, with the mutable ones copied
+    '''
+    def _get_state(self):
+        state = self.__dict__.copy()
+        state['piece_counts'] = dict(self.piece_counts)
+        state['last_moves'] = len(self.last_moves)
+        return state
+
+    '''
+        Restores a state saved by _get_state
+
+        PARAMS
+        state: a dictionary returned by _get_state
+    '''
+    def _set_state(self, state):
+        last_moves, undo_stack = self.last_moves, self.undo_stack
+        del last_moves[state['last_moves']:]
+        self.__dict__.clear()
+        self.__dict__.update(state)
+        self.last_moves, self.undo_stack = last_moves, undo_stack
+
+    '''
+        Recounts the running scores (piece counts, game phase weight and position scores) from the sub-boards. Only needed
+        when the sub-boards are set directly rather than through set_piece.
+    '''
+    def update_scores(self):
+        self.piece_counts = {piece: 0 for piece in constants.ALL_PIECE_TYPES}
+        self.phase = 0
+        self.white_position_score = 0.0
+        self.black_position_score = 0.0
+        for piece, board_name in Board.PIECE_BOARDS:
+            piece_board = getattr(self, board_name) & constants.FULL_BOARD
+            while piece_board:
+                lowest = piece_board & -piece_board
+                self._add_piece_score(piece, lowest.bit_length() - 1, 1)
+                piece_board ^= lowest
+
+    '''
+        Adds or removes a piece's contribution to the running scores
+
+        PARAMS
+        piece: the piece character
+        index: the index of the square the piece is placed on or removed from
+        sign: 1 when the piece is placed, -1 when it is removed
+    '''
+    def _add_piece_score(self, piece, index, sign):
+        if index > 63: # king moves can leave a stray bit past the last square, which update_scores doesn't count either
+            return
+        self.piece_counts[piece] += sign
+        self.phase += sign * constants.PHASE_WEIGHTS[piece]
+        if piece.isupper():
+            self.white_position_score += sign * tables.RANK_SCORES[constants.WHITE][index]
+        else:
+            self.black_position_score += sign * tables.RANK_SCORES[constants.BLACK][index]
 
 
     '''
@@ -358,7 +471,7 @@ class Board:
     '''
 
     def get_moves(self, square, is_swapped = False):
-        return self.move_generator.generate_moves(square, is_swapped)
+        return self.move_generator.generate_moves(self, square, is_swapped)
     
     '''
         determines the given piece's color
@@ -431,19 +544,34 @@ class Board:
 
 
     '''
-        Gets the score of the current board from a given color's perspective based on evaluation functions from the Evaluations helper
+        Gets the score of the current board from a given color's perspective based on evaluation functions from the Evaluations helper.
+        Scores are looked up in the evaluation cache first, keyed by the Zobrist key for the color along with the rest of the state the
+        evaluation reads (development, en passant and the pieces that made the last two moves), so a position is only evaluated once.
+
+        Given a window, the evaluation may stop early and return a bound outside the window instead of the exact score (see
+        Evaluations.get_bounded_score). Only exact scores are cached.
         
         PARAMS
         color: the color from whose perspective we are scoring the board
         winning_board: integer, where 1 indicates this board is a winning board (checkmate), and 2 indicates a stalemate (>max allowable moves)
+        lower: the score at or below which the exact score isn't needed
+        upper: the score at or above which the exact score isn't needed
         
     '''
     
-    def get_score(self, color, winning_board):
-        return self.evaluations.get_score(color, winning_board)
+    def get_score(self, color, winning_board, lower=-math.inf, upper=math.inf):
+        # the cache is shared by every copy of the board, which may score with other weights
+        key = (self.get_zobrist_key(color), winning_board, self.board_development, self.en_passant_board,
+               tuple(self.last_move[:1]), tuple(self.last_last_move[:1]), self.evaluations.weights_key)
+        score = self.eval_cache.probe(key)
+        if score is None:
+            score, exact = self.evaluations.get_bounded_score(self, color, winning_board, lower, upper)
+            if exact:
+                self.eval_cache.store(key, score)
+        return score
         
     '''
-        Updates the integer representation of the king's shelter regions for a given color, given the king's position and the king's distance to board edges. 
+        Gets the king's shelter regions for a given color, looked up by the king's position in the precomputed shelter table.
         The king's shelter is divided into four regions:
             The immediate shelter consists of the squares adjacent to the king.
             The diagonal wide shelter consists of diagonals two squares apart from the king.
@@ -452,117 +580,100 @@ class Board:
             
         PARAMS
         color: the color whose king this method finds the shelter of
+
+        RETURNS
+        a tuple of integer masks (immediate shelter, diagonal wide shelter, cross wide shelter, sinuous wide shelter), all empty
+        if the color doesn't have exactly one king on the board
     '''
     
-    def get_king_shelter(self, color):        
-        if (color == constants.WHITE):
-            self.white_immediate_shelter = 0x0000 # clear integer representations for each shelter region
-            self.white_diag_wide_shelter = 0x0000
-            self.white_cross_wide_shelter = 0x0000
-            self.white_sinu_wide_shelter = 0x0000
-            
-            if (self.white_king.bit_count() != 1): # if there is no king, do not attempt to evaluate
-                return
-            
-            index = utils.singleton_board_to_index(self.white_king) # get the index of the given color's king
-            if ((index-1)%8<7): # if there is a square left of king
-                self.white_immediate_shelter |= 1 << (index-1) # add left square to immediate shelter mask
-                if ((index-2)%8<7): self.white_cross_wide_shelter |= 1 << (index-2) # add left left
-            if ((index+1)%8>0): # if the right square right of king
-                self.white_immediate_shelter |= 1 << (index+1) # add right
-                if ((index+2)%8>0): self.white_cross_wide_shelter |= 1 << (index+2) # add right right
-            if ((index-8)>-1): # check the level below the king
-                self.white_immediate_shelter |= 1 << (index-8) # below
-                if ((index-8-1)%8<7):
-                    self.white_immediate_shelter |= 1 << (index-8-1) # bottom left corner
-                    if ((index-8-2)%8<7):
-                        self.white_sinu_wide_shelter |= 1 << (index-8-2) # bottom left left
-                if ((index-8+1)%8>0):
-                    self.white_immediate_shelter |= 1 << (index-8+1) # bottom right
-                    if ((index-8+2)%8>0):
-                        self.white_sinu_wide_shelter |= 1 << (index-8+2) # bottom right right
-            if ((index-16)>-1): # check two levels below the king
-                self.white_cross_wide_shelter |= 1 << (index-16) 
-                if ((index-16-1)%8<7): # bottom bottom left
-                    self.white_sinu_wide_shelter |= 1 << (index-16-1)
-                    if ((index-16-2)%8<7): # bottom bottom left left
-                        self.white_diag_wide_shelter |= 1 << (index-16-2)
-                if ((index-16+1)%8>0): # bottom bottom right
-                    self.white_sinu_wide_shelter |= 1 << (index-16+1)
-                    if ((index-16+2)%8>0): # bottom bottom right right
-                        self.white_diag_wide_shelter |= 1 << (index-16+2)
-            if ((index+8)<56): # level above king
-                self.white_immediate_shelter |= 1 << (index+8)
-                if ((index+8-1)%8<7):
-                    self.white_immediate_shelter |= 1 << (index+8-1) # top left corner
-                    if ((index+8-2)%8<7):
-                        self.white_sinu_wide_shelter |= 1 << (index+8-2) # top left left
-                if ((index+8+1)%8>0):
-                    self.white_immediate_shelter |= 1 << (index+8+1) # top right
-                    if ((index+8+2)%8>0):
-                        self.white_sinu_wide_shelter |= 1 << (index+8+2) # top right right
-            if ((index+16)<56): # two levels above king
-                self.white_cross_wide_shelter |= 1 << (index+16) 
-                if ((index+16-1)%8<7): # top top left
-                    self.white_sinu_wide_shelter |= 1 << (index+16-1)
-                    if ((index+16-2)%8<7): # top top left left
-                        self.white_diag_wide_shelter |= 1 << (index+16-2)
-                if ((index+16+1)%8>0): # top top right
-                    self.white_sinu_wide_shelter |= 1 << (index+16+1)
-                    if ((index+16+2)%8>0): # top top right right
-                        self.white_diag_wide_shelter |= 1 << (index+16+2)
-        else:
-            self.black_immediate_shelter = 0x0000 # clear integer representations of the shelter
-            self.black_diag_wide_shelter = 0x0000
-            self.black_cross_wide_shelter = 0x0000
-            self.black_sinu_wide_shelter = 0x0000
-            if (self.black_king.bit_count() != 1): # if there is no king, do not attempt to eval
-                return
-            
-            index = utils.singleton_board_to_index(self.black_king) # get index of the king
-            if ((index-1)%8<7): # check left of king
-                self.black_immediate_shelter |= 1 << (index-1) # left 
-                if ((index-2)%8<7): self.black_cross_wide_shelter |= 1 << (index-2) # left left
-            if ((index+1)%8>0): # check right of king
-                self.black_immediate_shelter |= 1 << (index+1) # right
-                if ((index+2)%8>0): self.black_cross_wide_shelter |= 1 << (index+2) # right right
-            if ((index-8)>-1): # level below king
-                self.black_immediate_shelter |= 1 << (index-8)
-                if ((index-8-1)%8<7):
-                    self.black_immediate_shelter |= 1 << (index-8-1) # bottom left corner
-                    if ((index-8-2)%8<7):
-                        self.black_sinu_wide_shelter |= 1 << (index-8-2) # bottom left left
-                if ((index-8+1)%8>0):
-                    self.black_immediate_shelter |= 1 << (index-8+1) # bottom right
-                    if ((index-8+2)%8>0):
-                        self.black_sinu_wide_shelter |= 1 << (index-8+2) # bottom right right
-            if ((index-16)>-1): # two levels below king
-                self.black_cross_wide_shelter |= 1 << (index-16) 
-                if ((index-16-1)%8<7): # bottom bottom left
-                    self.black_sinu_wide_shelter |= 1 << (index-16-1)
-                    if ((index-16-2)%8<7): # bottom bottom left left
-                        self.black_diag_wide_shelter |= 1 << (index-16-2)
-                if ((index-16+1)%8>0): # bottom bottom right
-                    self.black_sinu_wide_shelter |= 1 << (index-16+1)
-                    if ((index-16+2)%8>0): # bottom bottom right right
-                        self.black_diag_wide_shelter |= 1 << (index-16+2)
-            if ((index+8)<56): # level above king
-                self.black_immediate_shelter |= 1 << (index+8)
-                if ((index+8-1)%8<7):
-                    self.black_immediate_shelter |= 1 << (index+8-1) # top left corner
-                    if ((index+8-2)%8<7):
-                        self.black_sinu_wide_shelter |= 1 << (index+8-2) # top left left
-                if ((index+8+1)%8>0):
-                    self.black_immediate_shelter |= 1 << (index+8+1) # top right
-                    if ((index+8+2)%8>0):
-                        self.black_sinu_wide_shelter |= 1 << (index+8+2) # top right right
-            if ((index+16)<56): # two levels above king
-                self.black_cross_wide_shelter |= 1 << (index+16) 
-                if ((index+16-1)%8<7): # top top left
-                    self.black_sinu_wide_shelter |= 1 << (index+16-1)
-                    if ((index+16-2)%8<7): # top top left left
-                        self.black_diag_wide_shelter |= 1 << (index+16-2)
-                if ((index+16+1)%8>0): # top top right
-                    self.black_sinu_wide_shelter |= 1 << (index+16+1)
-                    if ((index+16+2)%8>0): # top top right right
-                        self.black_diag_wide_shelter |= 1 << (index+16+2)
+    def get_king_shelter(self, color):
+        king = self.white_king if color == constants.WHITE else self.black_king
+        if (king & (king - 1) or not king & constants.FULL_BOARD): # no king, or more than one
+            return tables.NO_SHELTER
+        return tables.KING_SHELTERS[king.bit_length() - 1]
+
+    '''
+        Gets the Zobrist key of the current position: the xor of a random key for every (piece, square) pair on the board,
+        mixed with a side key when black is to move. Equal placements give equal keys regardless of the moves that led to them.
+
+        PARAMS
+        color: the color to move
+
+        RETURNS
+        a 64 bit integer key for the position
+    '''
+
+    def get_zobrist_key(self, color):
+        key = tables.ZOBRIST_BLACK_TO_MOVE if color == constants.BLACK else 0
+        zobrist_keys = tables.ZOBRIST_KEYS
+        for piece_board, piece in ((self.white_pawns, constants.WHITE_PAWN), (self.white_rooks, constants.WHITE_ROOK),
+                                   (self.white_knights, constants.WHITE_KNIGHT), (self.white_bishops, constants.WHITE_BISHOP),
+                                   (self.white_queens, constants.WHITE_QUEEN), (self.white_king, constants.WHITE_KING),
+                                   (self.black_pawns, constants.BLACK_PAWN), (self.black_rooks, constants.BLACK_ROOK),
+                                   (self.black_knights, constants.BLACK_KNIGHT), (self.black_bishops, constants.BLACK_BISHOP),
+                                   (self.black_queens, constants.BLACK_QUEEN), (self.black_king, constants.BLACK_KING)):
+            piece_keys = zobrist_keys[piece]
+            piece_board &= constants.FULL_BOARD # ignore any stray bits shifted past the last square
+            while piece_board:
+                lowest = piece_board & -piece_board
+                key ^= piece_keys[lowest.bit_length() - 1]
+                piece_board ^= lowest
+        return key
+
+    '''
+        Gets a Zobrist key of the pawns alone, used to look up pawn structure evaluations that only change when a pawn moves
+        or is captured
+
+        RETURNS
+        a 64 bit integer key for the pawn placement
+    '''
+
+    def get_pawn_key(self):
+        key = 0
+        zobrist_keys = tables.ZOBRIST_KEYS
+        for piece_board, piece in ((self.white_pawns, constants.WHITE_PAWN), (self.black_pawns, constants.BLACK_PAWN)):
+            piece_keys = zobrist_keys[piece]
+            piece_board &= constants.FULL_BOARD
+            while piece_board:
+                lowest = piece_board & -piece_board
+                key ^= piece_keys[lowest.bit_length() - 1]
+                piece_board ^= lowest
+        return key
+
+    '''
+        Encodes the current position as a flat tuple, so it can be cheaply sent to another process or stored. Only the state the
+        move generator and evaluations read is kept: the twelve sub-boards, the development board, the en passant board, the
+        move count and the last two moves. Aggregate boards and king shelters are derived again when the encoding is restored.
+
+        RETURNS
+        a tuple describing the current position
+    '''
+
+    def get_position_encoding(self):
+        return (self.white_pawns, self.white_rooks, self.white_knights, self.white_bishops, self.white_queens, self.white_king,
+                self.black_pawns, self.black_rooks, self.black_knights, self.black_bishops, self.black_queens, self.black_king,
+                self.board_development, self.en_passant_board, self.num_moves,
+                tuple(self.last_move), tuple(self.last_last_move))
+
+    '''
+        Restores a position encoded by get_position_encoding, replacing the current position
+
+        PARAMS
+        encoding: a tuple returned by get_position_encoding
+    '''
+
+    def set_position_encoding(self, encoding):
+        (self.white_pawns, self.white_rooks, self.white_knights, self.white_bishops, self.white_queens, self.white_king,
+         self.black_pawns, self.black_rooks, self.black_knights, self.black_bishops, self.black_queens, self.black_king,
+         self.board_development, self.en_passant_board, self.num_moves,
+         self.last_move, self.last_last_move) = encoding
+
+        self.white_pieces = self.white_pawns | self.white_rooks | self.white_knights | \
+            self.white_bishops | self.white_queens | self.white_king
+        self.black_pieces = self.black_pawns | self.black_rooks | self.black_knights | \
+            self.black_bishops | self.black_queens | self.black_king
+        self.board = self.white_pieces | self.black_pieces
+        self.highlight_board = 0
+        self.last_moves = []
+        self.undo_stack = []
+        self.update_scores()
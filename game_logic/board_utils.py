@@ -1,4 +1,6 @@
 import math
+import random
+from algorithms.eval_weights import load_eval_weights
 
 
 class BoardUtils:
@@ -53,6 +55,7 @@ class BoardConstants:
     # numeric constants
     BOARD_LENGTH = 8
     ACROSS_BOARD = BOARD_LENGTH ** 2 - BOARD_LENGTH
+    FULL_BOARD = (1 << BOARD_LENGTH ** 2) - 1
 
     # piece constants
     # empty and highlight pieces
@@ -97,3 +100,222 @@ class BoardConstants:
     # players
     WHITE = 0
     BLACK = 1
+
+    # base piece strengths, mirroring the base point values used by the evaluations
+    PIECE_VALUES = {
+        WHITE_PAWN: 1.0, BLACK_PAWN: 1.0,
+        WHITE_KNIGHT: 3.0, BLACK_KNIGHT: 3.0,
+        WHITE_BISHOP: 3.0, BLACK_BISHOP: 3.0,
+        WHITE_ROOK: 4.5, BLACK_ROOK: 4.5,
+        WHITE_QUEEN: 9.0, BLACK_QUEEN: 9.0,
+        WHITE_KING: 100.0, BLACK_KING: 100.0,
+        EMPTY: 0.0
+    }
+
+    # game phase weight of each piece: the phase falls from MAX_PHASE (every minor and major piece on the board) towards 0
+    # (bare kings and pawns) as pieces are traded
+    PHASE_WEIGHTS = {
+        WHITE_PAWN: 0, BLACK_PAWN: 0,
+        WHITE_KNIGHT: 1, BLACK_KNIGHT: 1,
+        WHITE_BISHOP: 1, BLACK_BISHOP: 1,
+        WHITE_ROOK: 2, BLACK_ROOK: 2,
+        WHITE_QUEEN: 4, BLACK_QUEEN: 4,
+        WHITE_KING: 0, BLACK_KING: 0
+    }
+    MAX_PHASE = 24
+
+
+
+# (row step, column step) for each ray direction, in the order north, east, north east, north west, south, west,
+# south west, south east
+RAY_STEPS = [(1, 0), (0, 1), (1, 1), (1, -1), (-1, 0), (0, -1), (-1, -1), (-1, 1)]
+# points for a piece on each rank, from the first rank to the eighth relative to the piece's color, from the evaluation
+# weights (boards keep each color's sum of them up to date)
+RANK_POINTS = tuple(load_eval_weights()['rank_points'])
+KNIGHT_STEPS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+
+# seeded so that every process derives the same Zobrist keys (positions are shared between processes by key)
+_ZOBRIST_RANDOM = random.Random(0x4b6e69676874)
+
+'''
+    builds the mask of squares reached from the given index by each of the given (row, column) steps
+
+    PARAMS
+    index: the square the steps start from
+    steps: a list of (row step, column step) pairs
+
+    RETURNS
+    an integer mask of the on-board squares reached by the steps
+'''
+def _step_mask(index, steps):
+    row, col = index // 8, index % 8
+    mask = 0
+    for row_step, col_step in steps:
+        to_row, to_col = row + row_step, col + col_step
+        if 0 <= to_row < 8 and 0 <= to_col < 8:
+            mask |= 1 << (to_row * 8 + to_col)
+    return mask
+
+'''
+    builds the shelter regions of a king on the given index (see Board.get_king_shelter). As they always have, the shelters
+    leave out the eighth rank unless the king is on it
+
+    PARAMS
+    index: the square of the king
+
+    RETURNS
+    a tuple (immediate shelter, diagonal wide shelter, cross wide shelter, sinuous wide shelter) of integer masks
+'''
+def _shelter_masks(index):
+    below_eighth_rank = (1 << 56) - 1 if index < 56 else BoardConstants.FULL_BOARD
+    return (_step_mask(index, RAY_STEPS) & below_eighth_rank,
+            _step_mask(index, [(2, 2), (2, -2), (-2, 2), (-2, -2)]) & below_eighth_rank,
+            _step_mask(index, [(0, 2), (0, -2), (2, 0), (-2, 0)]) & below_eighth_rank,
+            _step_mask(index, KNIGHT_STEPS) & below_eighth_rank)
+
+'''
+    builds the mask of every square along a ray leaving the given index, up to the board edge
+
+    PARAMS
+    index: the square the ray starts from (not included in the ray)
+    step: a (row step, column step) pair
+
+    RETURNS
+    an integer mask of the ray
+'''
+def _ray_mask(index, step):
+    row_step, col_step = step
+    row, col = index // 8 + row_step, index % 8 + col_step
+    mask = 0
+    while 0 <= row < 8 and 0 <= col < 8:
+        mask |= 1 << (row * 8 + col)
+        row, col = row + row_step, col + col_step
+    return mask
+
+
+class BoardTables:
+    '''
+        Precomputed attack tables, built once at import time so attack sets can be found with table lookups
+        rather than by walking the board square by square
+
+        ATTRIBUTES
+
+        KNIGHT_ATTACKS: a list of 64 integer masks, the squares a knight on each index attacks
+        KING_ATTACKS: a list of 64 integer masks, the squares a king on each index attacks
+        PAWN_ATTACKS: a pair of lists (white, black) of 64 integer masks, the squares a pawn of that color on each index attacks
+        RAYS: a list of 8 lists of 64 integer masks, the full ray leaving each index in each direction (see RAY_STEPS)
+        ZOBRIST_KEYS: a dictionary mapping each piece character to a list of 64 random 64 bit keys, one per square
+        ZOBRIST_BLACK_TO_MOVE: a random 64 bit key mixed into position keys when black is to move
+        KING_SHELTERS: a list of 64 tuples (immediate, diagonal wide, cross wide, sinuous wide), the shelter regions of a king
+            on each index
+        NO_SHELTER: the shelter regions of a missing king, all empty
+        FILE_A, FILE_H: integer masks of the first and last files
+        RANK_SCORES: a pair of lists (white, black) of 64 points, the rank score of a piece of that color on each index
+
+        METHODS
+
+        rook_attacks(index, occupancy)
+            returns an integer mask of the squares a rook on the given index attacks, given an occupancy mask
+
+        bishop_attacks(index, occupancy)
+            returns an integer mask of the squares a bishop on the given index attacks, given an occupancy mask
+
+        queen_attacks(index, occupancy)
+            returns an integer mask of the squares a queen on the given index attacks, given an occupancy mask
+
+        north_fill(board), south_fill(board)
+            returns the given mask with every set square smeared towards the eighth (north) or first (south) rank
+
+        file_fill(board)
+            returns the mask of every file holding a set square of the given mask
+
+        shift_east(board), shift_west(board)
+            returns the given mask moved one file towards the h (east) or a (west) file, dropping squares that fall off the board
+    '''
+
+    NORTH, EAST, NORTH_EAST, NORTH_WEST, SOUTH, WEST, SOUTH_WEST, SOUTH_EAST = range(8)
+
+    # (directions in which indexes increase, directions in which indexes decrease)
+    ROOK_DIRECTIONS = ((NORTH, EAST), (SOUTH, WEST))
+    BISHOP_DIRECTIONS = ((NORTH_EAST, NORTH_WEST), (SOUTH_WEST, SOUTH_EAST))
+
+    KNIGHT_ATTACKS = [_step_mask(i, KNIGHT_STEPS) for i in range(64)]
+    KING_ATTACKS = [_step_mask(i, RAY_STEPS) for i in range(64)]
+    PAWN_ATTACKS = ([_step_mask(i, [(1, -1), (1, 1)]) for i in range(64)],
+                    [_step_mask(i, [(-1, -1), (-1, 1)]) for i in range(64)])
+    RAYS = [[_ray_mask(i, step) for i in range(64)] for step in RAY_STEPS]
+
+    ZOBRIST_KEYS = {piece: [_ZOBRIST_RANDOM.getrandbits(64) for _ in range(64)]
+                    for piece in sorted(BoardConstants.ALL_PIECE_TYPES)}
+    ZOBRIST_BLACK_TO_MOVE = _ZOBRIST_RANDOM.getrandbits(64)
+
+    KING_SHELTERS = [_shelter_masks(i) for i in range(64)]
+    NO_SHELTER = (0, 0, 0, 0)
+
+    FILE_A = 0x0101010101010101
+    FILE_H = FILE_A << 7
+
+    # (white, black) lists of the rank points of a piece of that color on each index
+    RANK_SCORES = ([RANK_POINTS[i // 8] for i in range(64)], [RANK_POINTS[7 - i // 8] for i in range(64)])
+
+    '''
+        gets the squares a slider on the given index attacks along the given directions. For each ray, the first blocker is the
+        lowest set bit of the blocked squares on rays that increase in index and the highest set bit on rays that decrease, and
+        everything past the blocker is removed by xoring the blocker's own ray in the same direction
+
+        PARAMS
+        index: the square of the sliding piece
+        occupancy: an integer mask of every occupied square
+        directions: a pair (increasing directions, decreasing directions)
+
+        RETURNS
+        an integer mask of the attacked squares, including the first blocker of each ray
+    '''
+    def _slider_attacks(index, occupancy, directions):
+        rays = BoardTables.RAYS
+        attacks = 0
+        increasing, decreasing = directions
+        for direction in increasing:
+            ray = rays[direction][index]
+            blockers = ray & occupancy
+            if blockers:
+                ray ^= rays[direction][(blockers & -blockers).bit_length() - 1]
+            attacks |= ray
+        for direction in decreasing:
+            ray = rays[direction][index]
+            blockers = ray & occupancy
+            if blockers:
+                ray ^= rays[direction][blockers.bit_length() - 1]
+            attacks |= ray
+        return attacks
+
+    def rook_attacks(index, occupancy):
+        return BoardTables._slider_attacks(index, occupancy, BoardTables.ROOK_DIRECTIONS)
+
+    def bishop_attacks(index, occupancy):
+        return BoardTables._slider_attacks(index, occupancy, BoardTables.BISHOP_DIRECTIONS)
+
+    def queen_attacks(index, occupancy):
+        return BoardTables._slider_attacks(index, occupancy, BoardTables.ROOK_DIRECTIONS) | \
+            BoardTables._slider_attacks(index, occupancy, BoardTables.BISHOP_DIRECTIONS)
+
+    def north_fill(board):
+        board |= board << 8
+        board |= board << 16
+        board |= board << 32
+        return board & BoardConstants.FULL_BOARD
+
+    def south_fill(board):
+        board |= board >> 8
+        board |= board >> 16
+        board |= board >> 32
+        return board
+
+    def file_fill(board):
+        return BoardTables.north_fill(BoardTables.south_fill(board))
+
+    def shift_east(board):
+        return (board << 1) & ~BoardTables.FILE_A & BoardConstants.FULL_BOARD
+
+    def shift_west(board):
+        return (board >> 1) & ~BoardTables.FILE_H
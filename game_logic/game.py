@@ -73,6 +73,9 @@ class Chess:
         self.checkbox4_checked = True  # use evaluation functions
 
         self.minimax = MiniMax()
+        self.search = None  # the AI's search in progress, if any
+        self.ponder = None  # the AI's search on the human's time, if any
+        self.principal_variation = []  # the line the AI expected when it last moved
 
     def play(self):
         # Start the game loop
@@ -80,10 +83,12 @@ class Chess:
             # Handle events
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.stop_search()
                     pygame.quit()
                     quit()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
+                        self.stop_search()
                         self.player_state = "selection"
                         self.current_player_color = constants.WHITE
                         self.player_moves = []
@@ -156,11 +161,9 @@ class Chess:
                     self.draw_game()
                     move = []
                     if self.checkbox2_checked and self.current_player_color == constants.BLACK:
-                        move = self.minimax.get_next_move(
-                            self.board, constants.BLACK)
+                        move = self.poll_search(constants.BLACK)
                     elif self.checkbox3_checked:
-                        move = self.minimax.get_next_move(
-                            self.board, self.current_player_color)
+                        move = self.poll_search(self.current_player_color)
                     else:
                         if event.type == pygame.MOUSEBUTTONDOWN:
                             mouse_position = pygame.mouse.get_pos()
@@ -186,6 +189,10 @@ class Chess:
                                         move = self.player_focus, position
                                         # verify checkmate and switch state if true
                     if move:
+                        # the human moved while the AI pondered: keep the ponder search if it guessed the move
+                        if self.ponder is not None:
+                            self.search = self.ponder.ponder_hit(move)
+                            self.ponder = None
 
                         is_mate = self.board.move_piece(move[0], move[1])
                         print(self.board.get_piece(move[1]), move[0], move[1])
@@ -209,6 +216,11 @@ class Chess:
                         self.player_moves = []
                         self.player_focus = None
                         self.player_state = "selection"
+
+                        # the AI just moved against a human, so search the human's expected reply while they think
+                        if self.checkbox2_checked and self.current_player_color == constants.WHITE and not is_mate:
+                            self.ponder = self.minimax.start_ponder(
+                                self.board, constants.BLACK, self.principal_variation)
                     # https://stackoverflow.com/questions/18839039/how-to-wait-some-time-in-pygame
                     # pygame.display.update()
                     # pygame.event.pump()
@@ -219,9 +231,34 @@ class Chess:
                     self.draw_game()
                     self.draw_winner()
 
+            # the game state only updates on events, so wake it up once the AI's search has a move ready
+            if self.search is not None and self.search.is_done():
+                pygame.event.post(pygame.event.Event(pygame.USEREVENT))
+
             # Update the display
             pygame.display.update()
 
+    # starts the AI's search in the background, or returns its move once done (an empty list until then),
+    # so the window keeps rendering while the AI thinks
+    def poll_search(self, color):
+        if self.search is None:
+            self.search = self.minimax.start_search(self.board, color)
+            return []
+        if not self.search.is_done():
+            return []
+        move = self.search.result()
+        self.principal_variation = self.search.principal_variation
+        self.search = None
+        return move
+
+    def stop_search(self):
+        if self.search is not None:
+            self.search.stop()
+            self.search = None
+        if self.ponder is not None:
+            self.ponder.stop()
+            self.ponder = None
+
     def draw_start_menu(self):
         # Create the font object
         title_font = pygame.font.SysFont(None, 50)
@@ -280,7 +317,7 @@ class Chess:
         self.window.blit(
             notif_text, (self.WINDOW_SIZE[0] // 2 - notif_text.get_width()//2, 50))
 
-        instructions_string = "Use options to toggle between the following game types: \n1) Human vs Human - this allows two humans to play against each other\n2) Human vs AI - this pits white (human) vs black (the AI)\n3) AI vs AI - this pits two AIs against each other (buggy)\n\n\nThis chess engine is in beta, so there are some known bugs:\n1) depending on the OS running the game, AI vs AI may be rendered very slowly\n2) minimizing the screen will freeze rendering despite game continuation\nsee: https://github.com/pygame/pygame/issues/2011\n3) when playing human vs AI, the game will momentarily freeze before the AI makes a move. This is the AI loading.\n4) AI vs AI will occasionally freeze while the game continues in the background. This is a pygames threading issue that we have not figured out how to resolve yet. Instead, use the console version of the game, which is automatically AI vs AI."
+        instructions_string = "Use options to toggle between the following game types: \n1) Human vs Human - this allows two humans to play against each other\n2) Human vs AI - this pits white (human) vs black (the AI)\n3) AI vs AI - this pits two AIs against each other (buggy)\n\n\nThis chess engine is in beta, so there are some known bugs:\n1) depending on the OS running the game, AI vs AI may be rendered very slowly\n2) minimizing the screen will freeze rendering despite game continuation\nsee: https://github.com/pygame/pygame/issues/2011\n3) AI vs AI will occasionally freeze while the game continues in the background. This is a pygames threading issue that we have not figured out how to resolve yet. Instead, use the console version of the game, which is automatically AI vs AI."
         instructions_rect = pygame.Rect((20, 100, 400, 350))
         rendered_text = render_textrect(
             instructions_string, notif_font, instructions_rect, self.BLACK, self.WHITE)
@@ -1,4 +1,4 @@
-from .board_utils import BoardUtils as utils, BoardConstants as constants
+from .board_utils import BoardUtils as utils, BoardConstants as constants, BoardTables as tables
 
 
 class MoveGenerator:
@@ -10,39 +10,40 @@ class MoveGenerator:
 
         ATTRIBUTES
 
-        board: the integer representation of the current board
-        opponent: the integer representation of the opponent pieces
-        player: the integer representation of the player pieces
+        piece_move_map: maps each piece type to the method generating its moves
+
+        The generator holds no board state of its own: the board, and the player and opponent piece sets, are passed to
+        every method, so one generator can be shared by any number of boards (and threads) at once.
 
 
 
         METHODS
 
-        generate_moves(square)
+        generate_moves(board, square, is_swapped)
             generates the moves the piece in the given square could take
             returns an integer mask representation of the possible moves the piece could take
 
-        _get_pawn_moves(index)
+        _get_pawn_moves(board, index, player, opponent)
             gets the possible pawn moves at the given index
             return those moves as an integer mask
 
-        _get_rook_moves(index)
+        _get_rook_moves(board, index, player, opponent)
            gets the possible rook moves at the given index
            returns those moves as an integer mask
 
-        _get_knight_moves(index)
+        _get_knight_moves(board, index, player, opponent)
             gets the possible knight moves at the given index
             returns those moves as an integer mask
 
-        _get_bishop_moves(index)
+        _get_bishop_moves(board, index, player, opponent)
             gets the possible bishop moves at the given index
             returns those moves as an integer mask
 
-        _get_queen_moves(index)
+        _get_queen_moves(board, index, player, opponent)
             gets the possible queen moves at the given index
             returns those moves as an integer mask
 
-        _get_king_moves(index)
+        _get_king_moves(board, index, player, opponent)
             gets the possible king moves at the given index
             returns those moves as an integer mask
 
@@ -50,11 +51,11 @@ class MoveGenerator:
             identifies if the piece in from_index is next to the piece in the to_index (board-wise)
             returns True if the from_index is next to to_index, False otherwise
 
-        _is_empty(square)
+        _is_empty(board, square)
             determines if there is a piece in the given square
             return True if the square is empty, False otherwise
 
-        _is_opponent(square)
+        _is_opponent(square, opponent)
             determines if the piece in the given square is an opponent to the current player
             returns True if the piece is an opponent piece, False otherwise
 
@@ -66,16 +67,25 @@ class MoveGenerator:
             determines the color the given piece's opponent
             returns the piece's opponent color
 
+        static_exchange_eval(board, from_index, to_index)
+            plays out the sequence of captures on to_index started by the piece on from_index, without moving pieces on the board
+            returns the material balance of the exchange for the side making the first capture
+
+        _get_attackers(board, index, occupancy)
+            finds every piece of either color attacking the given index, given an occupancy mask
+            returns an integer mask of the attacking pieces
+
+        _get_least_valuable_attacker(board, attackers, color)
+            finds the least valuable piece of the given color in the given attackers mask
+            returns a pair (singleton mask of the piece, piece strength)
+
         _get_moves_paths(from_square, moves)
             parses the moves of a given square into a list of of tuples 
             returns a list such that each element is a tuple (a, b) 
             where a is the square from which the piece will move from and b is a square that the piece could move to
     '''
 
-    def __init__(self, board):
-        self.board = board
-        self.opponent = board.black_pieces
-        self.player = board.white_pieces
+    def __init__(self):
         self.piece_move_map = {
             constants.WHITE_BISHOP: self._get_bishop_moves,
             constants.WHITE_PAWN: self._get_pawn_moves,
@@ -85,46 +95,51 @@ class MoveGenerator:
             constants.WHITE_KING: self._get_king_moves
         }
 
+    # the generator holds no board state, so copies of a board can share it
+    def __deepcopy__(self, memo):
+        return self
+
     '''
         gets all the possible moves the piece in the given square could possibly make, if any
         
         PARAMS
+        board: the Board the piece is on
         square: an alphanumeric representation of the cell location on the board
 
         RETURNS
         an integer map of the possible moves the piece at the given square could make
     '''
 
-    def generate_moves(self, square, is_swapped=False):
+    def generate_moves(self, board, square, is_swapped=False):
         # convert square to index and get piece
         index = square
         if type(square) == str:
             index = utils.square_to_index(square)
-        piece = self.board.get_piece(index)
+        piece = board.get_piece(index)
 
         # initialize player and opponent piece sets
         if (is_swapped):
-            self.opponent = self.board.get_piece_color(piece)
-            self.player = self.board.get_opponent_piece_color(piece)
+            opponent = board.get_piece_color(piece)
+            player = board.get_opponent_piece_color(piece)
         else:
-            self.opponent = self.board.get_opponent_piece_color(piece)
-            self.player = self.board.get_piece_color(piece)
+            opponent = board.get_opponent_piece_color(piece)
+            player = board.get_piece_color(piece)
 
         move_board = 0
         # Generate moves based on piece type and update move_board accordingly
         if piece == constants.WHITE_PAWN or piece == constants.BLACK_PAWN:
-            move_board = self._get_pawn_moves(index)
+            move_board = self._get_pawn_moves(board, index, player, opponent)
         elif piece == constants.WHITE_KNIGHT or piece == constants.BLACK_KNIGHT:
-            move_board = self._get_knight_moves(index)
+            move_board = self._get_knight_moves(board, index, player, opponent)
         elif piece == constants.WHITE_BISHOP or piece == constants.BLACK_BISHOP:
-            move_board = self._get_bishop_moves(index)
+            move_board = self._get_bishop_moves(board, index, player, opponent)
         elif piece == constants.WHITE_ROOK or piece == constants.BLACK_ROOK:
-            move_board = self._get_rook_moves(index)
+            move_board = self._get_rook_moves(board, index, player, opponent)
         elif piece == constants.WHITE_QUEEN or piece == constants.BLACK_QUEEN:
-            move_board = self._get_queen_moves(index)
+            move_board = self._get_queen_moves(board, index, player, opponent)
         elif piece == constants.WHITE_KING or piece == constants.BLACK_KING:
-            move_board = self._get_king_moves(index)
-        king_board = self.board.white_king if self.player == self.board.white_pieces else self.board.black_king
+            move_board = self._get_king_moves(board, index, player, opponent)
+        king_board = board.white_king if player == board.white_pieces else board.black_king
         if king_board == 0:
             return 0
         king_index = utils.singleton_board_to_index(king_board)
@@ -134,13 +149,13 @@ class MoveGenerator:
 
         # check if the king is in check
         # 0 is attacking piece, 1 is line of attack
-        is_king_in_check = self._in_check(king_index, king_index)
+        is_king_in_check = self._in_check(board, king_index, king_index, player, opponent)
 
         if is_king_in_check[0]:
             # get attacking index/piece
             attacking_index = utils.singleton_board_to_index(
                 is_king_in_check[0])
-            attacking_piece = self.board.get_piece(attacking_index)
+            attacking_piece = board.get_piece(attacking_index)
 
             # multiple attacking pieces, double check is impossible to get out of
             if attacking_index < 0:
@@ -148,7 +163,7 @@ class MoveGenerator:
 
             # get line of attack
             attacking_moves = self.piece_move_map[attacking_piece.upper()](
-                attacking_index)
+                board, attacking_index, player, opponent)
             blocking_moves = is_king_in_check[1] & (
                 is_king_in_check[0] | attacking_moves)
             actual_moves = move_board
@@ -161,7 +176,7 @@ class MoveGenerator:
                 move_board |= actual_moves
         else:
             # verify that the piece is not pinned, and handle accordingly if it is
-            is_piece_pinned = self._is_pinned(index)
+            is_piece_pinned = self._is_pinned(board, index)
             if is_piece_pinned[1]:
                 # only moves available are within the line of attack or the attacking piece
                 move_board &= is_piece_pinned[1]
@@ -174,58 +189,61 @@ class MoveGenerator:
         Note that this includes en passant
         
         PARAMS
+        board: the Board the piece is on
         index: an integer representing the location of the pawn on the board
+        player: the integer representation of the moving player's pieces
+        opponent: the integer representation of the opponent pieces
 
         RETURNS
         an integer map of the possible moves the pawn at the given index could make
     '''
 
-    def _get_pawn_moves(self, index):
+    def _get_pawn_moves(self, board, index, player, opponent):
         moves = 0
         mask = 1 << index
         col = index % 8
         # check if piece is white
-        if self.opponent == self.board.black_pieces:
+        if opponent == board.black_pieces:
             # Check one square forward
-            if not self.board.board & (mask << 8):
+            if not board.board & (mask << 8):
                 moves |= mask << 8
 
                 # Check two squares forward on first move
-                if index < 16 and not self.board.board & (mask << 16):
+                if index < 16 and not board.board & (mask << 16):
                     moves |= mask << 16
 
             # Check diagonal captures
-            if col < 7 and self.board.black_pieces & (mask << 9):
+            if col < 7 and board.black_pieces & (mask << 9):
                 moves |= mask << 9
-            if col > 0 and self.board.black_pieces & (mask << 7):
+            if col > 0 and board.black_pieces & (mask << 7):
                 moves |= mask << 7
 
             # Check en passant capture
-            if self.board.en_passant_board & mask:
-                if col < 7 and self.board.black_pieces & (mask << 1):
+            if board.en_passant_board & mask:
+                if col < 7 and board.black_pieces & (mask << 1):
                     moves |= mask << 1
-                if col > 0 and self.board.black_pieces & (mask >> 1):
+                if col > 0 and board.black_pieces & (mask >> 1):
                     moves |= mask >> 1
         else:
             # Check one square forward
-            if not self.board.board & (mask >> 8):
+            if not board.board & (mask >> 8):
                 moves |= mask >> 8
 
                 # Check two squares forward on first move
-                if index > 47 and not self.board.board & (mask >> 16):
+                if index > 47 and not board.board & (mask >> 16):
                     moves |= mask >> 16
 
             # Check diagonal captures
-            if col < 7 and self.board.white_pieces & (mask >> 7):
+            if col < 7 and board.white_pieces & (mask >> 7):
                 moves |= mask >> 7
-            if col > 0 and self.board.white_pieces & (mask >> 9):
+            if col > 0 and board.white_pieces & (mask >> 9):
                 moves |= mask >> 9
 
             # Check en passant capture
-            if self.board.en_passant_board & mask:
-                if col < 7 and self.board.white_pieces & (mask << 1):
+            if board.en_passant_board & mask:
+                if col < 7 and board.white_pieces & (mask << 1):
                     moves |= mask << 1
-                if col > 0 and self.board.white_pieces & (mask >> 1):
+                if col > 0 and board.white_pieces & (mask >> 1):
                     moves |= mask >> 1
         return moves
 
@@ -243,13 +261,16 @@ class MoveGenerator:
         * up right: two squares up, one square right
 
         PARAMS
+        board: the Board the piece is on
         index: an integer representing the square that the piece is located in
+        player: the integer representation of the moving player's pieces
+        opponent: the integer representation of the opponent pieces
 
         RETURNS
         all the possible knight moves for the piece in the given square, given as a list of square indexes
     '''
 
-    def _get_knight_moves(self, index):
+    def _get_knight_moves(self, board, index, player, opponent):
         moves = 0
         mask = 1 << index
         col, row = index % 8, index // 8
@@ -258,37 +279,37 @@ class MoveGenerator:
         # validate column moveable position
         if col < 6:
             # validate row moveable position
-            if row > 0 and not mask >> 6 & self.player:
+            if row > 0 and not mask >> 6 & player:
                 # right down
                 moves |= mask >> 6
-            if row < 7 and not mask << 10 & self.player:
+            if row < 7 and not mask << 10 & player:
                 # right up
                 moves |= mask << 10
 
         # left L shape moves
         if col > 1:
-            if row > 0 and not mask >> 10 & self.player:
+            if row > 0 and not mask >> 10 & player:
                 # left down
                 moves |= mask >> 10
-            if row < 7 and not mask << 6 & self.player:
+            if row < 7 and not mask << 6 & player:
                 # left up
                 moves |= mask << 6
 
         # up L shape moves
         if row > 1:
-            if col > 0 and not mask >> 17 & self.player:
+            if col > 0 and not mask >> 17 & player:
                 # down left
                 moves |= mask >> 17
-            if col < 7 and not mask >> 15 & self.player:
+            if col < 7 and not mask >> 15 & player:
                 # down right
                 moves |= mask >> 15
 
         # down L shape moves
         if row < 6:
-            if col > 0 and not mask << 15 & self.player:
+            if col > 0 and not mask << 15 & player:
                 # up left
                 moves |= mask << 15
-            if col < 7 and not mask << 17 & self.player:
+            if col < 7 and not mask << 17 & player:
                 # up right
                 moves |= mask << 17
 
@@ -298,22 +319,25 @@ class MoveGenerator:
         gets all the possible moves a bishop at the given index could make
         
         PARAMS
+        board: the Board the piece is on
         index: an integer representing the location of the bishop on the board
+        player: the integer representation of the moving player's pieces
+        opponent: the integer representation of the opponent pieces
 
         RETURNS
         an integer map of the possible moves the bishop at the given index could make
     '''
 
-    def _get_bishop_moves(self, index):
+    def _get_bishop_moves(self, board, index, player, opponent):
         col, row = index % 8, index // 8
         moves = 0
 
         # Check northeast moves
         for i in range(1, min(8 - row, 8 - col)):
             new_index = index + i * 9
-            if self._is_empty(new_index):
+            if self._is_empty(board, new_index):
                 moves |= 1 << new_index
-            elif self._is_opponent(new_index):
+            elif self._is_opponent(new_index, opponent):
                 moves |= 1 << new_index
                 # stopped by an opponent
                 break
@@ -324,9 +348,9 @@ class MoveGenerator:
         # Check northwest moves
         for i in range(1, min(8 - row, col + 1)):
             new_index = index + i * 7
-            if self._is_empty(new_index):
+            if self._is_empty(board, new_index):
                 moves |= 1 << new_index
-            elif self._is_opponent(new_index):
+            elif self._is_opponent(new_index, opponent):
                 moves |= 1 << new_index
                 break
             else:
@@ -335,9 +359,9 @@ class MoveGenerator:
         # Check southeast moves
         for i in range(1, min(row + 1, 8 - col)):
             new_index = index - i * 7
-            if self._is_empty(new_index):
+            if self._is_empty(board, new_index):
                 moves |= 1 << new_index
-            elif self._is_opponent(new_index):
+            elif self._is_opponent(new_index, opponent):
                 moves |= 1 << new_index
                 break
             else:
@@ -346,9 +370,9 @@ class MoveGenerator:
         # Check southwest moves
         for i in range(1, min(row + 1, col + 1)):
             new_index = index - i * 9
-            if self._is_empty(new_index):
+            if self._is_empty(board, new_index):
                 moves |= 1 << new_index
-            elif self._is_opponent(new_index):
+            elif self._is_opponent(new_index, opponent):
                 moves |= 1 << new_index
                 break
             else:
@@ -359,19 +383,22 @@ class MoveGenerator:
         gets all the possible moves a rook at the given index could make
         
         PARAMS
+        board: the Board the piece is on
         index: an integer representing the location of the rook on the board
+        player: the integer representation of the moving player's pieces
+        opponent: the integer representation of the opponent pieces
 
         RETURNS
         an integer map of the possible moves the rook at the given index could make
     '''
 
-    def _get_rook_moves(self, index):
+    def _get_rook_moves(self, board, index, player, opponent):
         moves = 0
         # Get all possible moves to the right
         for i in range(index + 1, index // 8 * 8 + 8):
-            if self._is_empty(i):
+            if self._is_empty(board, i):
                 moves |= 1 << i
-            elif self._is_opponent(i):
+            elif self._is_opponent(i, opponent):
                 moves |= 1 << i
                 # stopped by opponent
                 break
@@ -380,9 +407,9 @@ class MoveGenerator:
                 break
         # Get all possible moves to the left
         for i in range(index - 1, index // 8 * 8 - 1, -1):
-            if self._is_empty(i):
+            if self._is_empty(board, i):
                 moves |= 1 << i
-            elif self._is_opponent(i):
+            elif self._is_opponent(i, opponent):
                 moves |= 1 << i
                 break
             else:
@@ -390,9 +417,9 @@ class MoveGenerator:
 
         # Get all possible moves going up
         for i in range(index + 8, 64, 8):
-            if self._is_empty(i):
+            if self._is_empty(board, i):
                 moves |= 1 << i
-            elif self._is_opponent(i):
+            elif self._is_opponent(i, opponent):
                 moves |= 1 << i
                 break
             else:
@@ -400,9 +427,9 @@ class MoveGenerator:
 
         # Get all possible moves going down
         for i in range(index - 8, -1, -8):
-            if self._is_empty(i):
+            if self._is_empty(board, i):
                 moves |= 1 << i
-            elif self._is_opponent(i):
+            elif self._is_opponent(i, opponent):
                 moves |= 1 << i
                 break
             else:
@@ -414,32 +441,38 @@ class MoveGenerator:
         gets all the possible moves a queen at the given index could make
         
         PARAMS
+        board: the Board the piece is on
         index: an integer representing the location of the queen on the board
+        player: the integer representation of the moving player's pieces
+        opponent: the integer representation of the opponent pieces
 
         RETURNS
         an integer map of the possible moves the queen at the given index could make
     '''
 
-    def _get_queen_moves(self, index):
+    def _get_queen_moves(self, board, index, player, opponent):
         # queen moves is equivalent to rook moves | bishop moves of given index
-        moves = self._get_bishop_moves(index)
-        moves |= self._get_rook_moves(index)
+        moves = self._get_bishop_moves(board, index, player, opponent)
+        moves |= self._get_rook_moves(board, index, player, opponent)
         return moves
 
     '''
         gets all the possible moves a king at the given index could make
         
         PARAMS
+        board: the Board the piece is on
         index: an integer representing the location of the king on the board
+        player: the integer representation of the moving player's pieces
+        opponent: the integer representation of the opponent pieces
 
         RETURNS
         an integer map of the possible moves the king at the given index could make
     '''
 
-    def _get_king_moves(self, index):
+    def _get_king_moves(self, board, index, player, opponent):
         # set up a temporary king piece to get the king color and further management when swapping/replaced
-        tmp_king = self.board.get_piece(index)
-        self.board.set_piece(constants.EMPTY, index)
+        tmp_king = board.get_piece(index)
+        board.set_piece(constants.EMPTY, index)
 
         # ongoing movement collection for king
         moves = 0
@@ -451,13 +484,13 @@ class MoveGenerator:
             top_mask = 1 << top_index
             if bottom_index >= 0:
                 bottom_mask = 1 << bottom_index
-            if top_index >= 0 and not top_mask & self.player and not self._in_check(top_index, index)[0]:
+            if top_index >= 0 and not top_mask & player and not self._in_check(board, top_index, index, player, opponent)[0]:
                 moves |= 1 << top_index
-            if bottom_index >= 0 and not bottom_mask & self.player and not self._in_check(bottom_index, index)[0]:
+            if bottom_index >= 0 and not bottom_mask & player and not self._in_check(board, bottom_index, index, player, opponent)[0]:
                 moves |= 1 << bottom_index
 
         # reassign king to given index now that all feasible positions were found
-        self.board.set_piece(tmp_king, index)
+        board.set_piece(tmp_king, index)
 
         return moves
 
@@ -476,29 +509,29 @@ class MoveGenerator:
         relative_to: an integer identifying the cell from with the king originates 
     '''
 
-    def _in_check(self, index, relative_to):
+    def _in_check(self, board, index, relative_to, player, opponent):
         # verify that the move_to square is next to (board-wise) the move_from square (i.e. index must be next to relative_to)
         if not self._is_next_to(index, relative_to) or index < 0:
             return (-1, -1)  # i.e. True
 
         # determine which piece color to compare to when sensing
-        if self.opponent == self.board.black_pieces:
+        if opponent == board.black_pieces:
             # set opponent piece set
-            pawns = self.board.black_pawns
-            bishops = self.board.black_bishops
-            knights = self.board.black_knights
-            rooks = self.board.black_rooks
-            queens = self.board.black_queens
-            king = self.board.black_king
+            pawns = board.black_pawns
+            bishops = board.black_bishops
+            knights = board.black_knights
+            rooks = board.black_rooks
+            queens = board.black_queens
+            king = board.black_king
 
         else:
             # set opponent piece set
-            pawns = self.board.white_pawns
-            bishops = self.board.white_bishops
-            knights = self.board.white_knights
-            rooks = self.board.white_rooks
-            queens = self.board.white_queens
-            king = self.board.white_king
+            pawns = board.white_pawns
+            bishops = board.white_bishops
+            knights = board.white_knights
+            rooks = board.white_rooks
+            queens = board.white_queens
+            king = board.white_king
 
         # ongoing board of pieces checking the king
         checking_pieces = 0
@@ -509,35 +542,35 @@ class MoveGenerator:
 
         # determine what moves would cause a check, if any, add to check_board accordingly
         # simulate pawn moves
-        pawn_moves = self._get_pawn_moves(index)
+        pawn_moves = self._get_pawn_moves(board, index, player, opponent)
         test_checked_piece = pawns & pawn_moves
         if test_checked_piece:
             search_field |= pawn_moves
             checking_pieces |= test_checked_piece
 
         # simulate knight moves
-        knight_moves = self._get_knight_moves(index)
+        knight_moves = self._get_knight_moves(board, index, player, opponent)
         test_checked_piece = knights & knight_moves
         if test_checked_piece:
             search_field |= knight_moves
             checking_pieces |= test_checked_piece
 
         # simulate bishop moves
-        bishop_moves = self._get_bishop_moves(index)
+        bishop_moves = self._get_bishop_moves(board, index, player, opponent)
         test_checked_piece = bishops & bishop_moves
         if test_checked_piece:
             search_field |= bishop_moves
             checking_pieces |= test_checked_piece
 
         # simulate rook moves
-        rook_moves = self._get_rook_moves(index)
+        rook_moves = self._get_rook_moves(board, index, player, opponent)
         test_checked_piece = rooks & rook_moves
         if test_checked_piece:
             search_field |= rook_moves
             checking_pieces |= test_checked_piece
 
         # simulate queen moves (needed even though rook/bishop already called)
-        queen_moves = self._get_queen_moves(index)
+        queen_moves = self._get_queen_moves(board, index, player, opponent)
         test_checked_piece = queens & queen_moves
         if test_checked_piece:
             search_field |= queen_moves
@@ -573,24 +606,25 @@ class MoveGenerator:
         Note that this function assumes no moves are available to the given king, the caller must handle that logic
 
         PARAMS
+        board: the Board the piece is on
         king_board: bitboard of an arbitrary king
 
         RETURNS
         True if the given king is in mate, false otherwise
     '''
 
-    def _in_mate(self, king_board):
+    def _in_mate(self, board, king_board):
         # get player/opponent color
-        self.player = self.board.white_pieces
-        self.opponent = self.board.black_pieces
+        player = board.white_pieces
+        opponent = board.black_pieces
 
-        if king_board == self.board.black_king:
-            self.player = self.board.black_pieces
-            self.opponent = self.board.white_pieces
+        if king_board == board.black_king:
+            player = board.black_pieces
+            opponent = board.white_pieces
 
         # get king information of received color
         king_index = utils.singleton_board_to_index(king_board)
-        king_check = self._in_check(king_index, king_index)
+        king_check = self._in_check(board, king_index, king_index, player, opponent)
         attacking = king_check[0]
 
         # nobody is attacking
@@ -606,24 +640,22 @@ class MoveGenerator:
             return True
 
         # swap players to get attacking piece moves
-        tmp = self.player
-        self.player = self.opponent
-        self.opponent = tmp
+        player, opponent = opponent, player
 
         # get attacking piece info
         attacking_index = utils.singleton_board_to_index(attacking)
-        attacker_check = self._in_check(attacking_index, attacking_index)
-        attacker_moves = self.piece_move_map[self.board.get_piece(
-            attacking_index).upper()](attacking_index)
+        attacker_check = self._in_check(board, attacking_index, attacking_index, player, opponent)
+        attacker_moves = self.piece_move_map[board.get_piece(
+            attacking_index).upper()](board, attacking_index, player, opponent)
 
         # get lines between attacking piece and attacked piece as a bitboard
         line_of_attack = attacker_moves & king_check[1]
 
         # get pieces blocking the line of attack
-        blocking_pieces = utils.board_to_indexes(self.opponent)
+        blocking_pieces = utils.board_to_indexes(opponent)
         blocking_pieces.remove(king_index)
         for piece in blocking_pieces:
-            blocking_moves = self.generate_moves(piece)
+            blocking_moves = self.generate_moves(board, piece)
             if blocking_moves & line_of_attack:
                 return False
 
@@ -638,6 +670,7 @@ class MoveGenerator:
         Determines if the piece in the given square is pinned
 
         PARAMS
+        board: the Board the piece is on
         square: an index identifying the location of the piece to be analyzed for pinning
 
         RETURNS
@@ -645,7 +678,7 @@ class MoveGenerator:
         and line_of_attack (a bitboard of the line between the attacking pieces and the pinned piece)
     '''
 
-    def _is_pinned(self, square):
+    def _is_pinned(self, board, square):
         # convert square to index
         index = square
         if type(square) == str:
@@ -655,25 +688,25 @@ class MoveGenerator:
         if index < 0:
             return (0, 0)  # no attackers or line of attack
 
-        piece = self.board.get_piece(index)
+        piece = board.get_piece(index)
 
         # determine piece color
-        king_board = self.board.white_king
-        self.player = self.board.white_pieces
-        self.opponent = self.board.black_pieces
-        if self.board.get_piece_color(piece) == self.board.black_pieces:
-            king_board = self.board.black_king
-            self.player = self.board.black_pieces
-            self.opponent = self.board.white_pieces
+        king_board = board.white_king
+        player = board.white_pieces
+        opponent = board.black_pieces
+        if board.get_piece_color(piece) == board.black_pieces:
+            king_board = board.black_king
+            player = board.black_pieces
+            opponent = board.white_pieces
 
         # get information of king with same color as given piece
         king_index = utils.singleton_board_to_index(king_board)
 
         # temporarily remove given piece from board
-        self.board.set_piece(constants.EMPTY, index)
+        board.set_piece(constants.EMPTY, index)
 
         # if king in check, piece was protecting it, meaning the piece is pinned
-        king_in_check = self._in_check(king_index, king_index)
+        king_in_check = self._in_check(board, king_index, king_index, player, opponent)
 
         # determine the attacking piece and its line of attack
         attacking, line_of_attack = 0, 0
@@ -682,15 +715,112 @@ class MoveGenerator:
 
             attacking_index = utils.singleton_board_to_index(attacking)
 
-            attacker_moves = self.piece_move_map[self.board.get_piece(
-                attacking_index).upper()](attacking_index)
+            attacker_moves = self.piece_move_map[board.get_piece(
+                attacking_index).upper()](board, attacking_index, player, opponent)
             line_of_attack = attacker_moves & king_in_check[1]
 
         # replace piece now that its pin was determined
-        self.board.set_piece(piece, index)
+        board.set_piece(piece, index)
 
         return attacking, line_of_attack
 
+    '''
+        Statically evaluates the capture of the piece on to_index by the piece on from_index. The capture sequence on to_index is
+        played out with both colors always recapturing with their least valuable attacker, using attack tables and an occupancy
+        mask rather than moving pieces on the board. Sliding pieces hidden behind a capturer (x-rays) join the exchange once
+        the capturer leaves its square. Either side may stop recapturing when continuing would lose material.
+
+        Piece strengths are the base values in BoardConstants.PIECE_VALUES.
+
+        PARAMS
+        board: the Board the piece is on
+        from_index: an integer identifying the square of the capturing piece
+        to_index: an integer identifying the square being captured on
+
+        RETURNS
+        the expected material gain of the exchange for the capturing side (negative if the capture loses material)
+    '''
+
+    def static_exchange_eval(self, board, from_index, to_index):
+        from_mask = 1 << from_index
+        color = constants.WHITE if board.white_pieces & from_mask else constants.BLACK
+        occupancy = board.board
+        attackers = self._get_attackers(board, to_index, occupancy)
+        diagonal_sliders = board.white_bishops | board.black_bishops | board.white_queens | board.black_queens
+        straight_sliders = board.white_rooks | board.black_rooks | board.white_queens | board.black_queens
+
+        # gains[depth] is the material balance after the capture at that depth, from the capturer's perspective
+        gains = [constants.PIECE_VALUES[board.get_piece(to_index)]]
+        attacker_value = constants.PIECE_VALUES[board.get_piece(from_index)]
+        while from_mask:
+            gains.append(attacker_value - gains[-1])
+
+            # remove the capturer and reveal any sliders behind it
+            occupancy ^= from_mask
+            attackers &= ~from_mask
+            attackers |= (tables.bishop_attacks(to_index, occupancy) & diagonal_sliders) | \
+                (tables.rook_attacks(to_index, occupancy) & straight_sliders)
+            attackers &= occupancy
+
+            color = 1 - color
+            from_mask, attacker_value = self._get_least_valuable_attacker(board, attackers, color)
+
+        # negamax the gains back up the exchange, letting each side stand pat instead of recapturing
+        # the last gain is speculative (nobody recaptured the last capturer), so it is skipped
+        for depth in range(len(gains) - 2, 0, -1):
+            gains[depth - 1] = -max(-gains[depth - 1], gains[depth])
+        return gains[0]
+
+    '''
+        Finds every piece of either color that attacks the given index, with sliding attacks blocked by the given occupancy
+
+        PARAMS
+        board: the Board the piece is on
+        index: an integer identifying the attacked square
+        occupancy: an integer mask of the occupied squares
+
+        RETURNS
+        an integer mask of the attacking pieces
+    '''
+
+    def _get_attackers(self, board, index, occupancy):
+        diagonal_attacks = tables.bishop_attacks(index, occupancy)
+        straight_attacks = tables.rook_attacks(index, occupancy)
+        # a white pawn attacks the index from the squares a black pawn on the index would attack, and vice versa
+        return (tables.PAWN_ATTACKS[constants.BLACK][index] & board.white_pawns) | \
+            (tables.PAWN_ATTACKS[constants.WHITE][index] & board.black_pawns) | \
+            (tables.KNIGHT_ATTACKS[index] & (board.white_knights | board.black_knights)) | \
+            (tables.KING_ATTACKS[index] & (board.white_king | board.black_king)) | \
+            (diagonal_attacks & (board.white_bishops | board.black_bishops | board.white_queens | board.black_queens)) | \
+            (straight_attacks & (board.white_rooks | board.black_rooks | board.white_queens | board.black_queens))
+
+    '''
+        Finds the least valuable piece of a color among the given attackers
+
+        PARAMS
+        board: the Board the piece is on
+        attackers: an integer mask of attacking pieces
+        color: the color whose attackers are considered
+
+        RETURNS
+        a pair (singleton mask of the least valuable attacker or 0 if there is none, strength of that attacker)
+    '''
+
+    def _get_least_valuable_attacker(self, board, attackers, color):
+        if color == constants.WHITE:
+            piece_boards = ((board.white_pawns, constants.WHITE_PAWN), (board.white_knights, constants.WHITE_KNIGHT),
+                            (board.white_bishops, constants.WHITE_BISHOP), (board.white_rooks, constants.WHITE_ROOK),
+                            (board.white_queens, constants.WHITE_QUEEN), (board.white_king, constants.WHITE_KING))
+        else:
+            piece_boards = ((board.black_pawns, constants.BLACK_PAWN), (board.black_knights, constants.BLACK_KNIGHT),
+                            (board.black_bishops, constants.BLACK_BISHOP), (board.black_rooks, constants.BLACK_ROOK),
+                            (board.black_queens, constants.BLACK_QUEEN), (board.black_king, constants.BLACK_KING))
+        for piece_board, piece in piece_boards:
+            subset = attackers & piece_board
+            if subset:
+                return subset & -subset, constants.PIECE_VALUES[piece]
+        return 0, 0.0
+
     '''
         determines whether a given cell a is next to a given cell b. This is to manage out of board errors when doing bitshifts
 
@@ -716,33 +846,35 @@ class MoveGenerator:
         determines if there is a piece in the given square
 
         PARAMS
+        board: the Board the piece is on
         square: an alphanumeric index or integer identifying the location of the square within the board
 
         RETURNS
         true if the square is empty, false otherwise
     '''
 
-    def _is_empty(self, square):
+    def _is_empty(self, board, square):
         index = square
         if type(square) == str:
             index = utils.square_to_index(square)
-        return not self.board.board & 1 << index
+        return not board.board & 1 << index
 
     '''
         determines if the piece in a given square is an opponent to the current player
 
         PARAMS
         square: an alphanumeric index or integer identifying the location of the piece to manage
+        opponent: the integer representation of the opponent pieces
 
         RETURNS
         true if the piece in the given square is an opponent, false otherwise
     '''
 
-    def _is_opponent(self, square):
+    def _is_opponent(self, square, opponent):
         index = square
         if type(square) == str:
             index = utils.square_to_index(square)
-        return bool(self.opponent & 1 << index)
+        return bool(opponent & 1 << index)
 
     '''
         parses the moves of a given square into a list of tuples
@@ -51,6 +51,9 @@ def play_console():
         print(board.get_board_string())
         color = constants.WHITE
         color_set = board.white_pieces
+        ponder = None # the AI's search on the human's time, if any
+        search = None
+        principal_variation = []
         while True:
             if color == constants.WHITE:
                 print('input the square from which you will be moving from and the square from with you will be moving to')
@@ -76,15 +79,28 @@ def play_console():
                     print('this move is outside of the moves of the piece you selected')
                     continue
 
+                # keep the AI's ponder search if it guessed this move
+                if ponder is not None:
+                    search = ponder.ponder_hit((from_square.strip(), to_square.strip()))
+                    ponder = None
+
             else:
                 print("AI now making a move:")
                 print("loading...")
-                from_square, to_square = minimax.get_next_move(board,constants.BLACK)
+                if search is not None:
+                    from_square, to_square = search.result()
+                    principal_variation = search.principal_variation
+                    search = None
+                else:
+                    from_square, to_square = minimax.get_next_move(board,constants.BLACK)
+                    principal_variation = minimax.principal_variation
 
             in_check = board.move_piece(from_square, to_square)
             if in_check:
                 color_string = "black" if color else "white"
                 print(color_string + " won")
+                if search is not None:
+                    search.stop()
                 break
             print(board.get_board_string())
 
@@ -95,6 +111,8 @@ def play_console():
             else:
                 color = constants.WHITE
                 color_set = board.white_pieces
+                # search the human's expected reply while they think
+                ponder = minimax.start_ponder(board, constants.BLACK, principal_variation)
         
 
 
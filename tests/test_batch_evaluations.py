@@ -0,0 +1,117 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms import batch_evaluations
+from algorithms.batch_evaluations import BatchEvaluations
+from algorithms.minimax import MiniMax
+from algorithms.texel_tuner import parse_placement
+from unittest import mock
+import random
+import types
+import unittest
+
+
+'''
+    Sets up a board from a FEN piece placement
+
+    PARAMS
+    placement: the FEN piece placement
+
+    RETURNS
+    the Board
+'''
+def get_board(placement):
+    board = Board()
+    board.set_position_encoding(tuple(parse_placement(placement)) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+    return board
+
+'''
+    Places a king of each color and other pieces at random
+
+    PARAMS
+    rng: the random.Random placing the pieces
+
+    RETURNS
+    the Board
+'''
+def get_random_board(rng):
+    squares = rng.sample(range(64), rng.randint(2, 32))
+    boards = [0] * 12
+    boards[5] = 1 << squares[0]
+    boards[11] = 1 << squares[1]
+    for square in squares[2:]:
+        piece = rng.choice((0, 1, 2, 3, 4, 6, 7, 8, 9, 10))
+        if (piece in (0, 6) and not 8 <= square < 56): # no pawns on the first and last ranks
+            continue
+        boards[piece] |= 1 << square
+    board = Board()
+    board.set_position_encoding(tuple(boards) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+    return board
+
+
+class BatchEvaluationsTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        evaluations = BatchEvaluations()
+        self.rows = [evaluations.encode(Board())] + [evaluations.encode(get_random_board(rng)) for _ in range(200)]
+        self.winning_boards = [rng.choice((0, 0, 0, 1, 2)) for _ in self.rows]
+
+    @unittest.skipIf(batch_evaluations.np is None, 'numpy is not installed')
+    def test_numpy_matches_python(self):
+        for center_control in (True, False):
+            batched = BatchEvaluations(center_control=center_control)
+            single = BatchEvaluations(use_numpy=False, center_control=center_control)
+            self.assertTrue(batched.use_numpy)
+            for color in (constants.WHITE, constants.BLACK):
+                for score, expected in zip(batched.get_scores(self.rows, color, self.winning_boards),
+                                           single.get_scores(self.rows, color, self.winning_boards)):
+                    self.assertAlmostEqual(score, expected, places=9)
+
+    @unittest.skipIf(batch_evaluations.np is None, 'numpy is not installed')
+    def test_byte_table_popcount(self):
+        np = batch_evaluations.np
+        columns = np.array(self.rows, dtype=np.uint64).T
+        # numpy without bitwise_count counts bits with a byte table, here on a strided slice as a tuner shard is
+        older_numpy = types.SimpleNamespace(ascontiguousarray=np.ascontiguousarray, uint8=np.uint8, int64=np.int64)
+        with mock.patch.object(batch_evaluations, 'np', older_numpy):
+            counts = batch_evaluations._count_array(columns[:, ::3])
+        self.assertEqual(counts.tolist(), [[int(value).bit_count() for value in column[::3]]
+                                           for column in columns.tolist()])
+
+    def test_without_numpy(self):
+        with mock.patch.object(batch_evaluations, 'np', None):
+            evaluations = BatchEvaluations()
+            self.assertFalse(evaluations.use_numpy)
+            scores = evaluations.get_scores(self.rows, constants.WHITE, self.winning_boards)
+        self.assertEqual(len(scores), len(self.rows))
+        self.assertEqual(evaluations.get_scores([], constants.WHITE, []), [])
+
+    def test_winning_bonus(self):
+        evaluations = BatchEvaluations(use_numpy=False)
+        row = evaluations.encode(Board())
+        plain, winning = evaluations.get_scores([row, row], constants.WHITE, [0, 1])
+        self.assertAlmostEqual(winning - plain, evaluations.weights['win_bonus'] * evaluations.weights['score_scale'])
+
+    def test_start_position_even(self):
+        evaluations = BatchEvaluations(use_numpy=False)
+        row = evaluations.encode(Board())
+        white, black = (evaluations.get_scores([row], color, [0])[0] for color in (constants.WHITE, constants.BLACK))
+        self.assertAlmostEqual(white, black)
+
+    def test_center_control(self):
+        evaluations = BatchEvaluations(use_numpy=False)
+        plain = BatchEvaluations(use_numpy=False, center_control=False)
+        rows = [evaluations.encode(get_board(placement)) for placement in ('4k3/8/8/8/4N3/8/8/4K3', '4k3/8/8/8/N7/8/8/4K3')]
+        centered, edge = evaluations.get_scores(rows, constants.WHITE, [0, 0])
+        plain_centered, plain_edge = plain.get_scores(rows, constants.WHITE, [0, 0])
+        self.assertAlmostEqual(plain_centered, plain_edge)
+        self.assertGreater(centered, edge)
+
+    def test_batched_search(self):
+        searcher = MiniMax(2)
+        searcher.use_batch_eval = True
+        board = get_board('6k1/5ppp/8/8/3q4/8/5PPP/3R2K1')
+        self.assertEqual(searcher.get_next_move(board, constants.WHITE), ('d1', 'd4'))
+
+
+if __name__ == '__main__':
+    unittest.main()
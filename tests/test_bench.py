@@ -0,0 +1,156 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+import bench
+import math
+import unittest
+
+BASELINE_RATES = [100.0, 102.0, 98.0, 101.0, 99.0]
+
+
+'''
+    Builds benchmark results holding the same trial rates for every gated benchmark
+
+    PARAMS
+    rates: the trial rates
+    signature: the node signature of the run
+    commit: the commit of the run
+
+    RETURNS
+    a dictionary laid out as returned by BenchmarkSuite.run
+'''
+def get_results(rates, signature='0123456789abcdef', commit='abc'):
+    return {'format': bench.BENCH_FORMAT, 'commit': commit, 'machine': {'processor': 'test'},
+            'node_signature': signature,
+            'benchmarks': {name: {'rate': bench.summarize(rates)} for name in bench.GATED_BENCHMARKS}}
+
+
+class SlowdownPValueTest(unittest.TestCase):
+    def test_t_distribution(self):
+        # the Cauchy distribution, Student's t with 2 degrees of freedom and a tabulated value
+        for t in (-3.0, -0.5, 0.0, 1.0, 4.0):
+            self.assertAlmostEqual(bench._t_cdf(t, 1), 0.5 + math.atan(t) / math.pi, places=9)
+            self.assertAlmostEqual(bench._t_cdf(t, 2), 0.5 + t / (2 * math.sqrt(2 + t * t)), places=9)
+        self.assertAlmostEqual(bench._t_cdf(2.0, 10), 0.963306, places=6)
+
+    def test_slowdown_significant(self):
+        self.assertLess(bench.get_slowdown_p_value(BASELINE_RATES, [rate - 10 for rate in BASELINE_RATES]), 1e-4)
+
+    def test_no_slowdown(self):
+        self.assertAlmostEqual(bench.get_slowdown_p_value(BASELINE_RATES, list(reversed(BASELINE_RATES))), 0.5)
+        self.assertGreater(bench.get_slowdown_p_value(BASELINE_RATES, [rate + 10 for rate in BASELINE_RATES]), 0.99)
+
+    def test_too_few_samples(self):
+        self.assertEqual(bench.get_slowdown_p_value([100.0], [50.0, 51.0]), 1.0)
+
+    def test_no_spread(self):
+        self.assertEqual(bench.get_slowdown_p_value([100.0, 100.0], [90.0, 90.0]), 0.0)
+        self.assertEqual(bench.get_slowdown_p_value([100.0, 100.0], [100.0, 100.0]), 1.0)
+
+
+class CompareResultsTest(unittest.TestCase):
+    def test_same_rates_pass(self):
+        comparison = bench.compare_results(get_results(BASELINE_RATES), get_results(BASELINE_RATES, commit='def'))
+        self.assertTrue(comparison['passed'])
+        self.assertEqual((comparison['baseline_commit'], comparison['commit']), ('abc', 'def'))
+        for result in comparison['benchmarks'].values():
+            self.assertAlmostEqual(result['change'], 0.0)
+            self.assertFalse(result['regression'])
+
+    def test_significant_slowdown_fails(self):
+        comparison = bench.compare_results(get_results(BASELINE_RATES),
+                                           get_results([rate * 0.9 for rate in BASELINE_RATES]))
+        self.assertFalse(comparison['passed'])
+        for result in comparison['benchmarks'].values():
+            self.assertAlmostEqual(result['change'], -0.1)
+            self.assertTrue(result['regression'])
+
+    def test_slowdown_within_threshold_passes(self):
+        slower = get_results([rate * 0.9 for rate in BASELINE_RATES])
+        comparison = bench.compare_results(get_results(BASELINE_RATES), slower,
+                                           dict.fromkeys(bench.GATED_BENCHMARKS, 0.15))
+        self.assertTrue(comparison['passed'])
+        # a threshold given for one benchmark leaves the default for the others
+        comparison = bench.compare_results(get_results(BASELINE_RATES), slower, {'search': 0.15})
+        self.assertTrue(comparison['benchmarks']['perft']['regression'])
+        self.assertFalse(comparison['benchmarks']['search']['regression'])
+
+    def test_noisy_slowdown_passes(self):
+        noisy = [60.0, 140.0, 70.0, 130.0, 50.0]
+        comparison = bench.compare_results(get_results(BASELINE_RATES), get_results(noisy))
+        self.assertTrue(comparison['passed'])
+        self.assertGreater(comparison['benchmarks']['perft']['p_value'], 0.05)
+
+    def test_other_nodes_fail(self):
+        comparison = bench.compare_results(get_results(BASELINE_RATES),
+                                           get_results(BASELINE_RATES, signature='fedcba9876543210'))
+        self.assertFalse(comparison['same_nodes'])
+        self.assertFalse(comparison['passed'])
+
+    def test_other_format_rejected(self):
+        baseline = get_results(BASELINE_RATES)
+        baseline['format'] = bench.BENCH_FORMAT + 1
+        with self.assertRaises(ValueError):
+            bench.compare_results(baseline, get_results(BASELINE_RATES))
+
+    def test_parse_thresholds(self):
+        thresholds = bench._parse_thresholds(['0.1', 'search=0.2'])
+        self.assertEqual(thresholds, {'perft': 0.1, 'move_generation': 0.1, 'evaluation': 0.1, 'search': 0.2})
+        with self.assertRaises(ValueError):
+            bench._parse_thresholds(['nothing=0.1'])
+
+
+class BenchmarkSuiteTest(unittest.TestCase):
+    POSITIONS = [('initial', ''), ('italian', 'e2e4 e7e5 g1f3 b8c6 f1c4 f8c5'), ('rook endgame', '8/5pk1/6p1/8/3R4/6P1/5PK1/r7 b')]
+
+    '''
+        Creates a suite small enough to run in a moment
+
+        RETURNS
+        the BenchmarkSuite
+    '''
+    def get_suite(self):
+        return bench.BenchmarkSuite(self.POSITIONS, trials=2, perft_depth=1, search_depth=1, move_generation_repeats=2,
+                                    evaluation_repeats=2)
+
+    def test_run(self):
+        results = self.get_suite().run()
+        self.assertEqual(results['format'], bench.BENCH_FORMAT)
+        for name in bench.GATED_BENCHMARKS:
+            self.assertEqual(len(results['benchmarks'][name]['rate']['samples']), 2)
+            self.assertGreater(results['benchmarks'][name]['rate']['mean'], 0)
+        self.assertEqual(results['benchmarks']['perft']['leaves'][0], 20)
+        self.assertEqual(len(results['benchmarks']['search']['position_nodes']), len(self.POSITIONS))
+
+    def test_rerun_from_settings(self):
+        results = self.get_suite().run()
+        suite = bench.BenchmarkSuite.from_settings(results['settings'])
+        self.assertEqual(suite.positions, self.POSITIONS)
+        rerun = suite.run()
+        self.assertEqual(rerun['settings'], results['settings'])
+        # the same work gives the same signature, so a rerun is compared on its timings alone
+        self.assertEqual(rerun['node_signature'], results['node_signature'])
+        self.assertTrue(bench.compare_results(results, rerun)['same_nodes'])
+        deeper = bench.BenchmarkSuite(self.POSITIONS, trials=1, perft_depth=2, search_depth=1).run()
+        self.assertNotEqual(deeper['node_signature'], results['node_signature'])
+
+    def test_bench_boards(self):
+        board, color = bench.get_bench_board('e2e4 e7e5 g1f3')
+        self.assertEqual(color, constants.BLACK)
+        self.assertEqual(board.undo_stack, [])
+        board, color = bench.get_bench_board('8/5pk1/6p1/8/3R4/6P1/5PK1/r7 b')
+        self.assertEqual(color, constants.BLACK)
+        self.assertEqual(board.get_piece('a1'), constants.BLACK_ROOK)
+        with self.assertRaises(ValueError):
+            bench.get_bench_board('f2f3 e7e5 g2g4 d8h4')
+
+
+class PerftTest(unittest.TestCase):
+    def test_initial_position(self):
+        board = Board()
+        pieces = board.get_position_encoding()[:12]
+        self.assertEqual([bench.perft(board, constants.WHITE, depth) for depth in range(3)], [1, 20, 400])
+        self.assertEqual(board.get_position_encoding()[:12], pieces)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants
+import random
+import unittest
+
+
+'''
+    Gets every move of a color, including the moves past the last square that king moves can produce
+
+    PARAMS
+    board: the board
+    color: the color to move
+
+    RETURNS
+    a list of (from index, to index) pairs
+'''
+def get_moves(board, color):
+    moves = []
+    for from_index in range(64):
+        if (board.check_piece(from_index, color)):
+            targets = board.get_moves(from_index)
+            while targets:
+                mask = targets & -targets
+                targets ^= mask
+                moves.append((from_index, mask.bit_length() - 1))
+    return moves
+
+
+class BoardScoresTest(unittest.TestCase):
+    '''
+        Checks that the running piece counts, phase and position scores of a board equal those recounted from its sub-boards
+
+        PARAMS
+        board: the board to check
+    '''
+    def assert_scores_match(self, board):
+        recounted = Board.__new__(Board)
+        recounted.__dict__.update(board.__dict__)
+        recounted.update_scores()
+        self.assertEqual(board.piece_counts, recounted.piece_counts)
+        self.assertEqual(board.phase, recounted.phase)
+        self.assertAlmostEqual(board.white_position_score, recounted.white_position_score, places=9)
+        self.assertAlmostEqual(board.black_position_score, recounted.black_position_score, places=9)
+
+    def test_random_games(self):
+        off_board_moves = 0
+        for game in range(20):
+            rng = random.Random(game)
+            board = Board()
+            color = constants.WHITE
+            for _ in range(80):
+                moves = get_moves(board, color)
+                if (not moves):
+                    break
+                from_index, to_index = rng.choice(moves)
+                off_board_moves += to_index > 63
+                state = board.__dict__.copy()
+                state['piece_counts'] = dict(board.piece_counts) # the mutable attributes change in place
+                state['last_moves'] = list(board.last_moves)
+                state['undo_stack'] = list(board.undo_stack)
+
+                # the move can be undone exactly
+                board.move_piece(utils.index_to_square(from_index), utils.index_to_square(to_index))
+                self.assert_scores_match(board)
+                board.undo_last()
+                self.assertEqual(board.__dict__, state)
+
+                ending = board.move_piece(utils.index_to_square(from_index), utils.index_to_square(to_index))
+                if (ending):
+                    break
+                color = 1 - color
+        self.assertGreater(off_board_moves, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
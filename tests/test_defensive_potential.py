@@ -0,0 +1,115 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.evaluations import Evaluations
+from algorithms.texel_tuner import parse_placement
+import random
+import unittest
+
+KNIGHT_STEPS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+BISHOP_STEPS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+ROOK_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+# distinct piece strengths, so each kind of defended piece shows in the score
+STRENGTHS = (1000.0, 100.0, 10.0, 1.0, 0.01)
+
+
+'''
+    Gets the squares a color's pieces defend by walking each piece's steps and rays over the board
+
+    PARAMS
+    board: the Board
+    color: the color whose pieces defend
+
+    RETURNS
+    an integer mask of the defended squares
+'''
+def get_defended_by_steps(board, color):
+    pieces = board.get_position_encoding()[:6] if color == constants.WHITE else board.get_position_encoding()[6:12]
+    pawns, rooks, knights, bishops, queens, _ = pieces
+    forward = 1 if color == constants.WHITE else -1
+    defended = board.get_king_shelter(color)[0]
+    for index in range(64):
+        row, col = divmod(index, 8)
+        mask = 1 << index
+        if (pawns & mask):
+            steps, sliding = ((forward, 1), (forward, -1)), False
+        elif (knights & mask):
+            steps, sliding = KNIGHT_STEPS, False
+        else:
+            steps = (BISHOP_STEPS if (bishops | queens) & mask else ()) + (ROOK_STEPS if (rooks | queens) & mask else ())
+            sliding = True
+        for row_step, col_step in steps:
+            to_row, to_col = row + row_step, col + col_step
+            while 0 <= to_row < 8 and 0 <= to_col < 8:
+                defended |= 1 << (to_row * 8 + to_col)
+                if (not sliding or board.board & 1 << (to_row * 8 + to_col)):
+                    break
+                to_row, to_col = to_row + row_step, to_col + col_step
+    return defended
+
+'''
+    Scores a color's defended pieces from get_defended_by_steps
+
+    PARAMS
+    evaluations: the Evaluations whose defensive points are used
+    board: the Board
+    color: the color whose defended pieces are scored
+
+    RETURNS
+    the defensive potential
+'''
+def get_expected_potential(evaluations, board, color):
+    pieces = board.get_position_encoding()[:6] if color == constants.WHITE else board.get_position_encoding()[6:12]
+    pawns, rooks, knights, bishops, queens, _ = pieces
+    defended = get_defended_by_steps(board, color)
+    queen, rook, bishop, knight, pawn = STRENGTHS
+    points = evaluations.weights['defensive']
+    return points * sum(strength * (defended & piece_board).bit_count() for strength, piece_board in
+                        ((queen, queens), (rook, rooks), (bishop, bishops), (knight, knights), (pawn, pawns)))
+
+
+class DefensivePotentialTest(unittest.TestCase):
+    '''
+        Checks the defensive potential of both colors against the one found by walking the pieces' steps
+
+        PARAMS
+        evaluations: the Evaluations to check
+        board: the Board to score
+    '''
+    def assert_potential_matches(self, evaluations, board):
+        for color in (constants.WHITE, constants.BLACK):
+            self.assertAlmostEqual(evaluations.get_defensive_potential(board, color, *STRENGTHS),
+                                   get_expected_potential(evaluations, board, color))
+
+    def test_random_boards(self):
+        evaluations = Evaluations(compiled=False)
+        rng = random.Random(0)
+        for _ in range(300):
+            squares = rng.sample(range(64), rng.randint(2, 30))
+            boards = [0] * 12
+            boards[5], boards[11] = 1 << squares[0], 1 << squares[1]
+            for square in squares[2:]:
+                piece = rng.choice((0, 1, 2, 3, 4, 6, 7, 8, 9, 10))
+                if (piece in (0, 6) and not 8 <= square < 56): # no pawns on the first and last ranks
+                    continue
+                boards[piece] |= 1 << square
+            board = Board()
+            board.set_position_encoding(tuple(boards) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+            self.assert_potential_matches(evaluations, board)
+
+    def test_pawn_chains(self):
+        # every pawn of a chain but its base is defended, for black as for white
+        evaluations = Evaluations(compiled=False)
+        board = Board()
+        board.set_position_encoding(tuple(parse_placement('7k/4p3/3p4/2p2P2/4P3/3P4/8/7K')) +
+                                    (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+        pawn = STRENGTHS[-1] * evaluations.weights['defensive']
+        for color in (constants.WHITE, constants.BLACK):
+            self.assertAlmostEqual(evaluations.get_defensive_potential(board, color, *STRENGTHS), 2 * pawn)
+        self.assert_potential_matches(evaluations, board)
+
+    def test_start_position(self):
+        self.assert_potential_matches(Evaluations(compiled=False), Board())
+
+
+if __name__ == '__main__':
+    unittest.main()
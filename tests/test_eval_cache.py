@@ -0,0 +1,99 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.evaluations import Evaluations
+from algorithms.eval_cache import EvalCache
+from algorithms.eval_weights import load_eval_weights
+import copy
+import unittest
+
+
+class EvalCacheTest(unittest.TestCase):
+    def test_store_and_probe(self):
+        cache = EvalCache(1 << 4)
+        cache.store((0x21, 'a'), 1.5)
+        self.assertEqual(cache.probe((0x21, 'a')), 1.5)
+        self.assertIsNone(cache.probe((0x21, 'b')))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.get_hit_rate(), 0.5)
+
+    def test_always_replace(self):
+        cache = EvalCache(1 << 4)
+        cache.store((0x1,), 1.0)
+        cache.store((0x11,), 2.0) # the same slot
+        self.assertIsNone(cache.probe((0x1,)))
+        self.assertEqual(cache.probe((0x11,)), 2.0)
+        cache.clear()
+        self.assertIsNone(cache.probe((0x11,)))
+        self.assertEqual(cache.hits, 0)
+
+    def test_size_must_be_power_of_two(self):
+        with self.assertRaises(ValueError):
+            EvalCache(100)
+
+    def test_copies_share_caches(self):
+        board = Board()
+        board_copy = copy.deepcopy(board)
+        self.assertIs(board_copy.eval_cache, board.eval_cache)
+        self.assertIs(board_copy.pawn_cache, board.pawn_cache)
+
+
+class CacheKeyTest(unittest.TestCase):
+    def test_scores_keyed_by_weights(self):
+        board = Board()
+        board.move_piece('e2', 'e4')
+        score = board.get_score(constants.BLACK, 0)
+        # a copy scoring with other weights shares the caches, but not their entries
+        weights = load_eval_weights()
+        weights['mobility'] *= 2
+        weights['pawn_structure']['isolated'] = -1.0
+        board_copy = copy.deepcopy(board)
+        board_copy.evaluations = Evaluations(weights)
+        other_score = board_copy.get_score(constants.BLACK, 0)
+        self.assertNotAlmostEqual(other_score, score)
+        self.assertAlmostEqual(other_score, Evaluations(weights, compiled=False).get_score(board_copy, constants.BLACK, 0))
+        self.assertEqual(board.get_score(constants.BLACK, 0), score)
+
+    def test_scores_keyed_by_path(self):
+        board = Board()
+        board.move_piece('g1', 'f3')
+        board.move_piece('g8', 'f6')
+        score = board.get_score(constants.WHITE, 0)
+        self.assertEqual(board.get_score(constants.WHITE, 0), score)
+        self.assertEqual(board.eval_cache.hits, 1)
+        # the same placement reached with the other pieces moved last is scored again, as its development may differ
+        other = Board()
+        other.eval_cache = board.eval_cache
+        other.move_piece('g8', 'f6')
+        other.move_piece('g1', 'f3')
+        self.assertEqual(other.get_zobrist_key(constants.WHITE), board.get_zobrist_key(constants.WHITE))
+        other.get_score(constants.WHITE, 0)
+        self.assertEqual(board.eval_cache.hits, 1)
+
+    def test_pawn_entries_keyed_by_pawns(self):
+        evaluations = Evaluations(compiled=False)
+        board = Board()
+        board.pawn_cache.clear()
+        evaluations.get_pawn_structure(board)
+        # moving a piece keeps the pawn entry, moving a pawn needs a new one
+        board.move_piece('g1', 'f3')
+        evaluations.get_pawn_structure(board)
+        self.assertEqual((board.pawn_cache.hits, board.pawn_cache.misses), (1, 1))
+        board.move_piece('e7', 'e5')
+        evaluations.get_pawn_structure(board)
+        self.assertEqual((board.pawn_cache.hits, board.pawn_cache.misses), (1, 2))
+
+    def test_pawn_entries_keyed_by_weights(self):
+        board = Board()
+        board.move_piece('e2', 'e4')
+        board.move_piece('d7', 'd5')
+        board.move_piece('e4', 'd5')
+        weights = load_eval_weights()
+        weights['pawn_structure']['doubled'] = -1.0
+        structure = Evaluations(compiled=False).get_pawn_structure(board)
+        other_structure = Evaluations(weights, compiled=False).get_pawn_structure(board)
+        self.assertEqual(structure[:2], other_structure[:2])
+        self.assertNotEqual(structure[2:], other_structure[2:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants
+from algorithms.evaluations import Evaluations
+from algorithms.self_play import get_legal_moves
+import math
+import random
+import unittest
+
+
+'''
+    Plays random games from the starting position and keeps every position reached
+
+    PARAMS
+    games: the number of games, each played with its own seed
+    plies: the largest number of moves played in each game
+
+    RETURNS
+    a list of (position encoding, color) pairs, one per position and color
+'''
+def get_positions(games=6, plies=60):
+    positions = []
+    for game in range(games):
+        rng = random.Random(game)
+        board = Board()
+        color = constants.WHITE
+        for _ in range(plies):
+            moves = get_legal_moves(board, color)
+            if (not moves):
+                break
+            from_index, to_index = rng.choice(moves)
+            if (board.move_piece(utils.index_to_square(from_index), utils.index_to_square(to_index))):
+                break
+            color = 1 - color
+            positions.append((board.get_position_encoding(), constants.WHITE))
+            positions.append((board.get_position_encoding(), constants.BLACK))
+    return positions
+
+
+class EvalCompilerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.positions = get_positions()
+        cls.compiled = Evaluations()
+        cls.interpreted = Evaluations(compiled=False)
+
+    '''
+        Scores a position with both helpers in the same window and checks they agree on the score and on whether it is exact
+
+        PARAMS
+        encoding: the position, as returned by Board.get_position_encoding
+        color: the color scored
+        lower, upper: the search window
+
+        RETURNS
+        the (score, exact) result of the interpreted scoring
+    '''
+    def assert_same_score(self, encoding, color, lower, upper):
+        board = Board()
+        board.set_position_encoding(encoding)
+        compiled = self.compiled.get_bounded_score(board, color, 0, lower, upper)
+        interpreted = self.interpreted.get_bounded_score(board, color, 0, lower, upper)
+        self.assertAlmostEqual(compiled[0], interpreted[0], places=9)
+        self.assertEqual(compiled[1], interpreted[1])
+        return interpreted
+
+    def test_full_score(self):
+        for encoding, color in self.positions:
+            board = Board()
+            board.set_position_encoding(encoding)
+            self.assertAlmostEqual(self.compiled.get_score(board, color, 0), self.interpreted.get_score(board, color, 0),
+                                   places=9)
+
+    def test_winning_board(self):
+        for encoding, color in self.positions[::10]:
+            board = Board()
+            board.set_position_encoding(encoding)
+            self.assertAlmostEqual(self.compiled.get_score(board, color, 1), self.interpreted.get_score(board, color, 1),
+                                   places=9)
+
+    def test_lazy_cutoffs(self):
+        cutoffs = 0
+        for encoding, color in self.positions:
+            score, exact = self.assert_same_score(encoding, color, -math.inf, math.inf)
+            self.assertTrue(exact)
+            # windows far above and below the score stop after the first stage, narrow ones around it don't
+            for lower, upper in ((score + 20, score + 21), (score - 21, score - 20), (score - 0.01, score + 0.01),
+                                 (score, math.inf), (-math.inf, score)):
+                _, exact = self.assert_same_score(encoding, color, lower, upper)
+                cutoffs += not exact
+        self.assertGreater(cutoffs, 0)
+
+    def test_cutoff_boundaries(self):
+        for encoding, color in self.positions:
+            # the bounds returned outside the window give the first stage score, which the cut-offs compare against
+            upper_bound, exact = self.assert_same_score(encoding, color, math.inf, math.inf)
+            self.assertFalse(exact)
+            lower_bound, exact = self.assert_same_score(encoding, color, -math.inf, -math.inf)
+            self.assertFalse(exact)
+            for lower, upper in ((upper_bound + 1e-9, math.inf), (upper_bound - 1e-9, math.inf),
+                                 (-math.inf, lower_bound - 1e-9), (-math.inf, lower_bound + 1e-9)):
+                self.assert_same_score(encoding, color, lower, upper)
+
+
+if __name__ == '__main__':
+    unittest.main()
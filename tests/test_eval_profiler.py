@@ -0,0 +1,58 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.evaluations import Evaluations
+from algorithms.eval_profiler import EvalProfiler, ProfiledEvaluations
+from algorithms.minimax import MiniMax
+import contextlib
+import io
+import math
+import unittest
+
+
+class EvalProfilerTest(unittest.TestCase):
+    def test_record(self):
+        profiler = EvalProfiler()
+        for contribution in (1.0, 3.0):
+            profiler.record('mobility', 0.5, contribution)
+        profiler.record('attack maps', 0.25)
+        self.assertEqual(profiler.terms['mobility'], [2, 1.0, 2, 4.0, 10.0, 1.0, 3.0])
+        self.assertEqual(profiler.terms['attack maps'][:3], [1, 0.25, 0])
+        summary = profiler.get_summary().splitlines()
+        # terms are listed in evaluation order, with the mean, standard deviation, minimum and maximum of the contributions
+        self.assertTrue(summary[1].startswith('attack maps'))
+        self.assertEqual(len(summary[1].split()), 6)
+        self.assertEqual(summary[2].split()[-4:], ['2.0000', '1.0000', '1.0000', '3.0000'])
+        profiler.reset()
+        self.assertEqual((profiler.terms, profiler.lazy_exits), ({}, 0))
+
+    def test_profiled_scores_unchanged(self):
+        profiler = EvalProfiler()
+        profiled = ProfiledEvaluations(profiler)
+        evaluations = Evaluations(compiled=False)
+        board = Board()
+        for from_square, to_square in (('e2', 'e4'), ('d7', 'd5'), ('e4', 'd5'), ('g8', 'f6')):
+            board.move_piece(from_square, to_square)
+            for color in (constants.WHITE, constants.BLACK):
+                for window in ((-math.inf, math.inf), (math.inf, math.inf)):
+                    self.assertEqual(profiled.get_bounded_score(board, color, 0, *window),
+                                     evaluations.get_bounded_score(board, color, 0, *window))
+        calls = profiler.terms['evaluation'][0]
+        self.assertEqual(calls, 16)
+        self.assertEqual(profiler.lazy_exits, 8)
+        self.assertEqual(profiler.terms['mobility'][0], 8)
+
+    def test_profiled_search(self):
+        board = Board()
+        move = MiniMax(2).get_next_move(board, constants.WHITE)
+        searcher = MiniMax(2)
+        searcher.profile_eval = True
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(searcher.get_next_move(board, constants.WHITE), move)
+        self.assertIn('evaluations stopped after the first stage', output.getvalue())
+        self.assertGreater(searcher.eval_profiler.terms['evaluation'][0], 0)
+        self.assertNotIsInstance(board.evaluations, ProfiledEvaluations)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.evaluations import Evaluations
+import unittest
+
+
+class EvaluationsTest(unittest.TestCase):
+    # the start position is symmetric, so both colors score the same: no king move past the last square adds to mobility
+    START_SCORE = 1.6345833333333333
+
+    def test_start_position_scores(self):
+        for evaluations in (Evaluations(), Evaluations(compiled=False)):
+            board = Board()
+            self.assertAlmostEqual(evaluations.get_score(board, constants.WHITE, 0), self.START_SCORE, places=9)
+            self.assertAlmostEqual(evaluations.get_score(board, constants.BLACK, 0), self.START_SCORE, places=9)
+
+    def test_attack_maps_stay_on_the_board(self):
+        all_moves = Evaluations(compiled=False).get_attack_maps(Board())
+        for piece_moves in all_moves.values():
+            for _, moves in piece_moves:
+                self.assertEqual(moves & ~constants.FULL_BOARD, 0)
+        self.assertEqual(all_moves[constants.BLACK_KING], [(60, 0)])
+        self.assertEqual(all_moves[constants.WHITE_KING], [(4, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.evaluations import Evaluations
+from algorithms.eval_weights import load_eval_weights
+from algorithms.texel_tuner import parse_placement
+import unittest
+
+
+'''
+    Sets up a board from a FEN piece placement
+
+    PARAMS
+    placement: the FEN piece placement
+
+    RETURNS
+    the Board
+'''
+def get_board(placement):
+    board = Board()
+    board.set_position_encoding(tuple(parse_placement(placement)) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+    return board
+
+
+class GamePhaseTest(unittest.TestCase):
+    def test_board_phase(self):
+        self.assertEqual(Board().phase, constants.MAX_PHASE)
+        self.assertEqual(get_board('4k3/pppppppp/8/8/8/8/PPPPPPPP/4K3').phase, 0)
+        self.assertEqual(get_board('r3k3/8/8/8/8/8/8/2B1KQ2').phase, 2 + 1 + 4)
+
+    def test_phase_follows_captures(self):
+        board = Board()
+        for from_square, to_square in (('e2', 'e4'), ('d7', 'd5'), ('e4', 'd5'), ('d8', 'd5'), ('b1', 'c3'),
+                                       ('d5', 'g2'), ('f1', 'g2')):
+            board.move_piece(from_square, to_square)
+        self.assertEqual(board.phase, constants.MAX_PHASE - 4)
+        board.undo_last()
+        self.assertEqual(board.phase, constants.MAX_PHASE)
+
+    def test_blended_weights(self):
+        evaluations = Evaluations(compiled=False)
+        taper = evaluations.weights['taper']
+        midgame, endgame = evaluations.phase_weights[constants.MAX_PHASE], evaluations.phase_weights[0]
+        halfway = evaluations.phase_weights[constants.MAX_PHASE // 2]
+        for term, (midgame_weight, endgame_weight) in taper.items():
+            self.assertAlmostEqual(midgame[term], midgame_weight)
+            self.assertAlmostEqual(endgame[term], endgame_weight)
+            self.assertAlmostEqual(halfway[term], (midgame_weight + endgame_weight) / 2)
+
+    def test_promoted_queens_score_as_midgame(self):
+        board = get_board('QQQQk3/QQQ5/8/8/8/8/8/4K3')
+        self.assertGreater(board.phase, constants.MAX_PHASE)
+        for compiled in (True, False):
+            score = Evaluations(compiled=compiled).get_score(board, constants.WHITE, 0)
+            board.eval_cache.clear()
+            board.phase = constants.MAX_PHASE
+            self.assertAlmostEqual(Evaluations(compiled=compiled).get_score(board, constants.WHITE, 0), score)
+            board.update_scores()
+
+    def test_terms_without_weight_skipped(self):
+        # focal points and development weigh nothing in an endgame, whatever their points
+        weights = load_eval_weights()
+        for name in weights['focal_points']:
+            weights['focal_points'][name] *= 10
+        for placement, changed in (('4k3/pppp4/8/8/8/8/3PPPP1/4K3', False),
+                                   ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR', True)):
+            for compiled in (True, False):
+                board = get_board(placement)
+                score = Evaluations(compiled=compiled).get_score(board, constants.WHITE, 0)
+                other_score = Evaluations(weights, compiled=compiled).get_score(get_board(placement), constants.WHITE, 0)
+                if (changed):
+                    self.assertNotAlmostEqual(other_score, score)
+                else:
+                    self.assertAlmostEqual(other_score, score)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants, BoardTables as tables
+import unittest
+
+
+'''
+    Builds the shelter regions of a king square by square, as the board did before the regions were precomputed
+
+    PARAMS
+    index: the square of the king
+
+    RETURNS
+    a tuple (immediate shelter, diagonal wide shelter, cross wide shelter, sinuous wide shelter) of integer masks
+'''
+def get_shelter_by_steps(index):
+    immediate, diag_wide, cross_wide, sinu_wide = 0, 0, 0, 0
+    if ((index-1)%8<7):
+        immediate |= 1 << (index-1)
+        if ((index-2)%8<7): cross_wide |= 1 << (index-2)
+    if ((index+1)%8>0):
+        immediate |= 1 << (index+1)
+        if ((index+2)%8>0): cross_wide |= 1 << (index+2)
+    for row, inside, region in ((-8, index-8 > -1, 'immediate'), (-16, index-16 > -1, 'wide'),
+                                (8, index+8 < 56, 'immediate'), (16, index+16 < 56, 'wide')):
+        if (not inside):
+            continue
+        if (region == 'immediate'):
+            immediate |= 1 << (index+row)
+        else:
+            cross_wide |= 1 << (index+row)
+        if ((index+row-1)%8<7):
+            if (region == 'immediate'):
+                immediate |= 1 << (index+row-1)
+                if ((index+row-2)%8<7): sinu_wide |= 1 << (index+row-2)
+            else:
+                sinu_wide |= 1 << (index+row-1)
+                if ((index+row-2)%8<7): diag_wide |= 1 << (index+row-2)
+        if ((index+row+1)%8>0):
+            if (region == 'immediate'):
+                immediate |= 1 << (index+row+1)
+                if ((index+row+2)%8>0): sinu_wide |= 1 << (index+row+2)
+            else:
+                sinu_wide |= 1 << (index+row+1)
+                if ((index+row+2)%8>0): diag_wide |= 1 << (index+row+2)
+    return immediate, diag_wide, cross_wide, sinu_wide
+
+
+class KingShelterTest(unittest.TestCase):
+    def test_every_square(self):
+        for index in range(64):
+            self.assertEqual(tables.KING_SHELTERS[index], get_shelter_by_steps(index), utils.index_to_square(index))
+
+    def test_eighth_rank_left_out(self):
+        # below the eighth rank the shelters stop short of it, and on it they only reach along it and down
+        for immediate, diag_wide, cross_wide, sinu_wide in tables.KING_SHELTERS[:56]:
+            self.assertEqual((immediate | diag_wide | cross_wide | sinu_wide) >> 56, 0)
+        immediate = tables.KING_SHELTERS[utils.square_to_index('e8')][0]
+        self.assertEqual(immediate, sum(1 << utils.square_to_index(square) for square in ('d8', 'f8', 'd7', 'e7', 'f7')))
+
+    def test_board_king(self):
+        board = Board()
+        self.assertEqual(board.get_king_shelter(constants.WHITE), tables.KING_SHELTERS[utils.square_to_index('e1')])
+        board.move_piece('e2', 'e4')
+        board.move_piece('e7', 'e5')
+        board.move_piece('e1', 'e2')
+        self.assertEqual(board.get_king_shelter(constants.WHITE), tables.KING_SHELTERS[utils.square_to_index('e2')])
+        board.undo_last()
+        self.assertEqual(board.get_king_shelter(constants.WHITE), tables.KING_SHELTERS[utils.square_to_index('e1')])
+
+    def test_no_single_king(self):
+        board = Board()
+        board.black_king = 0
+        self.assertEqual(board.get_king_shelter(constants.BLACK), tables.NO_SHELTER)
+        board.black_king = 1 << 60 | 1 << 59
+        self.assertEqual(board.get_king_shelter(constants.BLACK), tables.NO_SHELTER)
+        board.black_king = 1 << 71 # a king that stepped off the board
+        self.assertEqual(board.get_king_shelter(constants.BLACK), tables.NO_SHELTER)
+
+
+if __name__ == '__main__':
+    unittest.main()
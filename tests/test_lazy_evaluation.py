@@ -0,0 +1,101 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.evaluations import Evaluations
+from algorithms.texel_tuner import parse_placement
+import math
+import random
+import unittest
+
+
+'''
+    Sets up a board from a FEN piece placement
+
+    PARAMS
+    placement: the FEN piece placement
+
+    RETURNS
+    the Board
+'''
+def get_board(placement):
+    board = Board()
+    board.set_position_encoding(tuple(parse_placement(placement)) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+    return board
+
+'''
+    Places a king of each color and many other pieces at random, with queens (as after promotions) as likely as all the
+    other pieces together
+
+    PARAMS
+    rng: the random.Random placing the pieces
+    pieces: the number of pieces besides the kings
+
+    RETURNS
+    the Board
+'''
+def get_crowded_board(rng, pieces):
+    squares = rng.sample(range(64), pieces + 2)
+    boards = [0] * 12
+    boards[5] = 1 << squares[0]
+    boards[11] = 1 << squares[1]
+    for square in squares[2:]:
+        if (rng.random() < 0.5):
+            piece = rng.choice((4, 10))
+        else:
+            piece = rng.choice((0, 1, 2, 3, 6, 7, 8, 9))
+        if (piece in (0, 6) and not 8 <= square < 56): # no pawns on the first and last ranks
+            piece += 1
+        boards[piece] |= 1 << square
+    board = Board()
+    board.set_position_encoding(tuple(boards) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+    return board
+
+
+class LazyEvaluationTest(unittest.TestCase):
+    # with the most queens on the board (after promotions) the second stage terms add the most
+    PLACEMENTS = ('1Q6/2r5/1QQB1p2/3Q4/kqq1R3/4K3/2Q2Q2/1Q4Q1', 'QQQQkQQQ/QQQQQQQQ/8/8/8/8/qqqqqqqq/qqqqKqqq',
+                  'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR', '4k3/8/8/8/8/8/8/4K3')
+
+    '''
+        Checks that the bounds get_bounded_score returns when it stops after the first stage hold the full score
+
+        PARAMS
+        evaluations: the Evaluations helper to check
+        board: the Board to score
+    '''
+    def assert_bounds_hold(self, evaluations, board):
+        for color in (constants.WHITE, constants.BLACK):
+            score, exact = evaluations.get_bounded_score(board, color, 0, -math.inf, math.inf)
+            self.assertTrue(exact)
+            upper_bound, exact = evaluations.get_bounded_score(board, color, 0, math.inf, math.inf)
+            self.assertFalse(exact)
+            lower_bound, exact = evaluations.get_bounded_score(board, color, 0, -math.inf, -math.inf)
+            self.assertFalse(exact)
+            self.assertLessEqual(score, upper_bound)
+            self.assertGreaterEqual(score, lower_bound)
+
+    def test_placements(self):
+        for evaluations in (Evaluations(), Evaluations(compiled=False)):
+            for placement in self.PLACEMENTS:
+                self.assert_bounds_hold(evaluations, get_board(placement))
+
+    def test_crowded_boards(self):
+        evaluations = Evaluations()
+        rng = random.Random(0)
+        for _ in range(1000):
+            self.assert_bounds_hold(evaluations, get_crowded_board(rng, rng.randint(0, 40)))
+
+    def test_bound_grows_with_material(self):
+        evaluations = Evaluations()
+        crowded = get_board(self.PLACEMENTS[0])
+        bare = get_board(self.PLACEMENTS[3])
+        margins = []
+        for board in (crowded, bare):
+            score, _ = evaluations.get_bounded_score(board, constants.WHITE, 0, -math.inf, math.inf)
+            upper_bound, _ = evaluations.get_bounded_score(board, constants.WHITE, 0, math.inf, math.inf)
+            lower_bound, _ = evaluations.get_bounded_score(board, constants.WHITE, 0, -math.inf, -math.inf)
+            margins.append(upper_bound - lower_bound)
+        self.assertGreater(margins[0], margins[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
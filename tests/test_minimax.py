@@ -0,0 +1,62 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardUtils as utils, BoardConstants as constants
+from algorithms.minimax import MiniMax
+from algorithms.texel_tuner import parse_placement
+import unittest
+
+
+class SearchStateTest(unittest.TestCase):
+    def test_repeated_search_uses_the_table(self):
+        searcher = MiniMax(3)
+        board = Board()
+        move, stats = searcher.get_next_move(board, constants.WHITE, with_stats=True)
+        repeated_move, repeated_stats = searcher.get_next_move(board, constants.WHITE, with_stats=True)
+        self.assertEqual(repeated_move, move)
+        self.assertGreater(repeated_stats.tt_cutoffs, 0)
+        self.assertLess(repeated_stats.get_nodes(), stats.get_nodes())
+
+    def test_expected_line_followed(self):
+        searcher = MiniMax(3)
+        board = Board()
+        searcher.get_next_move(board, constants.WHITE)
+        line = list(searcher.principal_variation)
+        self.assertGreater(len(line), 2)
+        for from_square, to_square in line[:2]:
+            board.move_piece(from_square, to_square)
+        # the position after the expected reply starts from the rest of the line
+        searcher.prepare_search(board, constants.WHITE)
+        self.assertEqual(searcher.expected_line, [(utils.square_to_index(from_square), utils.square_to_index(to_square))
+                                                  for from_square, to_square in line[2:]])
+
+    def test_unexpected_position(self):
+        searcher = MiniMax(2)
+        board = Board()
+        searcher.get_next_move(board, constants.WHITE)
+        board.move_piece('a2', 'a3')
+        board.move_piece('h7', 'h6')
+        searcher.prepare_search(board, constants.WHITE)
+        self.assertEqual(searcher.expected_line, [])
+
+    def test_history_ages_on_a_new_root(self):
+        searcher = MiniMax(2)
+        board = Board()
+        searcher.get_next_move(board, constants.WHITE)
+        history = list(searcher.history)
+        self.assertTrue(any(history))
+        board.move_piece('a2', 'a3')
+        searcher.prepare_search(board, constants.BLACK)
+        self.assertEqual(searcher.history, [value >> 1 for value in history])
+
+    def test_king_moves_past_the_board(self):
+        # the king on the last square has moves past it, which the history table holds too
+        board = Board()
+        board.set_position_encoding(tuple(parse_placement('7k/8/8/8/8/8/8/K7')) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+        self.assertGreater(board.get_moves(utils.square_to_index('h8')), constants.FULL_BOARD)
+        searcher = MiniMax(2)
+        self.assertTrue(searcher.get_next_move(board, constants.BLACK))
+        searcher.update_history(board, 0, utils.square_to_index('h8'), 72)
+        self.assertTrue(any(searcher.history))
+
+
+if __name__ == '__main__':
+    unittest.main()
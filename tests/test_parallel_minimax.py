@@ -0,0 +1,79 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.minimax import MiniMax
+from algorithms.parallel_minimax import RootSplitMiniMax, LazySMPMiniMax, ThreadedMiniMax, _get_helper_board
+from algorithms.texel_tuner import parse_placement
+from unittest import mock
+import unittest
+
+
+'''
+    Sets up a board from a FEN piece placement
+
+    PARAMS
+    placement: the FEN piece placement, or None for the initial board
+
+    RETURNS
+    the Board
+'''
+def get_board(placement):
+    board = Board()
+    if (placement is not None):
+        board.set_position_encoding(tuple(parse_placement(placement)) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+    return board
+
+
+class ParallelAgreementTest(unittest.TestCase):
+    # (placement, color to move) pairs: the initial board, a hanging queen, a mate in one and a rook endgame
+    POSITIONS = ((None, constants.WHITE), ('6k1/5ppp/8/8/3q4/8/5PPP/3R2K1', constants.WHITE),
+                 ('r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR', constants.WHITE),
+                 ('8/5pk1/6p1/8/3R4/6P1/5PK1/r7', constants.WHITE))
+
+    '''
+        Checks that a parallel searcher finds the serial search's best move and score in every position
+
+        PARAMS
+        searcher: the parallel searcher to check, closed afterwards
+        depth: the depth both searches run to
+    '''
+    def assert_agrees_with_serial(self, searcher, depth=2):
+        try:
+            for placement, color in self.POSITIONS:
+                serial = MiniMax(depth)
+                move = serial.get_next_move(get_board(placement), color)
+                self.assertEqual(searcher.get_next_move(get_board(placement), color), move)
+                self.assertAlmostEqual(searcher.root_score, serial.root_score, places=9)
+        finally:
+            searcher.close()
+
+    def test_root_split(self):
+        self.assert_agrees_with_serial(RootSplitMiniMax(2, workers=2))
+
+    def test_lazy_smp(self):
+        self.assert_agrees_with_serial(LazySMPMiniMax(2, workers=2))
+
+    def test_threaded(self):
+        self.assert_agrees_with_serial(ThreadedMiniMax(2, workers=2))
+
+    def test_threaded_helpers(self):
+        # with the GIL the helper threads take turns rather than running at once, but search the same way
+        with mock.patch.object(ThreadedMiniMax, 'is_free_threaded', return_value=True):
+            searcher = ThreadedMiniMax(2, workers=3)
+            self.assert_agrees_with_serial(searcher)
+            self.assertEqual(len(searcher.helper_depths), 2)
+
+
+class HelperBoardTest(unittest.TestCase):
+    def test_own_caches(self):
+        board = get_board(None)
+        board.get_score(constants.WHITE, 0)
+        helper_board = _get_helper_board(board)
+        self.assertEqual(helper_board.get_position_encoding(), board.get_position_encoding())
+        self.assertIsNot(helper_board.eval_cache, board.eval_cache)
+        self.assertIsNot(helper_board.pawn_cache, board.pawn_cache)
+        self.assertEqual(helper_board.eval_cache.size, board.eval_cache.size)
+        self.assertEqual(helper_board.eval_cache.hits + helper_board.eval_cache.misses, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.minimax import MiniMax
+import unittest
+
+
+class PonderTest(unittest.TestCase):
+    def setUp(self):
+        # the searcher plays its move and ponders on the reply it expects
+        self.searcher = MiniMax(2)
+        self.board = Board()
+        move = self.searcher.get_next_move(self.board, constants.WHITE)
+        self.board.move_piece(move[0], move[1])
+        self.expected_reply = self.searcher.principal_variation[1]
+
+    def test_ponder_hit(self):
+        encoding = self.board.get_position_encoding()
+        handle = self.searcher.start_ponder(self.board, constants.WHITE)
+        self.assertEqual(handle.ponder_move, self.expected_reply)
+        self.assertEqual(self.board.get_position_encoding(), encoding)
+        self.assertIs(handle.ponder_hit(self.expected_reply), handle)
+        move = handle.result(timeout=60)
+        self.assertEqual(handle.completed_depth, 2)
+        # the ponder search found the move a search started after the reply finds
+        self.board.move_piece(self.expected_reply[0], self.expected_reply[1])
+        self.assertEqual(move, MiniMax(2).get_next_move(self.board, constants.WHITE))
+
+    def test_ponder_miss(self):
+        handle = self.searcher.start_ponder(self.board, constants.WHITE)
+        other_reply = ('a7', 'a6') if tuple(self.expected_reply) != ('a7', 'a6') else ('h7', 'h6')
+        self.assertIsNone(handle.ponder_hit(other_reply))
+        self.assertTrue(handle.is_done()) # the ponder search was stopped
+
+    def test_no_expected_reply(self):
+        self.assertIsNone(self.searcher.start_ponder(self.board, constants.WHITE, [('e2', 'e4')]))
+        # a line that does not follow from the board
+        self.assertIsNone(self.searcher.start_ponder(self.board, constants.WHITE, [('e2', 'e4'), ('e2', 'e4')]))
+
+    def test_table_created(self):
+        self.searcher.transposition_table = None
+        handle = self.searcher.start_ponder(self.board, constants.WHITE)
+        self.assertIsNotNone(self.searcher.transposition_table)
+        handle.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
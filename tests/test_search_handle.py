@@ -0,0 +1,72 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.minimax import MiniMax
+from algorithms.parallel_minimax import RootSplitMiniMax, LazySMPMiniMax, ThreadedMiniMax
+import time
+import unittest
+
+
+'''
+    Starts a background search far too deep to finish, lets it run for a moment and stops it
+
+    PARAMS
+    searcher: the MiniMax (or parallel searcher) to search with
+    running: the seconds to let the search run before stopping it
+
+    RETURNS
+    a tuple (seconds stop took to return, the stopped SearchHandle)
+'''
+def stop_search(searcher, running=0.5):
+    handle = searcher.start_search(Board(), constants.WHITE)
+    time.sleep(running)
+    start = time.perf_counter()
+    handle.stop()
+    return time.perf_counter() - start, handle
+
+
+class SearchHandleTest(unittest.TestCase):
+    # the longest a stop may take to return; a depth 5 search takes many times longer
+    STOP_LIMIT = 0.5
+
+    '''
+        Checks that stopping a deep search returns promptly with a move, and that the searcher can search again afterwards
+
+        PARAMS
+        searcher: the searcher to check
+    '''
+    def assert_stops_promptly(self, searcher):
+        try:
+            searcher.MAX_DEPTH = 5
+            seconds, handle = stop_search(searcher)
+            self.assertLess(seconds, self.STOP_LIMIT)
+            self.assertLess(handle.completed_depth, 5)
+            self.assertIsNone(handle.error)
+            self.assertIsNotNone(handle.best_move)
+            searcher.MAX_DEPTH = 1
+            self.assertTrue(searcher.get_next_move(Board(), constants.WHITE))
+        finally:
+            if (hasattr(searcher, 'close')):
+                searcher.close()
+
+    def test_serial_stop(self):
+        self.assert_stops_promptly(MiniMax())
+
+    def test_root_split_stop(self):
+        self.assert_stops_promptly(RootSplitMiniMax(workers=2))
+
+    def test_lazy_smp_stop(self):
+        self.assert_stops_promptly(LazySMPMiniMax(workers=2))
+
+    def test_threaded_stop(self):
+        self.assert_stops_promptly(ThreadedMiniMax(workers=2))
+
+    def test_finished_search(self):
+        searcher = MiniMax(1)
+        handle = searcher.start_search(Board(), constants.WHITE)
+        self.assertTrue(handle.result(timeout=30))
+        self.assertTrue(handle.is_done())
+        self.assertEqual(handle.completed_depth, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.minimax import MiniMax
+from algorithms.search_profiler import SearchProfiler
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+
+
+'''
+    Calls busy_leaf a number of times, as a small call tree to profile
+
+    PARAMS
+    calls: the number of calls
+    seconds: the seconds each call keeps busy for
+
+    RETURNS
+    the number of calls
+'''
+def busy_root(calls, seconds):
+    for _ in range(calls):
+        busy_leaf(seconds)
+    return calls
+
+'''
+    Keeps busy for a number of seconds
+
+    PARAMS
+    seconds: the seconds to keep busy for
+'''
+def busy_leaf(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class SearchProfilerTest(unittest.TestCase):
+    def test_cprofile(self):
+        profiler = SearchProfiler('cprofile')
+        self.assertEqual(profiler.run(busy_root, 5, 0.01), 5)
+        calls, own, total = profiler.functions['test_search_profiler.busy_leaf']
+        self.assertEqual(calls, 5)
+        self.assertGreater(total, 0.04)
+        self.assertLessEqual(profiler.functions['test_search_profiler.busy_root'][1], total)
+        # the leaf's time (and that of the clock it reads) lies under the root in the stacks
+        stacks = [line.rsplit(' ', 1) for line in profiler.get_collapsed_stacks().splitlines()]
+        leaf = 'test_search_profiler.busy_root;test_search_profiler.busy_leaf'
+        self.assertIn(leaf, [stack for stack, _ in stacks])
+        self.assertGreater(sum(int(value) for stack, value in stacks if stack.startswith(leaf)), 40000)
+        self.assertIn('cprofile profile of a', profiler.get_summary())
+
+    def test_sampling(self):
+        profiler = SearchProfiler('sampling', interval=0.001)
+        self.assertEqual(profiler.run(busy_root, 5, 0.02), 5)
+        calls, own, total = profiler.functions['test_search_profiler.busy_leaf']
+        self.assertIsNone(calls)
+        self.assertGreater(own, 0)
+        self.assertLessEqual(sum(own for _, own, _ in profiler.functions.values()), profiler.elapsed + 1e-9)
+        self.assertTrue(all(stack.startswith('test_search_profiler.busy_root') for stack in profiler.stacks))
+
+    def test_profiled_function_raises(self):
+        for mode in SearchProfiler.MODES:
+            profiler = SearchProfiler(mode)
+            with self.assertRaises(ZeroDivisionError):
+                profiler.run(lambda: 1 / 0)
+            self.assertGreater(profiler.elapsed, 0)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            SearchProfiler('tracing')
+
+    def test_profiled_search(self):
+        move = MiniMax(2).get_next_move(Board(), constants.WHITE)
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'search.folded')
+        try:
+            for mode in SearchProfiler.MODES:
+                searcher = MiniMax(2)
+                searcher.profile_search = mode
+                searcher.profile_path = path
+                with contextlib.redirect_stdout(io.StringIO()):
+                    self.assertEqual(searcher.get_next_move(Board(), constants.WHITE), move)
+                with open(path) as stacks:
+                    lines = stacks.read().splitlines()
+                self.assertTrue(lines)
+                self.assertTrue(all(line.startswith('minimax.minimax') for line in lines))
+        finally:
+            if (os.path.exists(path)):
+                os.remove(path)
+            os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.minimax import MiniMax
+from algorithms.parallel_minimax import RootSplitMiniMax
+from algorithms.search_stats import SearchStats
+import unittest
+
+
+class SearchStatsTest(unittest.TestCase):
+    def test_one_ply_search(self):
+        # the root is expanded and each of white's 20 moves scored
+        _, stats = MiniMax(0).get_next_move(Board(), constants.WHITE, with_stats=True)
+        self.assertEqual((stats.interior_nodes, stats.leaf_nodes, stats.eval_calls), (1, 20, 20))
+        self.assertEqual((stats.beta_cutoffs, stats.tt_probes, stats.tt_hits), (0, 1, 0))
+        self.assertEqual([iteration[:2] for iteration in stats.iterations], [(0, 21)])
+        self.assertAlmostEqual(stats.iterations[0][3], 21.0)
+
+    def test_counters_agree(self):
+        _, stats = MiniMax(2).get_next_move(Board(), constants.WHITE, with_stats=True)
+        self.assertEqual(stats.get_nodes(), stats.interior_nodes + stats.leaf_nodes)
+        self.assertEqual(stats.eval_calls, stats.leaf_nodes)
+        self.assertGreater(stats.beta_cutoffs, 0)
+        self.assertLessEqual(stats.first_move_cutoffs, stats.beta_cutoffs)
+        self.assertLessEqual(stats.tt_cutoffs, stats.tt_hits)
+        self.assertLessEqual(stats.tt_hits, stats.tt_probes)
+        self.assertEqual(sum(iteration[1] for iteration in stats.iterations), stats.get_nodes())
+        self.assertAlmostEqual(stats.iterations[-1][3], stats.get_nodes() ** (1 / 3))
+        self.assertGreater(stats.elapsed, 0)
+        self.assertEqual(stats.as_dict()['nodes'], stats.get_nodes())
+
+    def test_root_split_merges_workers(self):
+        searcher = RootSplitMiniMax(1, workers=2)
+        try:
+            _, stats = searcher.get_next_move(Board(), constants.WHITE, with_stats=True)
+        finally:
+            searcher.close()
+        # every root move's subtree is searched by a worker, whose counters come back to the root's
+        self.assertGreaterEqual(stats.leaf_nodes, 20)
+        self.assertEqual(stats.get_nodes(), stats.interior_nodes + stats.leaf_nodes)
+        self.assertEqual(sum(iteration[1] for iteration in stats.iterations), stats.get_nodes())
+
+    def test_iterations(self):
+        stats = SearchStats()
+        stats.start()
+        stats.leaf_nodes += 8
+        stats.end_iteration(2)
+        stats.leaf_nodes += 16
+        stats.end_iteration(3)
+        stats.stop()
+        self.assertEqual([iteration[:2] for iteration in stats.iterations], [(2, 8), (3, 16)])
+        self.assertAlmostEqual(stats.iterations[0][3], 2.0)
+        self.assertAlmostEqual(stats.iterations[1][3], 2.0)
+        self.assertLessEqual(sum(iteration[2] for iteration in stats.iterations), stats.elapsed)
+
+    def test_merge(self):
+        stats, other = SearchStats(), SearchStats()
+        stats.beta_cutoffs, stats.first_move_cutoffs = 4, 3
+        other.interior_nodes, other.leaf_nodes, other.beta_cutoffs, other.first_move_cutoffs = 5, 7, 4, 1
+        other.iterations = [(1, 12, 0.5, 2.0)]
+        stats.merge(other)
+        self.assertEqual(stats.get_nodes(), 12)
+        self.assertEqual(stats.get_first_move_cutoff_ratio(), 0.5)
+        self.assertEqual(stats.iterations, [])
+
+    def test_empty_rates(self):
+        stats = SearchStats()
+        self.assertEqual((stats.get_nps(), stats.get_first_move_cutoff_ratio()), (0.0, 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
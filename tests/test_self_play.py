@@ -0,0 +1,99 @@
+from game_logic.board import Board
+from algorithms.self_play import (ShardWriter, SelfPlayGenerator, encode_record, decode_record, read_shard,
+                                  read_shard_games)
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+
+'''
+    Gets the games and positions held in a directory's complete shards
+
+    PARAMS
+    directory: the directory of the shards
+
+    RETURNS
+    a tuple (sorted list of game numbers, dictionary of game number to the sorted records of that game)
+'''
+def read_directory(directory):
+    games = []
+    records = {}
+    for path in glob.glob(os.path.join(directory, 'shard_*.bin')):
+        games.extend(read_shard_games(path))
+        for record in read_shard(path):
+            records.setdefault(record[5], []).append(record)
+    return sorted(games), {game: sorted(game_records, key=lambda record: record[4]) for game, game_records in records.items()}
+
+
+class SelfPlayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    '''
+        Creates a generator of short, shallow games into the test directory
+
+        PARAMS
+        games: the number of games the run should hold
+
+        RETURNS
+        the SelfPlayGenerator
+    '''
+    def get_generator(self, games):
+        return SelfPlayGenerator(self.directory, games, depth=1, workers=1, opening_plies=(2, 4), sample_rate=1.0,
+                                 max_plies=6, shard_size=8)
+
+    def test_record_round_trip(self):
+        piece_boards = list(Board().get_position_encoding()[:12])
+        record = encode_record(piece_boards, 1, -0.5, -1, 17, 42)
+        self.assertEqual(decode_record(record), (piece_boards, 1, -0.5, -1, 17, 42))
+
+    def test_writer_completes_full_shards(self):
+        piece_boards = Board().get_position_encoding()[:12]
+        writer = ShardWriter(self.directory, shard_size=3)
+        writer.write_game([encode_record(piece_boards, 0, 0.0, 0, ply, 0) for ply in range(2)], 0)
+        self.assertTrue(os.path.exists(writer.get_path(0, '.part')))
+        self.assertFalse(os.path.exists(writer.get_path(0, '.bin')))
+        writer.write_game([encode_record(piece_boards, 0, 0.0, 0, ply, 1) for ply in range(2)], 1)
+        self.assertTrue(os.path.exists(writer.get_path(0, '.bin')))
+        self.assertFalse(os.path.exists(writer.get_path(0, '.part')))
+        writer.write_game([], 2)
+        writer.close()
+        self.assertEqual(read_shard_games(writer.get_path(0, '.bin')), [0, 1])
+        self.assertEqual(read_shard_games(writer.get_path(1, '.bin')), [2])
+        self.assertEqual(len(list(read_shard(writer.get_path(0, '.bin')))), 4)
+        writer.close() # nothing is open
+        self.assertEqual(writer.shard_number, 2)
+
+    def test_resume_plays_missing_games(self):
+        self.assertEqual(self.get_generator(3).run(), 3)
+        games, records = read_directory(self.directory)
+        self.assertEqual(games, [0, 1, 2])
+        self.assertTrue(records)
+        # a run interrupted while writing leaves a .part shard, whose games are played again
+        with open(os.path.join(self.directory, 'shard_00099.part'), 'wb') as part:
+            part.write(b'partial')
+        generator = self.get_generator(5)
+        self.assertEqual(generator.get_finished_games(), {0, 1, 2})
+        self.assertEqual(generator.run(), 2)
+        self.assertEqual(glob.glob(os.path.join(self.directory, 'shard_*.part')), [])
+        resumed_games, resumed_records = read_directory(self.directory)
+        self.assertEqual(resumed_games, [0, 1, 2, 3, 4])
+        for game in games:
+            self.assertEqual(resumed_records.get(game), records.get(game))
+        self.assertEqual(self.get_generator(5).run(), 0)
+
+    def test_games_repeat_across_runs(self):
+        self.get_generator(2).run()
+        _, records = read_directory(self.directory)
+        shutil.rmtree(self.directory)
+        self.get_generator(2).run()
+        self.assertEqual(read_directory(self.directory)[1], records)
+
+
+if __name__ == '__main__':
+    unittest.main()
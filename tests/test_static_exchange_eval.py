@@ -0,0 +1,42 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardUtils as utils
+from algorithms.texel_tuner import parse_placement
+import unittest
+
+
+'''
+    Sets up a board from a FEN piece placement and statically evaluates a capture on it
+
+    PARAMS
+    placement: the FEN piece placement
+    from_square, to_square: the squares of the capturing piece and of the captured piece
+
+    RETURNS
+    the material gain of the exchange for the capturing side
+'''
+def get_exchange(placement, from_square, to_square):
+    board = Board()
+    board.set_position_encoding(tuple(parse_placement(placement)) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+    return board.move_generator.static_exchange_eval(board, utils.square_to_index(from_square),
+                                                     utils.square_to_index(to_square))
+
+
+class StaticExchangeEvalTest(unittest.TestCase):
+    def test_undefended_capture(self):
+        self.assertEqual(get_exchange('4k3/8/8/3n4/8/8/8/3RK3', 'd1', 'd5'), 3)
+
+    def test_pawn_takes_defended_knight(self):
+        self.assertEqual(get_exchange('4k3/8/2p5/3n4/4P3/8/8/4K3', 'e4', 'd5'), 2)
+
+    def test_even_trade(self):
+        self.assertEqual(get_exchange('3rk3/8/8/8/8/8/8/3RK3', 'd1', 'd8'), 0)
+
+    def test_queen_takes_defended_pawn(self):
+        self.assertEqual(get_exchange('4k3/8/2p5/3p4/8/8/3Q4/4K3', 'd2', 'd5'), -8)
+
+    def test_x_ray_recapture(self):
+        self.assertEqual(get_exchange('4k3/8/2p5/3p4/8/5B2/6Q1/4K3', 'f3', 'd5'), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
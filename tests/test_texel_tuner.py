@@ -0,0 +1,122 @@
+from game_logic.board import Board
+from game_logic.board_utils import BoardConstants as constants
+from algorithms.evaluations import Evaluations
+from algorithms.eval_weights import load_eval_weights
+from algorithms import batch_evaluations, texel_tuner
+from algorithms.texel_tuner import TexelTuner, parse_placement
+from unittest import mock
+import random
+import unittest
+
+PLACEMENTS = ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR', 'r1bq1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1',
+              '8/5pk1/6p1/8/3R4/6P1/5PK1/r7', '6k1/5ppp/8/8/8/8/1q3PPP/3R2K1')
+
+
+'''
+    Gets the weights with only the terms the tuner scores: every taper but those of the pawn, position and king security
+    terms is zeroed, as are the focal points the tuner leaves out
+
+    RETURNS
+    the weights
+'''
+def get_tuned_terms():
+    weights = load_eval_weights()
+    for term in weights['taper']:
+        if (term not in ('pawn', 'position', 'king security')):
+            weights['taper'][term] = [0.0, 0.0]
+    for name in weights['focal_points']:
+        weights['focal_points'][name] = 0.0
+    return weights
+
+'''
+    Places a king of each color and other pieces at random
+
+    PARAMS
+    rng: the random.Random placing the pieces
+
+    RETURNS
+    the piece boards of the position, in the order of Board.get_position_encoding
+'''
+def get_random_position(rng):
+    squares = rng.sample(range(64), rng.randint(2, 24))
+    boards = [0] * 12
+    boards[5] = 1 << squares[0]
+    boards[11] = 1 << squares[1]
+    for square in squares[2:]:
+        piece = rng.choice((0, 1, 2, 3, 4, 6, 7, 8, 9, 10))
+        if (piece in (0, 6) and not 8 <= square < 56): # no pawns on the first and last ranks
+            continue
+        boards[piece] |= 1 << square
+    return boards
+
+
+class TexelTunerTest(unittest.TestCase):
+    def setUp(self):
+        self.tuner = TexelTuner(get_tuned_terms(), workers=1, scale=1.3)
+        self.positions = [parse_placement(placement) for placement in PLACEMENTS]
+        rng = random.Random(0)
+        self.positions += [get_random_position(rng) for _ in range(60)]
+        self.results = [rng.choice((0.0, 0.5, 1.0)) for _ in self.positions]
+        for piece_boards, result in zip(self.positions, self.results):
+            self.tuner.add_position(piece_boards, result)
+
+    def tearDown(self):
+        self.tuner.close()
+
+    '''
+        Gets the loss of a vector of tuned weights from the engine's own evaluation
+
+        PARAMS
+        vector: the values of the tuned weights
+
+        RETURNS
+        the mean squared error of the tuner's positions
+    '''
+    def get_expected_loss(self, vector):
+        evaluations = Evaluations(self.tuner.get_weights(vector), compiled=False)
+        board = Board()
+        error = 0.0
+        for piece_boards, result in zip(self.positions, self.results):
+            board.set_position_encoding(tuple(piece_boards) + (0, 0, 0, (0, 0, 0), (0, 0, 0)))
+            score = evaluations.get_score(board, constants.WHITE, 0)
+            error += (result - 1 / (1 + 10 ** (-self.tuner.scale * score))) ** 2
+        return error / len(self.positions)
+
+    '''
+        Gets a vector with every tuned weight moved from its current value
+
+        RETURNS
+        the vector
+    '''
+    def get_moved_vector(self):
+        rng = random.Random(1)
+        return [value + rng.uniform(-0.3, 0.3) for value in self.tuner.get_vector()]
+
+    @unittest.skipIf(texel_tuner.np is None, 'numpy is not installed')
+    def test_loss_with_numpy(self):
+        for vector in (self.tuner.get_vector(), self.get_moved_vector()):
+            self.assertAlmostEqual(self.tuner.get_loss(vector), self.get_expected_loss(vector), places=9)
+
+    def test_loss_without_numpy(self):
+        with mock.patch.object(texel_tuner, 'np', None), mock.patch.object(batch_evaluations, 'np', None):
+            tuner = TexelTuner(get_tuned_terms(), workers=1, scale=1.3)
+            for piece_boards, result in zip(self.positions, self.results):
+                tuner.add_position(piece_boards, result)
+            for vector in (tuner.get_vector(), self.get_moved_vector()):
+                self.assertAlmostEqual(tuner.get_loss(vector), self.get_expected_loss(vector), places=9)
+
+    def test_loss_across_workers(self):
+        vector = self.get_moved_vector()
+        loss = self.tuner.get_loss(vector)
+        self.tuner.workers = 2
+        self.tuner.SHARD_SIZE = 16
+        self.assertAlmostEqual(self.tuner.get_loss(vector), loss, places=9)
+        self.assertIsNotNone(self.tuner.pool)
+
+    def test_empty_corpus(self):
+        with self.assertRaises(ValueError):
+            TexelTuner(workers=1).get_loss([])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+from algorithms.tournament import Tournament, parse_opening, parse_engine
+import math
+import unittest
+
+
+'''
+    Sets up a tournament holding the given results, without playing any game
+
+    PARAMS
+    wins, draws, losses: the results from A's perspective
+
+    RETURNS
+    the Tournament
+'''
+def get_tournament(wins, draws, losses):
+    tournament = Tournament({'depth': 1}, {'depth': 1}, workers=1)
+    tournament.wins, tournament.draws, tournament.losses = wins, draws, losses
+    return tournament
+
+
+class TournamentTest(unittest.TestCase):
+    def test_llr(self):
+        # 60 wins, 20 draws and 20 losses: a mean score of 0.7 with variance 0.16, and expected scores of 0.5 (elo0 = 0)
+        # and 0.514387 (elo1 = 10), so the llr is 100 * 0.014387 * (1.4 - 1.014387) / 0.32
+        self.assertAlmostEqual(get_tournament(60, 20, 20).get_llr(), 1.7337133, places=6)
+        # an even score counts against the alternative hypothesis
+        self.assertAlmostEqual(get_tournament(30, 40, 30).get_llr(), -0.0689970, places=6)
+
+    def test_llr_without_decisive_games(self):
+        self.assertEqual(get_tournament(0, 0, 0).get_llr(), 0.0)
+        self.assertEqual(get_tournament(0, 12, 0).get_llr(), 0.0)
+
+    def test_bounds(self):
+        lower, upper = get_tournament(0, 0, 0).get_bounds()
+        self.assertAlmostEqual(lower, -math.log(19))
+        self.assertAlmostEqual(upper, math.log(19))
+
+    def test_elo(self):
+        # a mean score of 0.7 is 400 * log10(0.7 / 0.3) Elo, and the 95% interval spans 1.96 * sqrt(0.16 / 100) either side
+        elo, margin = get_tournament(60, 20, 20).get_elo()
+        self.assertAlmostEqual(elo, 400 * math.log10(7 / 3), places=6)
+        self.assertAlmostEqual(margin, 66.013382, places=5)
+        elo, margin = get_tournament(30, 40, 30).get_elo()
+        self.assertAlmostEqual(elo, 0.0)
+        self.assertAlmostEqual(margin, 53.157980, places=5)
+
+    def test_elo_of_one_sided_results(self):
+        self.assertEqual(get_tournament(10, 0, 0).get_elo(), (math.inf, math.inf))
+        self.assertEqual(get_tournament(0, 0, 10).get_elo(), (-math.inf, math.inf))
+        self.assertEqual(get_tournament(0, 0, 0).get_elo(), (0.0, math.inf))
+
+    def test_summary_waits_for_min_games(self):
+        tournament = get_tournament(60, 20, 20)
+        tournament.elo1 = 100
+        self.assertGreater(tournament.get_llr(), tournament.get_bounds()[1])
+        self.assertEqual(tournament.get_summary()['result'], 'H1')
+        tournament.min_games = 101
+        self.assertEqual(tournament.get_summary()['result'], 'inconclusive')
+
+    def test_parsing(self):
+        self.assertEqual(parse_opening('e2e4 e7-e5'), [('e2', 'e4'), ('e7', 'e5')])
+        self.assertEqual(parse_engine('depth=3,use_move_ordering=False'), {'depth': 3, 'use_move_ordering': False})
+        self.assertEqual(parse_engine(''), {'depth': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+from algorithms.transposition_table import TranspositionTable, SharedTranspositionTable
+import unittest
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_store_and_probe(self):
+        table = TranspositionTable(1 << 4)
+        table.store(0x1234, -2.5, 3, TranspositionTable.EXACT, (12, 28))
+        self.assertEqual(table.probe(0x1234), (-2.5, 3, TranspositionTable.EXACT, (12, 28)))
+        self.assertIsNone(table.probe(0x1235))
+
+    def test_move_past_the_board(self):
+        table = TranspositionTable(1 << 4)
+        table.new_search(5)
+        table.store(0x9, 0.5, 2, TranspositionTable.EXACT, (63, 72))
+        self.assertEqual(table.probe(0x9), (0.5, 2, TranspositionTable.EXACT, (63, 72)))
+
+    def test_bound_types(self):
+        table = TranspositionTable(1 << 4)
+        for key, bound in enumerate((TranspositionTable.EXACT, TranspositionTable.LOWER_BOUND,
+                                     TranspositionTable.UPPER_BOUND)):
+            table.store(key, float(key), 1, bound, None)
+            self.assertEqual(table.probe(key), (float(key), 1, bound, None))
+
+    def test_other_key_in_slot(self):
+        table = TranspositionTable(1 << 4)
+        table.store(0x10, 1.0, 2, TranspositionTable.EXACT, None)
+        # the same slot, but the check word only matches the key the entry was written for
+        self.assertIsNone(table.probe(0x20))
+
+    def test_torn_entry(self):
+        table = TranspositionTable(1 << 4)
+        table.store(0x5, 1.0, 2, TranspositionTable.EXACT, (1, 2))
+        slot = 0x5 * TranspositionTable.WORDS_PER_ENTRY
+        # another writer's score landing in the slot between the words of this entry
+        table.words[slot + 1] ^= 1 << 62
+        self.assertIsNone(table.probe(0x5))
+
+    def test_shared_table(self):
+        table = SharedTranspositionTable(1 << 4)
+        try:
+            attached = SharedTranspositionTable(1 << 4, table.name)
+            try:
+                table.store(0x7, 0.75, 4, TranspositionTable.LOWER_BOUND, (8, 16))
+                self.assertEqual(attached.probe(0x7), (0.75, 4, TranspositionTable.LOWER_BOUND, (8, 16)))
+            finally:
+                attached.close()
+        finally:
+            table.close()
+
+    def test_deeper_entry_kept_within_a_search(self):
+        table = TranspositionTable(1 << 4)
+        table.new_search(1)
+        table.store(0x3, 1.0, 4, TranspositionTable.EXACT, None)
+        table.store(0x13, 2.0, 2, TranspositionTable.EXACT, None)
+        self.assertEqual(table.probe(0x3), (1.0, 4, TranspositionTable.EXACT, None))
+        self.assertIsNone(table.probe(0x13))
+        table.store(0x13, 3.0, 4, TranspositionTable.UPPER_BOUND, None)
+        self.assertEqual(table.probe(0x13), (3.0, 4, TranspositionTable.UPPER_BOUND, None))
+
+    def test_older_entry_replaced(self):
+        table = TranspositionTable(1 << 4)
+        table.new_search(1)
+        table.store(0x3, 1.0, 6, TranspositionTable.EXACT, None)
+        # searching the same root again keeps the generation, a new root starts the next one
+        table.new_search(1)
+        table.store(0x13, 2.0, 2, TranspositionTable.EXACT, None)
+        self.assertIsNone(table.probe(0x13))
+        table.new_search(2)
+        table.store(0x13, 2.0, 2, TranspositionTable.EXACT, None)
+        self.assertEqual(table.probe(0x13), (2.0, 2, TranspositionTable.EXACT, None))
+        self.assertIsNone(table.probe(0x3))
+
+    def test_age_wraps(self):
+        table = TranspositionTable(1 << 4)
+        for root in range(TranspositionTable.AGE_MASK + 2):
+            table.new_search(root)
+        self.assertEqual(table.age, 1)
+
+    def test_size_must_be_power_of_two(self):
+        with self.assertRaises(ValueError):
+            TranspositionTable(12)
+
+
+if __name__ == '__main__':
+    unittest.main()